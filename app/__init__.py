@@ -9,7 +9,11 @@ import os
 # Allow relative imports to work
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from database.database_setup import get_db_connection
+from database.database_setup import get_db_connection, init_app as init_db
+from database.seat_holds import init_app as init_seat_holds
+from database.outbox import init_app as init_outbox
+from database.backup import init_app as init_backup
+from database.occupancy import init_app as init_occupancy
 from blueprints.admin_routes import admin_routes
 from blueprints.manager_routes import manager_routes
 from blueprints.booking_routes import booking_routes
@@ -36,6 +40,8 @@ def create_app(testing=False):
     app.config["JWT_COOKIE_SAMESITE"] = "Lax"
     app.config["JWT_ACCESS_TOKEN_EXPIRES"] = 1800
     app.config["JWT_COOKIE_CSRF_PROTECT"] = False
+    # Seconds role lookups and the revocation list are cached per worker
+    app.config.setdefault("AUTH_CACHE_TTL", 30)
 
     # Mail config
     app.config['MAIL_SERVER'] = 'smtp.gmail.com'
@@ -54,11 +60,54 @@ def create_app(testing=False):
 
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
+    # SQLite connection pool (per worker process)
+    app.config.setdefault('DB_POOL_SIZE', 5)
+    app.config.setdefault('DB_POOL_TIMEOUT', 10.0)
+
+    # SQLite storage: "wal" or "rollback" journaling, checkpoint interval in seconds (0 disables)
+    app.config.setdefault('DB_STORAGE_MODE', os.environ.get('DB_STORAGE_MODE', 'wal'))
+    app.config.setdefault('DB_CHECKPOINT_INTERVAL', 0 if testing else 60)
+    app.config.setdefault('DB_AUTO_MIGRATE', True)
+
+    # Seat holds: lifetime of a hold and how often expired holds are swept (0 disables)
+    app.config.setdefault('SEAT_HOLD_TTL', 300)
+    app.config.setdefault('SEAT_HOLD_SWEEP_INTERVAL', 0 if testing else 30)
+
+    # Films per admin dashboard page (keyset paginated); ?per_page may ask for up to 4x this
+    app.config.setdefault('ADMIN_DASHBOARD_PAGE_SIZE', 100)
+
+    # Rows fetched per chunk when streaming /report/* exports
+    app.config.setdefault('REPORT_EXPORT_CHUNK_SIZE', 1000)
+
+    # Email outbox: worker threads, poll interval in seconds (0 disables), batch size and retry limit
+    app.config.setdefault('OUTBOX_WORKERS', 2)
+    app.config.setdefault('OUTBOX_POLL_INTERVAL', 0 if testing else 5)
+    app.config.setdefault('OUTBOX_BATCH_SIZE', 20)
+    app.config.setdefault('OUTBOX_MAX_ATTEMPTS', 5)
+
+    # Occupancy counters: how often they are checked against seats/bookings, in seconds (0 disables)
+    app.config.setdefault('OCCUPANCY_RECONCILE_INTERVAL', 0 if testing else 3600)
+
+    # Online backups: snapshot interval in seconds (0 disables), directory and retention
+    app.config.setdefault('BACKUP_INTERVAL', 0 if testing else 6 * 3600)
+    app.config.setdefault('BACKUP_DIR', None)  # defaults to backups/ next to the database
+    app.config.setdefault('BACKUP_KEEP_LAST', 7)
+    app.config.setdefault('BACKUP_KEEP_DAILY', 7)
+
+    # Singleton jobs (hold sweeps, outbox, backups, reconciliation, WAL checkpoints) run in
+    # whichever process takes the database's job lock first; False keeps this process out of it
+    app.config.setdefault('BACKGROUND_JOBS', True)
+
     # Initialize extensions
     bcrypt.init_app(app)
     mail.init_app(app)
     db.init_app(app)
     jwt.init_app(app)  # ✅ This is the fix!
+    init_db(app)
+    init_seat_holds(app)
+    init_outbox(app)
+    init_backup(app)
+    init_occupancy(app)
 
     # Register Blueprints
     app.register_blueprint(admin_routes)
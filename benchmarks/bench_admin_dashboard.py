@@ -0,0 +1,92 @@
+"""Micro-benchmark: admin dashboard catalogue, N+1 lookups vs one aggregate query.
+
+The legacy path reproduces the original admin_dashboard(): one cinema
+SELECT per (film, cinema) row and a quadratic ``any()`` film dedup. The
+new path is database.catalogue.film_catalogue(). Each size is seeded into
+a fresh database so the per-film cost can be compared across sizes.
+
+    python benchmarks/bench_admin_dashboard.py --films 500 1000 2000 4000
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from database.catalogue import film_catalogue
+from database.database_setup import initialize_database
+
+
+def legacy_dashboard(cursor):
+    cursor.execute("""
+        SELECT films.id AS film_id, films.title, films.genre, films.age_rating,
+               showtimes.cinema_id, GROUP_CONCAT(DISTINCT showtimes.show_time) AS showtimes
+        FROM films
+        LEFT JOIN showtimes ON films.id = showtimes.film_id
+        GROUP BY films.id, showtimes.cinema_id
+    """)
+    films, film_cinemas = [], {}
+    for row in cursor.fetchall():
+        fid = row["film_id"]
+        if not any(f["id"] == fid for f in films):
+            films.append({"id": fid, "title": row["title"], "genre": row["genre"],
+                          "age_rating": row["age_rating"], "showtimes": row["showtimes"] or "None"})
+        if row["cinema_id"]:
+            cursor.execute("SELECT id, city, location FROM cinemas WHERE id = ?", (row["cinema_id"],))
+            cinema = cursor.fetchone()
+            if cinema:
+                film_cinemas.setdefault(fid, []).append(cinema)
+    return films, film_cinemas
+
+
+def seed(conn, films, cinemas=30, showtimes=4):
+    cinema_ids = [conn.execute("INSERT INTO cinemas (city, location, num_of_screens) VALUES (?, 'Bench', 1)",
+                               (f"City {n}",)).lastrowid for n in range(cinemas)]
+    conn.executemany("INSERT INTO films (title, genre, age_rating) VALUES (?, 'Drama', '12A')",
+                     [(f"Film {n}",) for n in range(films)])
+    film_ids = [row[0] for row in conn.execute("SELECT id FROM films")]
+    conn.executemany(
+        "INSERT INTO showtimes (film_id, cinema_id, screen_number, show_time, price) VALUES (?, ?, 1, ?, 8)",
+        [(film_id, cinema_ids[(film_id + k) % cinemas], f"2025-04-{1 + k:02d} 19:00:00")
+         for film_id in film_ids for k in range(showtimes)]
+    )
+    conn.commit()
+
+
+def best_of(repeat, fn):
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - started)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--films", type=int, nargs="+", default=[500, 1000, 2000, 4000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'films':>6}  {'legacy ms':>10}  {'µs/film':>8}  {'new ms':>8}  {'µs/film':>8}")
+    for films in args.films:
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = os.path.join(tmp, "bench.db")
+            initialize_database(db_path=db_path)
+            conn = sqlite3.connect(db_path)
+            conn.row_factory = sqlite3.Row
+            seed(conn, films)
+
+            legacy = best_of(args.repeat, lambda: legacy_dashboard(conn.cursor()))
+            new = best_of(args.repeat, lambda: film_catalogue(conn.cursor()))
+            conn.close()
+
+        print(f"{films:>6}  {legacy * 1000:>10.1f}  {legacy / films * 1e6:>8.1f}  "
+              f"{new * 1000:>8.1f}  {new / films * 1e6:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
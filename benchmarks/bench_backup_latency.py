@@ -0,0 +1,119 @@
+"""Booking latency while an online backup is running.
+
+Fills a database with bookings (plus padding to reach ``--size-mb``), then
+times single-seat booking transactions from one thread while another thread
+copies the database over and over: not at all, page-stepped as
+``database.backup`` does, and in one step. Run from the repository root:
+
+    python benchmarks/bench_backup_latency.py --size-mb 200 --bookings 500
+"""
+import argparse
+import os
+import sqlite3
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from database.backup import DEFAULT_PAGES_PER_STEP, DEFAULT_STEP_SLEEP, copy_database
+from database.database_setup import initialize_database, run_write_transaction, storage_pragmas
+
+
+def connect(db_path, mode):
+    conn = sqlite3.connect(db_path, timeout=30)
+    for name, value in storage_pragmas(mode).items():
+        conn.execute(f"PRAGMA {name} = {value}")
+    return conn
+
+
+def seed(db_path, mode, size_mb):
+    initialize_database(db_path=db_path)
+    conn = connect(db_path, mode)
+    conn.execute("INSERT INTO films (title, genre, age_rating) VALUES ('Bench', 'Drama', 'PG')")
+    conn.execute("INSERT INTO cinemas (city, location, num_of_screens) VALUES ('Bristol', 'Bench', 1)")
+    conn.execute("INSERT INTO showtimes (film_id, cinema_id, screen_number, show_time, price) "
+                 "VALUES (1, 1, 1, '2030-01-01 19:00:00', 8)")
+    rows = size_mb * 1024 * 1024 // 300
+    conn.executemany(
+        "INSERT INTO bookings (customer_name, customer_email, customer_phone, showtime_id, seat_id, "
+        "booking_reference, total_price, booking_date) VALUES (?, ?, '0', 1, ?, ?, 8, '2029-12-01 10:00:00')",
+        ((f"Customer {n} {'x' * 150}", f"c{n}@example.com", n, f"REF{n:08d}") for n in range(rows))
+    )
+    conn.commit()
+    conn.close()
+    return rows
+
+
+def book(conn, seat_id):
+    run_write_transaction(conn, lambda cursor: cursor.execute("""
+        INSERT INTO bookings (customer_name, customer_email, customer_phone, showtime_id,
+                              seat_id, booking_reference, total_price, booking_date)
+        VALUES ('Bench', 'bench@example.com', '0', 1, ?, 'bench', 8, datetime('now'))
+    """, (seat_id,)))
+
+
+def run(mode, strategy, db_path, bookings, tmp, first_seat):
+    stop = threading.Event()
+    copies = []
+
+    def backup_loop():
+        while not stop.is_set():
+            source, dest = connect(db_path, mode), sqlite3.connect(os.path.join(tmp, "copy.db"))
+            started = time.perf_counter()
+            if strategy == "stepped":
+                copy_database(source, dest, DEFAULT_PAGES_PER_STEP, DEFAULT_STEP_SLEEP)
+            else:
+                source.backup(dest)
+            copies.append(time.perf_counter() - started)
+            dest.close()
+            source.close()
+
+    thread = threading.Thread(target=backup_loop, daemon=True)
+    if strategy != "none":
+        thread.start()
+        time.sleep(0.05)
+
+    conn = connect(db_path, mode)
+    latencies = []
+    for n in range(bookings):
+        started = time.perf_counter()
+        book(conn, first_seat + n)
+        latencies.append(time.perf_counter() - started)
+        time.sleep(0.002)  # tills book a few times a second, not back to back
+    conn.close()
+
+    stop.set()
+    if thread.is_alive():
+        thread.join()
+    latencies.sort()
+    return {
+        "p50": statistics.median(latencies) * 1000,
+        "p99": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+        "max": latencies[-1] * 1000,
+        "copies": len(copies),
+        "copy_s": statistics.mean(copies) if copies else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size-mb", type=int, default=100)
+    parser.add_argument("--bookings", type=int, default=300)
+    args = parser.parse_args()
+
+    print(f"{'mode':<10}{'backup':<9}{'p50 ms':>9}{'p99 ms':>9}{'max ms':>9}{'copies':>8}{'copy s':>8}")
+    for mode in ("wal", "rollback"):
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = os.path.join(tmp, "bench.db")
+            seed(db_path, mode, args.size_mb)
+            for n, strategy in enumerate(("none", "stepped", "one-step")):
+                r = run(mode, strategy, db_path, args.bookings, tmp, first_seat=10_000_000 * (n + 1))
+                print(f"{mode:<10}{strategy:<9}{r['p50']:>9.2f}{r['p99']:>9.2f}{r['max']:>9.1f}"
+                      f"{r['copies']:>8}{r['copy_s']:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Micro-benchmark: refunding N booking references, per-row vs set-based.
+
+The legacy path reproduces the original process_refund() once per
+reference: the four-way join, then one DELETE and one seat UPDATE per
+booking, one transaction per reference. The new path is
+database.refunds.refund_references() over the whole list in one
+transaction, which also writes the cancellations audit rows. Each
+reference books two seats; every size is seeded into a fresh database.
+
+    python benchmarks/bench_bulk_refund.py --references 500 1000 2000 4000
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from database.database_setup import initialize_database
+from database.refunds import refund_references
+from database.seat_layout import insert_layout, layout_seats
+
+SEATS = 120
+
+
+def seed(conn, references):
+    conn.execute("INSERT INTO cinemas (city, location, num_of_screens) VALUES ('Bristol', 'Bench', 1)")
+    screen_id = conn.execute("INSERT INTO screens (cinema_id, screen_number, total_seats) VALUES (1, 1, ?)",
+                             (SEATS,)).lastrowid
+    insert_layout(conn.cursor(), screen_id, layout_seats(SEATS))
+    seat_ids = [row[0] for row in conn.execute("SELECT id FROM seats ORDER BY seat_number")]
+    conn.execute("INSERT INTO films (title, genre, age_rating) VALUES ('Bench', 'Drama', '12A')")
+    show_time = (datetime.now() + timedelta(days=7)).strftime("%Y-%m-%d 19:00:00")
+    per_showtime = SEATS // 2
+    showtimes = [
+        conn.execute("INSERT INTO showtimes (film_id, cinema_id, screen_number, show_time, price) "
+                     "VALUES (1, 1, 1, ?, 8)", (show_time,)).lastrowid
+        for _ in range(-(-references // per_showtime))
+    ]
+    conn.executemany("""
+        INSERT INTO bookings (customer_name, customer_email, showtime_id, seat_id, booking_reference, total_price)
+        VALUES ('Bench', 'bench@example.com', ?, ?, ?, 8)
+    """, [(showtimes[n // per_showtime], seat_ids[(n % per_showtime) * 2 + k], f"R{n}")
+          for n in range(references) for k in range(2)])
+    conn.commit()
+    return [f"R{n}" for n in range(references)]
+
+
+def legacy_refund(conn, reference):
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT b.id, b.total_price, s.show_time, b.seat_id,
+               b.customer_name, b.customer_email,
+               f.title AS film_title, seats.seat_number
+        FROM bookings b
+        JOIN showtimes s ON b.showtime_id = s.id
+        JOIN films f ON s.film_id = f.id
+        JOIN seats ON b.seat_id = seats.id
+        WHERE b.booking_reference = ?
+    """, (reference,))
+    bookings = cursor.fetchall()
+    cursor.execute("BEGIN IMMEDIATE")
+    for booking_id, _, _, seat_id, *_ in bookings:
+        cursor.execute("DELETE FROM bookings WHERE id = ?", (booking_id,))
+        cursor.execute("UPDATE seats SET is_booked = 0 WHERE id = ?", (seat_id,))
+    conn.commit()
+
+
+def timed(references, refund):
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.db")
+        initialize_database(db_path=db_path)
+        conn = sqlite3.connect(db_path, isolation_level=None)
+        refs = seed(conn, references)
+        started = time.perf_counter()
+        refund(conn, refs)
+        elapsed = time.perf_counter() - started
+        assert conn.execute("SELECT COUNT(*) FROM bookings").fetchone()[0] == 0
+        conn.close()
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--references", type=int, nargs="+", default=[500, 1000, 2000, 4000])
+    args = parser.parse_args()
+
+    print(f"{'refs':>6}  {'legacy ms':>10}  {'µs/ref':>8}  {'bulk ms':>8}  {'µs/ref':>8}")
+    for references in args.references:
+        legacy = timed(references, lambda conn, refs: [legacy_refund(conn, ref) for ref in refs])
+        bulk = timed(references, lambda conn, refs: refund_references(
+            conn, refs, share=1, enforce_notice=False, notify=False))
+        print(f"{references:>6}  {legacy * 1000:>10.1f}  {legacy / references * 1e6:>8.1f}  "
+              f"{bulk * 1000:>8.1f}  {bulk / references * 1e6:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Micro-benchmark: refund search, legacy OR query vs indexed customer lookup.
+
+The legacy path is the original refund_page() query, ``booking_reference
+= ? OR customer_email = ?`` over the four-way join. The new path is
+database.customer_lookup.find_bookings() for a reference, an email (in a
+different case), a phone prefix and a name prefix. Bookings are seeded in
+two-seat references with synthetic customers; times are the median of
+``--repeat`` runs in milliseconds.
+
+    python benchmarks/bench_customer_lookup.py --bookings 200000 1000000 2000000
+"""
+import argparse
+import os
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from database.customer_lookup import find_bookings
+from database.database_setup import initialize_database
+from database.seat_layout import insert_layout, layout_seats
+
+LEGACY_SQL = """
+    SELECT b.id AS booking_id, b.booking_reference, b.customer_name, b.customer_email,
+           b.customer_phone, b.total_price, b.booking_date,
+           f.title AS film_title, s.show_time, seats.seat_number
+    FROM bookings b
+    JOIN showtimes s ON b.showtime_id = s.id
+    JOIN films f ON s.film_id = f.id
+    JOIN seats ON b.seat_id = seats.id
+    WHERE b.booking_reference = ? OR b.customer_email = ?
+"""
+
+
+def seed(conn, bookings):
+    conn.execute("INSERT INTO cinemas (city, location, num_of_screens) VALUES ('Bristol', 'Bench', 1)")
+    screen_id = conn.execute("INSERT INTO screens (cinema_id, screen_number, total_seats) VALUES (1, 1, 120)").lastrowid
+    insert_layout(conn.cursor(), screen_id, layout_seats(120))
+    seat_ids = [row[0] for row in conn.execute("SELECT id FROM seats ORDER BY seat_number")]
+    conn.execute("INSERT INTO films (title, genre, age_rating) VALUES ('Bench', 'Drama', '12A')")
+    showtimes = -(-bookings // 120)
+    conn.executemany("INSERT INTO showtimes (film_id, cinema_id, screen_number, show_time, price) "
+                     "VALUES (1, 1, 1, '2030-01-01 19:00:00', 8)", [()] * showtimes)
+    conn.executemany("""
+        INSERT INTO bookings (customer_name, customer_email, customer_phone, showtime_id, seat_id,
+                              booking_reference, total_price)
+        VALUES (?, ?, ?, ?, ?, ?, 8)
+    """, ((f"Customer {n // 2:07d}", f"customer{n // 2}@example.com", f"07{n // 2:09d}",
+           1 + n // 120, seat_ids[n % 120], f"R{n // 2:08d}") for n in range(bookings)))
+    conn.commit()
+
+
+def median_ms(repeat, fn):
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - started)
+    return statistics.median(times) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--bookings", type=int, nargs="+", default=[200000, 1000000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'bookings':>9}  {'legacy':>8}  {'ref':>6}  {'email':>6}  {'phone':>6}  {'name':>6}")
+    for bookings in args.bookings:
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = os.path.join(tmp, "bench.db")
+            initialize_database(db_path=db_path)
+            conn = sqlite3.connect(db_path)
+            seed(conn, bookings)
+            conn.execute("ANALYZE")
+            cursor = conn.cursor()
+            n = bookings // 4
+
+            legacy = median_ms(args.repeat, lambda: cursor.execute(
+                LEGACY_SQL, (f"customer{n}@example.com",) * 2).fetchall())
+            timings = [median_ms(args.repeat, lambda q=query: find_bookings(cursor, q)) for query in (
+                f"R{n:08d}", f"Customer{n}@Example.com", f"07 {n:09d}"[:8], f"customer {n:07d}"[:13],
+            )]
+            conn.close()
+
+        print(f"{bookings:>9}  {legacy:>8.2f}  " + "  ".join(f"{ms:>6.2f}" for ms in timings))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""Micro-benchmark: /report/* queries over raw bookings vs the daily summary.
+
+Seeds a year of bookings across cinemas, films and staff, then times the
+original report SQL (aggregating every booking with strftime) against the
+database.reporting queries over the summary tables. Run it at two sizes
+to see the raw path grow with bookings while the summary path stays flat.
+
+    python benchmarks/bench_reports.py --bookings 100000 1000000
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from database import reporting
+from database.database_setup import initialize_database
+
+RAW_REPORTS = {
+    "bookings_per_film": """
+        SELECT films.title, COUNT(bookings.id) AS total_bookings FROM films
+        LEFT JOIN showtimes ON films.id = showtimes.film_id
+        LEFT JOIN bookings ON showtimes.id = bookings.showtime_id
+        GROUP BY films.title ORDER BY total_bookings DESC
+    """,
+    "monthly_revenue": """
+        SELECT strftime('%Y-%m', booking_date) AS month, SUM(total_price) AS total_revenue
+        FROM bookings GROUP BY strftime('%Y-%m', booking_date) ORDER BY month DESC
+    """,
+    "top_films": """
+        SELECT f.title, SUM(b.total_price) AS total_revenue, COUNT(b.id) AS booking_count, f.genre, f.age_rating
+        FROM bookings b JOIN showtimes s ON b.showtime_id = s.id JOIN films f ON s.film_id = f.id
+        GROUP BY f.title, f.genre, f.age_rating ORDER BY total_revenue DESC
+    """,
+    "staff_bookings": """
+        SELECT strftime('%Y-%m', b.booking_date) AS month, u.username AS staff_name,
+               COUNT(b.id) AS booking_count, SUM(b.total_price) AS total_revenue
+        FROM bookings b JOIN users u ON b.booking_staff_id = u.id
+        GROUP BY month, u.username ORDER BY month DESC, booking_count DESC
+    """,
+}
+
+
+def seed(conn, bookings, cinemas=10, films=200, staff=20, showtimes=5000):
+    rng = random.Random(42)
+    start = datetime(2024, 1, 1)
+    conn.executemany("INSERT INTO cinemas (city, location, num_of_screens) VALUES (?, 'Bench', 1)",
+                     [(f"City {n}",) for n in range(cinemas)])
+    conn.executemany("INSERT INTO films (title, genre, age_rating) VALUES (?, 'Drama', '12A')",
+                     [(f"Film {n}",) for n in range(films)])
+    conn.executemany("INSERT INTO users (username, password, role) VALUES (?, 'x', 'booking_staff')",
+                     [(f"bench_staff{n}",) for n in range(staff)])
+    staff_ids = [row[0] for row in conn.execute("SELECT id FROM users WHERE username LIKE 'bench_staff%'")]
+    conn.executemany(
+        "INSERT INTO showtimes (film_id, cinema_id, screen_number, show_time, price) VALUES (?, ?, 1, ?, 8)",
+        [(rng.randint(1, films), rng.randint(1, cinemas),
+          (start + timedelta(hours=rng.randint(0, 365 * 24))).strftime("%Y-%m-%d %H:00:00"))
+         for _ in range(showtimes)]
+    )
+
+    # Bulk load with the summary triggers off, then backfill in one pass
+    conn.execute("DROP TRIGGER trg_bookings_report_insert")
+    conn.execute("DROP INDEX IF EXISTS uq_bookings_showtime_seat")
+    conn.executemany("""
+        INSERT INTO bookings (showtime_id, seat_id, booking_reference, total_price, booking_staff_id, booking_date)
+        VALUES (?, ?, 'bench', ?, ?, ?)
+    """, ((rng.randint(1, showtimes), n, rng.choice((8, 9.6, 11.52)), rng.choice(staff_ids),
+           (start + timedelta(minutes=rng.randint(0, 365 * 24 * 60))).strftime("%Y-%m-%d %H:%M:%S"))
+          for n in range(bookings)))
+    conn.commit()
+    return sum(reporting.rebuild_reports(conn).values())
+
+
+def best_of(repeat, fn):
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - started)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--bookings", type=int, nargs="+", default=[50000, 200000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'bookings':>9}  {'summary rows':>12}  {'report':<18} {'raw ms':>8}  {'summary ms':>10}")
+    for bookings in args.bookings:
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = os.path.join(tmp, "bench.db")
+            initialize_database(db_path=db_path)
+            conn = sqlite3.connect(db_path)
+            summary_rows = seed(conn, bookings)
+
+            for name, raw_sql in RAW_REPORTS.items():
+                raw = best_of(args.repeat, lambda: conn.execute(raw_sql).fetchall())
+                summary = best_of(args.repeat, lambda: getattr(reporting, name)(conn.cursor()))
+                print(f"{bookings:>9}  {summary_rows:>12}  {name:<18} {raw * 1000:>8.1f}  {summary * 1000:>10.1f}")
+            conn.close()
+
+
+if __name__ == "__main__":
+    main()
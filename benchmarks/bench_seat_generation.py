@@ -0,0 +1,103 @@
+"""Micro-benchmark: onboarding a multiplex with per-seat INSERTs vs bulk layouts.
+
+The per-seat path reproduces the original generate_seats(), which ran one
+INSERT per seat in three Python loops. The bulk path builds the layout in
+memory and writes it with multi-row INSERT statements. Both run inside one
+transaction per cinema, as add_cinema() does.
+
+    python benchmarks/bench_seat_generation.py --screens 20 --seats 120 --repeat 20
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from database.database_setup import initialize_database
+from database.seat_layout import insert_layout, layout_seats, sync_seats
+
+
+def legacy_generate_seats(cursor, screen_id, total_seats, vip_count=10):
+    lower = round(total_seats * 0.3)
+    vip = min(vip_count, total_seats - lower)
+    upper = total_seats - lower - vip
+    seat_number = 1
+
+    for seat_type, count in (("Lower Hall", lower), ("Upper Gallery", upper), ("VIP", vip)):
+        for _ in range(count):
+            cursor.execute("INSERT INTO seats (screen_id, seat_number, seat_type, is_booked) VALUES (?, ?, ?, 0)",
+                           (screen_id, seat_number, seat_type))
+            seat_number += 1
+
+
+def onboard(conn, screens, seats, generate):
+    started = time.perf_counter()
+    cursor = conn.cursor()
+    cursor.execute("BEGIN IMMEDIATE")
+    cursor.execute("INSERT INTO cinemas (city, location, num_of_screens) VALUES ('London', 'Bench', ?)", (screens,))
+    cinema_id = cursor.lastrowid
+    for number in range(1, screens + 1):
+        cursor.execute("INSERT INTO screens (cinema_id, screen_number, total_seats) VALUES (?, ?, ?)",
+                       (cinema_id, number, seats))
+        generate(cursor, cursor.lastrowid, seats)
+    conn.commit()
+    return time.perf_counter() - started, cinema_id
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--screens", type=int, default=20)
+    parser.add_argument("--seats", type=int, default=120)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.db")
+        initialize_database(db_path=db_path)
+        conn = sqlite3.connect(db_path)
+
+        legacy = min(onboard(conn, args.screens, args.seats, legacy_generate_seats)[0] for _ in range(args.repeat))
+        bulk = min(onboard(conn, args.screens, args.seats,
+                           lambda cursor, screen_id, seats: insert_layout(cursor, screen_id, layout_seats(seats)))[0]
+                   for _ in range(args.repeat))
+
+        # Resizing every screen by 10 seats: drop-and-regenerate vs diff
+        _, cinema_id = onboard(conn, args.screens, args.seats,
+                               lambda cursor, screen_id, seats: insert_layout(cursor, screen_id, layout_seats(seats)))
+        screen_ids = [row[0] for row in conn.execute("SELECT id FROM screens WHERE cinema_id = ?", (cinema_id,))]
+
+        def resize(update):
+            started = time.perf_counter()
+            cursor = conn.cursor()
+            cursor.execute("BEGIN IMMEDIATE")
+            for screen_id in screen_ids:
+                update(cursor, screen_id)
+            conn.rollback()
+            return time.perf_counter() - started
+
+        def regenerate(cursor, screen_id):
+            cursor.execute("DELETE FROM seats WHERE screen_id = ?", (screen_id,))
+            legacy_generate_seats(cursor, screen_id, args.seats - 10)
+
+        regenerated = min(resize(regenerate) for _ in range(args.repeat))
+        diffed = min(resize(lambda cursor, screen_id: sync_seats(cursor, screen_id, layout_seats(args.seats - 10)))
+                     for _ in range(args.repeat))
+        cursor = conn.cursor()
+        diff = sync_seats(cursor, screen_ids[0], layout_seats(args.seats - 10))
+        conn.rollback()
+        conn.close()
+
+    print(f"{args.screens} screens x {args.seats} seats, best of {args.repeat}")
+    print(f"onboard per-seat:   {legacy * 1000:8.1f} ms")
+    print(f"onboard bulk:       {bulk * 1000:8.1f} ms  ({legacy / bulk:.1f}x faster)")
+    # Resizing is not about speed: the diff keeps seat ids (and their bookings) stable
+    print(f"resize regenerate:  {regenerated * 1000:8.1f} ms  ({2 * args.seats - 10} seat rows written per screen)")
+    print(f"resize diff:        {diffed * 1000:8.1f} ms  "
+          f"({sum(diff.values())} seat rows written per screen, all {args.seats - 10} seat ids kept)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Micro-benchmark: pricing a full seat map per seat vs in one batch.
+
+The per-seat path reproduces the original get_dynamic_price(), which
+re-parsed show_time and rebuilt the base price grid for every seat. The
+batch path uses the compiled PricingEngine loaded from a fresh database.
+
+    python benchmarks/bench_seat_pricing.py --seats 120 --repeat 2000
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import timeit
+from datetime import datetime
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from database.database_setup import initialize_database
+from database.pricing import get_pricing_engine
+
+
+def legacy_get_dynamic_price(city, show_time, seat_type):
+    hour = datetime.strptime(show_time, "%Y-%m-%d %H:%M:%S").hour
+    base_prices = {
+        "Birmingham": [5, 6, 7],
+        "Bristol": [6, 7, 8],
+        "Cardiff": [5, 6, 7],
+        "London": [10, 11, 12]
+    }
+    if 8 <= hour < 12:
+        time_slot = 0
+    elif 12 <= hour < 17:
+        time_slot = 1
+    else:
+        time_slot = 2
+    base_price = base_prices.get(city, [6, 7, 8])[time_slot]
+    if seat_type == "Upper Gallery":
+        return round(base_price * 1.2, 2)
+    elif seat_type == "VIP":
+        return round(base_price * 1.2 * 1.2, 2)
+    return round(base_price, 2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seats", type=int, default=120)
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    seat_types = (["Lower Hall"] * 36 + ["Upper Gallery"] * 74 + ["VIP"] * 10) * (args.seats // 120 + 1)
+    seat_types = seat_types[:args.seats]
+    show_time = "2025-04-10 19:00:00"
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.db")
+        initialize_database(db_path=db_path)
+        conn = sqlite3.connect(db_path)
+        engine = get_pricing_engine(conn)
+        conn.close()
+
+    per_seat = [legacy_get_dynamic_price("London", show_time, t) for t in seat_types]
+    assert per_seat == engine.prices_for("London", show_time, seat_types)
+
+    legacy = timeit.timeit(lambda: [legacy_get_dynamic_price("London", show_time, t) for t in seat_types],
+                           number=args.repeat)
+    batch = timeit.timeit(lambda: engine.prices_for("London", show_time, seat_types), number=args.repeat)
+
+    print(f"{args.seats} seats x {args.repeat} seat maps")
+    print(f"per-seat: {legacy / args.repeat * 1e6:9.1f} µs per seat map")
+    print(f"batch:    {batch / args.repeat * 1e6:9.1f} µs per seat map  ({legacy / batch:.0f}x faster)")
+
+
+if __name__ == "__main__":
+    main()
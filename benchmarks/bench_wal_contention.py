@@ -0,0 +1,153 @@
+"""Multi-process write contention benchmark for the SQLite storage modes.
+
+Simulates several tills booking at once: each worker process opens its own
+connection with the pragmas of the chosen storage mode and inserts bookings
+in small write transactions, while reader processes keep loading seat maps.
+Run from the repository root:
+
+    python benchmarks/bench_wal_contention.py --writers 4 --readers 2 --bookings 300
+"""
+import argparse
+import multiprocessing
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from database.database_setup import initialize_database, run_write_transaction, storage_pragmas
+
+
+def connect(db_path, mode, busy_timeout):
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    for name, value in storage_pragmas(mode).items():
+        if name == "busy_timeout" and busy_timeout is not None:
+            value = busy_timeout
+        conn.execute(f"PRAGMA {name} = {value}")
+    return conn
+
+
+def seed(db_path, mode, seats=120):
+    initialize_database(db_path=db_path)
+    conn = connect(db_path, mode, None)
+    cursor = conn.cursor()
+    cursor.execute("INSERT INTO cinemas (city, location, num_of_screens) VALUES ('Bristol', 'Bench', 1)")
+    cursor.execute("INSERT INTO screens (cinema_id, screen_number, total_seats) VALUES (?, 1, ?)",
+                   (cursor.lastrowid, seats))
+    screen_id = cursor.lastrowid
+    cursor.executemany("INSERT INTO seats (screen_id, seat_number, seat_type) VALUES (?, ?, 'Lower Hall')",
+                       [(screen_id, n) for n in range(1, seats + 1)])
+    cursor.execute("INSERT INTO films (title, genre, age_rating) VALUES ('Bench', 'Drama', 'PG')")
+    cursor.execute("INSERT INTO showtimes (film_id, cinema_id, screen_number, show_time, price) "
+                   "VALUES (?, 1, 1, '2030-01-01 19:00:00', 8)", (cursor.lastrowid,))
+    conn.commit()
+    conn.close()
+    return screen_id
+
+
+def writer(db_path, mode, bookings, retry, results):
+    conn = connect(db_path, mode, None if retry else 0)
+    done = errors = 0
+
+    def book(cursor):
+        cursor.execute("""
+            INSERT INTO bookings (customer_name, customer_email, customer_phone, showtime_id,
+                                  seat_id, booking_reference, total_price, booking_date)
+            VALUES ('Bench', 'bench@example.com', '0', 1, 1, 'bench', 8, datetime('now'))
+        """)
+        cursor.execute("UPDATE seats SET is_booked = 1 WHERE id = 1")
+
+    for _ in range(bookings):
+        try:
+            if retry:
+                run_write_transaction(conn, book)
+            else:
+                cursor = conn.cursor()
+                book(cursor)
+                conn.commit()
+            done += 1
+        except sqlite3.OperationalError:
+            if conn.in_transaction:
+                conn.rollback()
+            errors += 1
+    conn.close()
+    results.put(("writer", done, errors))
+
+
+def reader(db_path, mode, screen_id, stop, results):
+    conn = connect(db_path, mode, None)
+    done = errors = 0
+    while not stop.is_set():
+        try:
+            conn.execute("""
+                SELECT s.id, s.seat_number, b.id IS NOT NULL AS is_booked
+                FROM seats s LEFT JOIN bookings b ON s.id = b.seat_id AND b.showtime_id = 1
+                WHERE s.screen_id = ?
+            """, (screen_id,)).fetchall()
+            done += 1
+        except sqlite3.OperationalError:
+            errors += 1
+    conn.close()
+    results.put(("reader", done, errors))
+
+
+def run(mode, retry, writers, readers, bookings):
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.db")
+        screen_id = seed(db_path, mode)
+
+        results = multiprocessing.Queue()
+        stop = multiprocessing.Event()
+        reader_procs = [multiprocessing.Process(target=reader, args=(db_path, mode, screen_id, stop, results))
+                        for _ in range(readers)]
+        writer_procs = [multiprocessing.Process(target=writer, args=(db_path, mode, bookings, retry, results))
+                        for _ in range(writers)]
+
+        for p in reader_procs:
+            p.start()
+        started = time.perf_counter()
+        for p in writer_procs:
+            p.start()
+        outcome = [results.get() for _ in writer_procs]
+        elapsed = time.perf_counter() - started
+        stop.set()
+        outcome += [results.get() for _ in reader_procs]
+        for p in writer_procs + reader_procs:
+            p.join()
+
+    totals = {"writer": [0, 0], "reader": [0, 0]}
+    for kind, done, errors in outcome:
+        totals[kind][0] += done
+        totals[kind][1] += errors
+    return {
+        "mode": mode,
+        "retry": retry,
+        "elapsed": elapsed,
+        "bookings": totals["writer"][0],
+        "booking_errors": totals["writer"][1],
+        "bookings_per_sec": totals["writer"][0] / elapsed,
+        "seat_map_reads": totals["reader"][0],
+        "read_errors": totals["reader"][1],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--readers", type=int, default=2)
+    parser.add_argument("--bookings", type=int, default=300, help="bookings per writer process")
+    args = parser.parse_args()
+
+    scenarios = [("rollback", False), ("rollback", True), ("wal", True)]
+    print(f"{'mode':<10}{'retry':<7}{'bookings/s':>12}{'lock errors':>13}{'reads':>9}{'read errs':>11}")
+    for mode, retry in scenarios:
+        r = run(mode, retry, args.writers, args.readers, args.bookings)
+        print(f"{r['mode']:<10}{str(r['retry']):<7}{r['bookings_per_sec']:>12.0f}"
+              f"{r['booking_errors']:>13}{r['seat_map_reads']:>9}{r['read_errors']:>11}")
+
+
+if __name__ == "__main__":
+    main()
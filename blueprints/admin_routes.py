@@ -1,7 +1,12 @@
-from flask import Blueprint, request, render_template, redirect, url_for, flash, make_response
+from flask import Blueprint, request, render_template, redirect, url_for, flash, make_response, Response, stream_with_context
+from flask import current_app
 from flask_jwt_extended import jwt_required, create_access_token, get_jwt_identity, set_access_cookies
-from database.database_setup import get_db_connection
+from database.database_setup import get_db_connection, run_write_transaction, day_epoch_range
+from database.pricing import TIME_SLOTS, invalidate_pricing
+from database.catalogue import film_catalogue, iter_film_catalogue, cinemas_with_showtimes
+from blueprints.auth import login_token, role_required
 from datetime import datetime
+import json
 import uuid
 from flask_bcrypt import Bcrypt
 bcrypt = Bcrypt()
@@ -27,7 +32,7 @@ def admin_login():
                 flash("❌ Unauthorized access!", "danger")
                 return redirect(url_for('admin.admin_login'))
 
-            access_token = create_access_token(identity=str(user["id"]))
+            access_token = login_token(user["id"], user["role"])
             resp = make_response(redirect(url_for("admin.admin_dashboard")))
             set_access_cookies(resp, access_token)
             return resp
@@ -41,66 +46,46 @@ def admin_login():
 # ===============================
 @admin_routes.route('/admin_dashboard')
 @jwt_required(locations=["cookies"])
+@role_required("admin", "manager", redirect_to="admin.admin_login")
 def admin_dashboard():
-    user_id = get_jwt_identity()
+    page_size = current_app.config["ADMIN_DASHBOARD_PAGE_SIZE"]
+    per_page = request.args.get("per_page", page_size, type=int)
+    if per_page <= 0:
+        return "❌ per_page must be a positive number", 400
+    # A huge page would load the whole catalogue and undo the keyset paging
+    per_page = min(per_page, page_size * 4)
+    after = request.args.get("after", 0, type=int)
 
     with get_db_connection() as conn:
         cursor = conn.cursor()
 
-        # Fetch user role
-        cursor.execute("SELECT role FROM users WHERE id = ?", (user_id,))
-        user = cursor.fetchone()
-
-        if not user or user["role"] not in ["admin", "manager"]:
-            flash("❌ Unauthorized access!", "danger")
-            return redirect(url_for('admin.admin_login'))
-
-        # Fetch films and related showtimes
-        cursor.execute("""
-            SELECT films.id AS film_id, films.title, films.genre, films.age_rating,
-                   showtimes.cinema_id, GROUP_CONCAT(DISTINCT showtimes.show_time) AS showtimes
-            FROM films
-            LEFT JOIN showtimes ON films.id = showtimes.film_id
-            GROUP BY films.id, showtimes.cinema_id
-        """)
-        film_rows = cursor.fetchall()
-
-        films, film_cinemas = [], {}
-        for row in film_rows:
-            fid = row["film_id"]
-            if not any(f["id"] == fid for f in films):
-                films.append({
-                    "id": fid,
-                    "title": row["title"],
-                    "genre": row["genre"],
-                    "age_rating": row["age_rating"],
-                    "showtimes": row["showtimes"] or "None"
-                })
-            if row["cinema_id"]:
-                cursor.execute("SELECT id, city, location FROM cinemas WHERE id = ?", (row["cinema_id"],))
-                cinema = cursor.fetchone()
-                if cinema:
-                    film_cinemas.setdefault(fid, []).append(cinema)
-
-        # ✅ Build dropdown with all unique cinemas
-        cinema_dropdown = []
-        seen_ids = set()
-        for clist in film_cinemas.values():
-            for cinema in clist:
-                if cinema["id"] not in seen_ids:
-                    seen_ids.add(cinema["id"])
-                    cinema_dropdown.append(cinema)
-
-        # ✅ Optional fallback: If no showtime-based cinemas, grab all cinemas
-        if not cinema_dropdown:
-            cursor.execute("SELECT id, city, location FROM cinemas")
-            cinema_dropdown = cursor.fetchall()
+        # ✅ One joined aggregate query per page of films, grouped in a single pass
+        films, film_cinemas, next_after = film_catalogue(cursor, limit=per_page, after_id=after)
+        cinema_dropdown = cinemas_with_showtimes(cursor)
 
     return render_template("admin_dashboard.html",
-                           admin_id=user_id,
+                           admin_id=get_jwt_identity(),
                            films=films,
                            film_cinemas=film_cinemas,
-                           cinema_dropdown=cinema_dropdown)
+                           cinema_dropdown=cinema_dropdown,
+                           per_page=per_page,
+                           next_after=next_after)
+
+
+@admin_routes.route('/admin_dashboard/films.jsonl')
+@jwt_required(locations=["cookies"])
+@role_required("admin", "manager", redirect_to="admin.admin_login")
+def admin_dashboard_films():
+    """Whole film catalogue as JSON lines, streamed page by page."""
+    page_size = current_app.config["ADMIN_DASHBOARD_PAGE_SIZE"]
+
+    @stream_with_context
+    def generate():
+        with get_db_connection() as conn:
+            for film, cinemas in iter_film_catalogue(conn.cursor(), page_size):
+                yield json.dumps(dict(film, cinemas=cinemas)) + "\n"
+
+    return Response(generate(), mimetype="application/x-ndjson")
 
 
 # ===============================
@@ -207,8 +192,8 @@ def manage_film():
                        f.title, f.id AS film_id
                 FROM showtimes s
                 JOIN films f ON f.id = s.film_id
-                WHERE s.cinema_id = ? AND DATE(s.show_time) = ?
-            """, (selected_cinema, selected_date))
+                WHERE s.cinema_id = ? AND s.show_epoch >= ? AND s.show_epoch < ?
+            """, (selected_cinema, *day_epoch_range(selected_date)))
 
             for row in cursor.fetchall():
                 key = (row["screen_number"], row["show_time"][11:16])
@@ -259,8 +244,8 @@ def add_showtime(cinema_id):
             SELECT s.screen_number, s.show_time, f.title
             FROM showtimes s
             JOIN films f ON s.film_id = f.id
-            WHERE s.cinema_id = ? AND DATE(s.show_time) = ?
-        """, (cinema_id, selected_date))
+            WHERE s.cinema_id = ? AND s.show_epoch >= ? AND s.show_epoch < ?
+        """, (cinema_id, *day_epoch_range(selected_date)))
 
         showtime_map = {}
         for row in cursor.fetchall():
@@ -306,11 +291,10 @@ def add_showtime_ajax():
         # You can customize pricing logic if needed
         price = 10.0
 
-        cursor.execute("""
+        run_write_transaction(conn, lambda cur: cur.execute("""
             INSERT INTO showtimes (film_id, cinema_id, screen_number, show_time, price)
             VALUES (?, ?, ?, ?, ?)
-        """, (film_id, cinema_id, screen_number, show_time, price))
-        conn.commit()
+        """, (film_id, cinema_id, screen_number, show_time, price)))
 
     return {"success": True, "title": film["title"]}
 
@@ -362,8 +346,8 @@ def select_cinema_for_showtime(film_id):
             SELECT s.id, s.screen_number, s.show_time, f.title
             FROM showtimes s
             JOIN films f ON f.id = s.film_id
-            WHERE DATE(s.show_time) = ?
-        """, (selected_date,))
+            WHERE s.show_epoch >= ? AND s.show_epoch < ?
+        """, day_epoch_range(selected_date))
         for row in cursor.fetchall():
             key = (row["screen_number"], row["show_time"][11:16])
             showtime_map[key] = {
@@ -402,3 +386,54 @@ def update_film(film_id):
 
     flash("✅ Film updated successfully!", "success")
     return redirect(url_for('admin.manage_film'))
+
+
+# ===============================
+#  Manage Pricing
+# ===============================
+@admin_routes.route('/manage_pricing', methods=['GET', 'POST'])
+@jwt_required()
+@role_required("admin", "manager", redirect_to="admin.admin_login")
+def manage_pricing():
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+
+        if request.method == 'POST':
+            kind = request.form.get("kind")
+
+            try:
+                if kind == "base":
+                    # The pricing table's CHECK only accepts these; reject here instead of a 500
+                    if request.form["time_slot"] not in TIME_SLOTS:
+                        raise ValueError(request.form["time_slot"])
+                    run_write_transaction(conn, lambda cur: cur.execute("""
+                        INSERT INTO pricing (city, time_slot, lower_hall_price) VALUES (?, ?, ?)
+                        ON CONFLICT (city, time_slot) DO UPDATE SET lower_hall_price = excluded.lower_hall_price
+                    """, (request.form["city"], request.form["time_slot"], float(request.form["price"]))))
+                elif kind == "seat_type":
+                    run_write_transaction(conn, lambda cur: cur.execute(
+                        "UPDATE seat_type_pricing SET multiplier = ? WHERE seat_type = ?",
+                        (float(request.form["multiplier"]), request.form["seat_type"])
+                    ))
+                elif kind == "discount":
+                    run_write_transaction(conn, lambda cur: cur.execute(
+                        "UPDATE discount_rules SET multiplier = ?, active = ? WHERE code = ?",
+                        (float(request.form["multiplier"]), 1 if request.form.get("active") else 0, request.form["code"])
+                    ))
+            except (KeyError, ValueError):
+                flash("❌ Invalid pricing value.", "danger")
+                return redirect(url_for('admin.manage_pricing'))
+
+            # Triggers bump pricing_version for other workers; drop ours straight away
+            invalidate_pricing()
+            flash("✅ Pricing updated!", "success")
+            return redirect(url_for('admin.manage_pricing'))
+
+        cursor.execute("SELECT city, time_slot, lower_hall_price FROM pricing ORDER BY city = '*', city, id")
+        prices = cursor.fetchall()
+        cursor.execute("SELECT seat_type, multiplier FROM seat_type_pricing ORDER BY multiplier")
+        multipliers = cursor.fetchall()
+        cursor.execute("SELECT code, description, multiplier, active FROM discount_rules ORDER BY code")
+        discounts = cursor.fetchall()
+
+    return render_template("manage_pricing.html", prices=prices, multipliers=multipliers, discounts=discounts)
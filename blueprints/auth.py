@@ -0,0 +1,208 @@
+"""Role checks from JWT claims instead of a users lookup per request.
+
+Every login embeds the user's role as an additional ``role`` claim, so
+``role_required`` authorises from the token alone. When a role has to
+change before the token expires, ``revoke_user()`` stamps the user in
+``user_revocations``; tokens issued at or before that stamp fall back to
+the current role in ``users``. Both the revocation list and those role
+lookups sit in small per-process TTL caches (``AUTH_CACHE_TTL`` seconds),
+so at worst other workers notice a revocation one TTL later.
+
+Change or remove a user with ``set_user_role()``, which revokes their
+tokens in the same transaction. From the command line:
+
+    python -m blueprints.auth set-role USERNAME admin|manager|booking_staff [--testing | --db PATH]
+    python -m blueprints.auth remove USERNAME [--testing | --db PATH]
+    python -m blueprints.auth revoke USERNAME [--testing | --db PATH]
+"""
+import argparse
+import sqlite3
+import threading
+import time
+from functools import wraps
+
+from flask import current_app, flash, jsonify, redirect, url_for
+from flask_jwt_extended import create_access_token, get_jwt, get_jwt_identity
+
+from database.database_setup import get_db_connection, get_db_path, run_write_transaction
+
+DEFAULT_CACHE_TTL = 30
+
+
+class TTLCache:
+    """Tiny thread-safe cache whose entries expire ``ttl`` seconds after loading."""
+
+    def __init__(self, maxsize=1024, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.clock = clock
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, loader, ttl):
+        now = self.clock()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[1] > now:
+                return entry[0]
+
+        value = loader()
+        with self._lock:
+            if len(self._data) >= self.maxsize:
+                # Drop expired entries first, then the oldest if still full
+                self._data = {k: v for k, v in self._data.items() if v[1] > now}
+                if len(self._data) >= self.maxsize:
+                    self._data.pop(next(iter(self._data)))
+            self._data[key] = (value, now + ttl)
+        return value
+
+    def invalidate(self, key=None):
+        with self._lock:
+            if key is None:
+                self._data.clear()
+            else:
+                self._data.pop(key, None)
+
+
+_roles = TTLCache()
+_revocations = TTLCache()
+
+
+def login_token(user_id, role):
+    return create_access_token(identity=str(user_id), additional_claims={"role": role})
+
+
+def _cache_ttl():
+    return current_app.config.get("AUTH_CACHE_TTL", DEFAULT_CACHE_TTL)
+
+
+def _load_role(user_id):
+    with get_db_connection() as conn:
+        row = conn.execute("SELECT role FROM users WHERE id = ?", (user_id,)).fetchone()
+    return row["role"] if row else None
+
+
+def _load_revocations():
+    with get_db_connection() as conn:
+        return dict(conn.execute("SELECT user_id, revoked_at FROM user_revocations").fetchall())
+
+
+def current_role():
+    """Role of the user behind the current JWT; ``None`` if they no longer exist."""
+    claims = get_jwt()
+    user_id = get_jwt_identity()
+    db_path = get_db_path()
+    role = claims.get("role")
+
+    revoked_at = _revocations.get(db_path, _load_revocations, _cache_ttl()).get(int(user_id))
+    if role is None or (revoked_at is not None and claims.get("iat", 0) <= revoked_at):
+        # Token predates the role claim or a revocation: trust the users table
+        role = _roles.get((db_path, user_id), lambda: _load_role(user_id), _cache_ttl())
+    return role
+
+
+def role_required(*roles, redirect_to=None, message="❌ Unauthorized access!"):
+    """Allow the wrapped (``jwt_required``) view only for ``roles``.
+
+    Denied requests are redirected to ``redirect_to`` with a flash message,
+    or get a JSON 403 when no redirect is given.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if current_role() not in roles:
+                if redirect_to is None:
+                    return jsonify({"error": "Unauthorized access"}), 403
+                flash(message, "danger")
+                return redirect(url_for(redirect_to))
+            return view(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+ROLES = ("admin", "manager", "booking_staff")
+
+
+class UnknownUser(LookupError):
+    def __init__(self, username):
+        self.username = username
+        super().__init__(f"No such user: {username}")
+
+
+def _revoke(cursor, user_id):
+    cursor.execute("""
+        INSERT INTO user_revocations (user_id, revoked_at) VALUES (?, ?)
+        ON CONFLICT (user_id) DO UPDATE SET revoked_at = excluded.revoked_at
+    """, (user_id, int(time.time())))
+
+
+def revoke_user(conn, user_id):
+    """Make a role change or removal apply to ``user_id``'s outstanding tokens."""
+    run_write_transaction(conn, lambda cursor: _revoke(cursor, user_id))
+    clear_auth_cache()
+
+
+def set_user_role(conn, username, role):
+    """Give ``username`` a new role (``None`` removes the user) and revoke their tokens; returns the user id.
+
+    Raises ``UnknownUser`` if there is no such user and ``ValueError``
+    for a role outside ``ROLES``.
+    """
+    if role is not None and role not in ROLES:
+        raise ValueError(f"Unknown role {role!r}; expected one of {', '.join(ROLES)}")
+
+    def work(cursor):
+        cursor.execute("SELECT id FROM users WHERE username = ?", (username,))
+        row = cursor.fetchone()
+        if row is None:
+            raise UnknownUser(username)
+        if role is None:
+            cursor.execute("DELETE FROM users WHERE id = ?", (row[0],))
+        else:
+            cursor.execute("UPDATE users SET role = ? WHERE id = ?", (role, row[0]))
+        _revoke(cursor, row[0])
+        return row[0]
+
+    user_id = run_write_transaction(conn, work)
+    clear_auth_cache()
+    return user_id
+
+
+def clear_auth_cache():
+    _roles.invalidate()
+    _revocations.invalidate()
+
+
+if __name__ == "__main__":
+    import os
+    import sys
+
+    sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+    parser = argparse.ArgumentParser(description="Change, remove or revoke a user; their tokens stop working.")
+    parser.add_argument("command", choices=["set-role", "remove", "revoke"])
+    parser.add_argument("username")
+    parser.add_argument("role", nargs="?", choices=ROLES, help="new role for set-role")
+    parser.add_argument("--testing", action="store_true", help="use the test database")
+    parser.add_argument("--db", help="path to a database file (overrides --testing)")
+    args = parser.parse_args()
+    if (args.command == "set-role") != (args.role is not None):
+        parser.error("set-role needs a ROLE; remove and revoke take none")
+
+    db_path = args.db or get_db_path(args.testing)
+    conn = sqlite3.connect(db_path)
+    try:
+        if args.command == "revoke":
+            row = conn.execute("SELECT id FROM users WHERE username = ?", (args.username,)).fetchone()
+            if row is None:
+                raise UnknownUser(args.username)
+            revoke_user(conn, row[0])
+            print(f"✅ Revoked every token issued to {args.username} so far")
+        else:
+            set_user_role(conn, args.username, args.role)
+            print(f"✅ {args.username} " + (f"is now {args.role}" if args.role else "removed")
+                  + "; their tokens are revoked")
+    except UnknownUser as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    finally:
+        conn.close()
@@ -1,21 +1,31 @@
 from flask import Blueprint, request, jsonify, render_template, redirect, url_for, flash, make_response
+from flask import Response, stream_with_context
 from flask_jwt_extended import jwt_required, create_access_token, get_jwt_identity
-from database.database_setup import get_db_connection  
+from database.database_setup import get_db_connection, run_write_transaction, day_epoch_range
+from database.booking_engine import book_seats, normalise_seat_ids, SeatConflict, SeatNotFound
+from database.booking_orders import load_order
+from database.booking_references import InvalidReference, allocate_reference, parse_reference
+from database.seat_holds import hold_seats, extend_hold, release_hold, held_seats
+from database.pricing import get_pricing_engine
+from database.seat_map import load_seat_map
+from database.seat_bitmap import MAX_SEATS, best_available
+from database.occupancy import get_occupancy, occupancy_ratio
+from database.refunds import refund_references, RefundNotFound, RefundWindowClosed
+from database.customer_lookup import decode_cursor, find_bookings
+from database.outbox import enqueue_email, wake_workers as wake_outbox_workers
+from database import forecasting, reporting
+from database.report_export import EXPORT_FORMATS, parquet_available, stream_export
+from blueprints.auth import login_token
 import traceback
-from datetime import datetime
+from datetime import date, datetime
 import logging
 from flask_bcrypt import Bcrypt
 from flask import current_app as app
 from flask_jwt_extended import set_access_cookies
-import uuid
 from datetime import timedelta
-import pandas as pd
+import os
 import sqlite3
-from sklearn.linear_model import LinearRegression
-import numpy as np
-import matplotlib.pyplot as plt
 from flask import send_file
-from flask_mail import Message
 from flask import current_app
 
 
@@ -42,7 +52,7 @@ def staff_login():
 
     with get_db_connection() as conn:
         cursor = conn.cursor()
-        cursor.execute("SELECT id, password FROM users WHERE LOWER(username) = LOWER(?)", (username,))
+        cursor.execute("SELECT id, password, role FROM users WHERE LOWER(username) = LOWER(?)", (username,))
         user = cursor.fetchone()
 
     if not user or not bcrypt.check_password_hash(user[1], password):
@@ -50,7 +60,7 @@ def staff_login():
         return render_template('staff_login.html', error="Invalid username or password")  # Render login page with error
 
     # Generate JWT token
-    access_token = create_access_token(identity=str(user[0]))
+    access_token = login_token(user[0], user[2])
     
     response = make_response(redirect(url_for('booking.booking_page')))  # ✅ Redirect to booking page
     set_access_cookies(response, access_token)
@@ -113,12 +123,12 @@ def home():
                     SELECT 
                          f.id AS film_id, f.title, f.genre, f.age_rating, f.description,
                          s.show_time, c.city, c.location
-                    FROM films f
-                    JOIN showtimes s ON f.id = s.film_id
+                    FROM showtimes s
+                    JOIN films f ON f.id = s.film_id
                     JOIN cinemas c ON s.cinema_id = c.id
-                    WHERE DATE(s.show_time) = ?
+                    WHERE s.show_epoch >= ? AND s.show_epoch < ?
                     ORDER BY f.title, s.show_time
-                """, (today,))
+                """, day_epoch_range(today))
                 rows = cursor.fetchall()
 
                 films_dict = {}
@@ -178,13 +188,15 @@ def select_cinema():
         cursor.execute("SELECT screen_number FROM screens WHERE cinema_id = ? ORDER BY screen_number", (cinema_id,))
         screens = [row["screen_number"] for row in cursor.fetchall()]
 
+        day_start, day_end = day_epoch_range(selected_date)
+
         # ✅ Dynamically fetch all distinct time slots for this date and cinema
         cursor.execute("""
             SELECT DISTINCT strftime('%H:%M', show_time) AS time_slot
             FROM showtimes
-            WHERE cinema_id = ? AND DATE(show_time) = ?
+            WHERE cinema_id = ? AND show_epoch >= ? AND show_epoch < ?
             ORDER BY time_slot
-        """, (cinema_id, selected_date))
+        """, (cinema_id, day_start, day_end))
         time_slot_rows = cursor.fetchall()
         time_slots = [row["time_slot"] for row in time_slot_rows]
 
@@ -193,8 +205,8 @@ def select_cinema():
             SELECT showtimes.id AS id, show_time, screen_number, films.title
             FROM showtimes
             JOIN films ON showtimes.film_id = films.id
-            WHERE cinema_id = ? AND DATE(show_time) = ?
-        """, (cinema_id, selected_date))
+            WHERE cinema_id = ? AND show_epoch >= ? AND show_epoch < ?
+        """, (cinema_id, day_start, day_end))
         showtimes = cursor.fetchall()
 
         # Map showtimes into (screen, time) key
@@ -224,133 +236,126 @@ def select_cinema():
 @booking_routes.route('/view_showtime/<int:showtime_id>')
 @jwt_required()
 def view_showtime(showtime_id):
+    # ✅ Showtime, screen, seats, booked flags and occupancy in one query
     with get_db_connection() as conn:
-        cursor = conn.cursor()
+        seat_map = load_seat_map(conn, showtime_id)
 
-        # Step 1: Get showtime details
-        cursor.execute("""
-            SELECT showtimes.id, show_time, films.title, showtimes.screen_number, showtimes.cinema_id
-            FROM showtimes
-            JOIN films ON showtimes.film_id = films.id
-            WHERE showtimes.id = ?
-        """, (showtime_id,))
-        showtime = cursor.fetchone()
+    if not seat_map:
+        flash("❌ Showtime not found!", "danger")
+        return redirect(url_for("booking.booking_page"))
 
-        if not showtime:
-            flash("❌ Showtime not found!", "danger")
-            return redirect(url_for("booking.booking_page"))
+    if seat_map["screen_id"] is None:
+        flash("❌ Screen not found for this showtime!", "danger")
+        return redirect(url_for("booking.booking_page"))
 
-        # Step 2: Get cinema city
-        cursor.execute("SELECT city FROM cinemas WHERE id = ?", (showtime["cinema_id"],))
-        city_result = cursor.fetchone()
-        city = city_result["city"] if city_result else "Bristol"
+    return render_template(
+        "view_showtime.html",
+        showtime=seat_map["showtime"],
+        film={"title": seat_map["showtime"]["title"]},
+        seats=seat_map["seats"],
+        discount_eligible=seat_map["discount_eligible"]
+    )
 
-        # Step 3: Get screen ID
-        cursor.execute("""
-            SELECT id FROM screens
-            WHERE screen_number = ? AND cinema_id = ?
-        """, (showtime["screen_number"], showtime["cinema_id"]))
-        screen = cursor.fetchone()
 
-        if not screen:
-            flash("❌ Screen not found for this showtime!", "danger")
-            return redirect(url_for("booking.booking_page"))
+@booking_routes.route('/view_showtime/<int:showtime_id>/seats.json')
+@jwt_required()
+def view_showtime_seats(showtime_id):
+    """Seat availability for refreshing the seat map without reloading the page."""
+    with get_db_connection() as conn:
+        seat_map = load_seat_map(conn, showtime_id, hold_token=request.args.get("hold_token"))
 
-        screen_id = screen["id"]
+    if not seat_map:
+        return jsonify({"error": "Showtime not found"}), 404
 
-        # Step 4: Fetch all seats with dynamic pricing
-        cursor.execute("""
-            SELECT s.id, s.seat_number, s.seat_type,
-                   CASE WHEN b.id IS NOT NULL THEN 1 ELSE 0 END AS is_booked
-            FROM seats s
-            LEFT JOIN bookings b ON s.id = b.seat_id AND b.showtime_id = ?
-            WHERE s.screen_id = ?
-            ORDER BY s.seat_number
-        """, (showtime_id, screen_id))
-        seats = cursor.fetchall()
-
-        seat_list = []
-        for seat in seats:
-            seat_dict = dict(seat)
-
-            # ✅ Normalize seat type to match logic in get_dynamic_price
-            raw_type = seat_dict["seat_type"].strip().lower()
-            if raw_type == "vip":
-                clean_type = "VIP"
-            elif raw_type == "upper gallery":
-                clean_type = "Upper Gallery"
-            else:
-                clean_type = "Lower Hall"
+    response = jsonify({
+        "showtime_id": showtime_id,
+        "seats": seat_map["seats"],
+        "total_seats": seat_map["total_seats"],
+        "booked_seats": seat_map["booked_seats"],
+        "occupancy": round(seat_map["occupancy"], 4),
+        "discount_eligible": seat_map["discount_eligible"],
+    })
+    # Pollers get 304 Not Modified until a seat is booked, held or released
+    response.add_etag()
+    return response.make_conditional(request)
 
-            # ✅ Get correct price based on normalized type
-            seat_dict["price"] = get_dynamic_price(
-                city=city,
-                show_time=showtime["show_time"],
-                seat_type=clean_type
+
+@booking_routes.route('/view_showtime/<int:showtime_id>/best_available')
+@jwt_required()
+def best_available_seats(showtime_id):
+    """The best ``count`` free seats side by side, nearest the front and the middle of a row."""
+    try:
+        count = int(request.args.get("count", 1))
+    except ValueError:
+        return jsonify({"error": "count must be a number"}), 400
+    if not 1 <= count <= MAX_SEATS:
+        return jsonify({"error": f"count must be between 1 and {MAX_SEATS}"}), 400
+
+    with get_db_connection() as conn:
+        seat_ids = best_available(conn.cursor(), showtime_id, count,
+                                  seat_type=request.args.get("seat_type"),
+                                  hold_token=request.args.get("hold_token"))
+
+    if seat_ids is None:
+        return jsonify({"error": "Showtime not found"}), 404
+    if not seat_ids:
+        return jsonify({"error": f"No {count} seats available together"}), 409
+    return jsonify({"showtime_id": showtime_id, "seat_ids": seat_ids})
+
+
+# ===============================
+#  Seat Holds
+# ===============================
+
+@booking_routes.route('/holds', methods=['POST'])
+@jwt_required(locations=["headers", "cookies"])
+def create_hold():
+    data = request.get_json() if request.is_json else request.form
+    showtime_id = data.get("showtime_id")
+    seat_ids = data.get("seat_ids")
+
+    if not showtime_id or not seat_ids:
+        return jsonify({"error": "Missing required fields"}), 400
+
+    try:
+        with get_db_connection() as conn:
+            hold_token, expires_at = hold_seats(
+                conn, int(showtime_id), seat_ids,
+                staff_id=get_jwt_identity(),
+                hold_token=data.get("hold_token"),
+                ttl=current_app.config["SEAT_HOLD_TTL"]
             )
-            seat_list.append(seat_dict)
+    except ValueError:
+        return jsonify({"error": "Invalid seat IDs"}), 400
+    except SeatNotFound as e:
+        return jsonify({"error": str(e)}), 400
+    except SeatConflict as e:
+        return jsonify({"error": "❌ Some seats are already held or booked.", "conflicts": e.seat_ids}), 409
 
-        # Step 5: Check discount eligibility
-        from datetime import datetime
+    return jsonify({"hold_token": hold_token, "expires_at": expires_at}), 201
 
-        showtime_dt = datetime.strptime(showtime["show_time"], "%Y-%m-%d %H:%M:%S")
-        now = datetime.now()
-        within_30_minutes = 0 <= (showtime_dt - now).total_seconds() <= 1800
 
-        cursor.execute("SELECT COUNT(*) FROM seats WHERE screen_id = ?", (screen_id,))
-        total_seats = cursor.fetchone()[0]
+@booking_routes.route('/holds/<hold_token>/extend', methods=['POST'])
+@jwt_required(locations=["headers", "cookies"])
+def extend_seat_hold(hold_token):
+    with get_db_connection() as conn:
+        extended, expires_at = extend_hold(conn, hold_token, ttl=current_app.config["SEAT_HOLD_TTL"])
 
-        cursor.execute("SELECT COUNT(*) FROM bookings WHERE showtime_id = ?", (showtime_id,))
-        booked_seats = cursor.fetchone()[0]
+    if not extended:
+        return jsonify({"error": "Hold not found or expired"}), 404
+    return jsonify({"hold_token": hold_token, "expires_at": expires_at, "seats": extended})
 
-        occupancy = booked_seats / total_seats if total_seats else 1
-        below_70_percent = occupancy < 0.7
 
-        discount_eligible = within_30_minutes and below_70_percent
+@booking_routes.route('/holds/<hold_token>/release', methods=['POST'])
+@jwt_required(locations=["headers", "cookies"])
+def release_seat_hold(hold_token):
+    data = request.get_json(silent=True) or request.form
+    seat_ids = data.get("seat_ids") or None
 
-    return render_template(
-        "view_showtime.html",
-        showtime=showtime,
-        film={"title": showtime["title"]},
-        seats=seat_list,
-        discount_eligible=discount_eligible
-    )
+    with get_db_connection() as conn:
+        released = release_hold(conn, hold_token, seat_ids)
 
-# ===============================
-#  Dynamic Pricing 
-# ===============================
-def get_dynamic_price(city, show_time, seat_type):
-    from datetime import datetime
-    
-    # Parse time from show_time string
-    show_time_obj = datetime.strptime(show_time, "%Y-%m-%d %H:%M:%S")
-    hour = show_time_obj.hour
-
-    # Define price grid for lower hall (base prices)
-    base_prices = {
-        "Birmingham": [5, 6, 7],
-        "Bristol": [6, 7, 8],
-        "Cardiff": [5, 6, 7],
-        "London": [10, 11, 12]
-    }
-
-    # Determine time slot index
-    if 8 <= hour < 12:
-        time_slot = 0  # Morning
-    elif 12 <= hour < 17:
-        time_slot = 1  # Afternoon
-    else:
-        time_slot = 2  # Evening
-
-    base_price = base_prices.get(city, [6, 7, 8])[time_slot]
-
-    if seat_type == "Upper Gallery":
-        return round(base_price * 1.2, 2)
-    elif seat_type == "VIP":
-        # Apply two 20% increases: Lower → Gallery → VIP
-        return round(base_price * 1.2 * 1.2, 2)
-    else:
-        return round(base_price, 2)
+    return jsonify({"hold_token": hold_token, "released": released})
 
 
 # ===============================
@@ -372,17 +377,21 @@ def book_tickets():
         customer_email = data.get("customer_email")
         customer_phone = data.get("customer_phone")
         seat_ids = data.get("seat_ids")
+        hold_token = data.get("hold_token")
+
+        # ✅ A hold token alone books every seat still held in that basket
+        if hold_token and not seat_ids and showtime_id:
+            with get_db_connection() as conn:
+                seat_ids = [seat_id for held_showtime, seat_id in held_seats(conn.cursor(), hold_token)
+                            if str(held_showtime) == str(showtime_id)]
 
         if not all([showtime_id, customer_name, customer_email, customer_phone, seat_ids]):
             return jsonify({"error": "Missing required fields"}), 400
 
-        if isinstance(seat_ids, str):
-            seat_ids = seat_ids.split(",")
-
-        total_price = 0
-        last_minute_discount_applied = False
-        family_discount_applied = False
-        booking_reference = str(uuid.uuid4())[:8]
+        try:
+            seat_ids = normalise_seat_ids(seat_ids)
+        except ValueError:
+            return jsonify({"error": "Invalid seat IDs"}), 400
 
         with get_db_connection() as conn:
             cursor = conn.cursor()
@@ -399,71 +408,42 @@ def book_tickets():
             if show_dt > now + timedelta(days=7):
                 return jsonify({"error": "❌ You can only book tickets up to 7 days in advance."}), 400
 
-            within_30_min = 0 <= (show_dt - now).total_seconds() <= 1800
-
             cursor.execute("SELECT city FROM cinemas WHERE id = ?", (cinema_id,))
             city_row = cursor.fetchone()
             city = city_row[0] if city_row else "Bristol"
 
-            cursor.execute("SELECT COUNT(*) FROM seats WHERE screen_id IN (SELECT id FROM screens WHERE cinema_id = ?)", (cinema_id,))
-            total_seats = cursor.fetchone()[0]
-
-            cursor.execute("SELECT COUNT(*) FROM bookings WHERE showtime_id = ?", (showtime_id,))
-            booked_seats = cursor.fetchone()[0]
-
-            occupancy = booked_seats / total_seats if total_seats else 1
-            apply_last_minute_discount = within_30_min and occupancy < 0.7
-            apply_family_discount = len(seat_ids) >= 4
-
-            for seat_id in seat_ids:
-                cursor.execute("SELECT seat_type FROM seats WHERE id = ?", (seat_id,))
-                seat_row = cursor.fetchone()
-                if not seat_row:
-                    return jsonify({"error": f"Seat ID {seat_id} not found"}), 400
-
-                seat_type = seat_row[0]
-                price = get_dynamic_price(city, show_time, seat_type)
-
-                if apply_last_minute_discount:
-                    price *= 0.75
-                    last_minute_discount_applied = True
-
-                if apply_family_discount:
-                    price *= 0.80
-                    family_discount_applied = True
-
-                total_price += price
-
-                cursor.execute("""
-                    INSERT INTO bookings (
-                        customer_name, customer_email, customer_phone,
-                        showtime_id, seat_id, booking_reference,
-                        total_price, booking_staff_id, booking_date
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """, (
+            # ✅ Trigger-maintained counters for this showtime's own screen
+            booked_seats, total_seats = get_occupancy(cursor, showtime_id) or (0, 0)
+            occupancy = occupancy_ratio(booked_seats, total_seats)
+
+            # ✅ Compiled pricing rules: one table per showtime, discounts resolved once per basket
+            pricing = get_pricing_engine(conn)
+            prices_by_type = pricing.price_table(city, show_dt)
+            discounts = pricing.discounts(len(seat_ids), show_dt, now, occupancy)
+            discount_multiplier = 1
+            for rule in discounts:
+                discount_multiplier *= rule["multiplier"]
+
+            def price_for(seat_type):
+                price = prices_by_type.get(seat_type)
+                if price is None:
+                    price = pricing.prices_for(city, show_dt, [seat_type])[0]
+                return price * discount_multiplier
+
+            # ✅ Claim every seat and queue the confirmation in one transaction:
+            # the email is only sent for a committed booking, and never inline
+            def book_and_confirm(cursor):
+                # Allocated under the write lock, so no other till can be handed the same one
+                booking_reference = allocate_reference(cursor)
+                lines = book_seats(
+                    conn, showtime_id, seat_ids,
                     customer_name, customer_email, customer_phone,
-                    showtime_id, seat_id, booking_reference,
-                    price, user_id, now.strftime("%Y-%m-%d %H:%M:%S")
-                ))
-
-                cursor.execute("UPDATE seats SET is_booked = 1 WHERE id = ?", (seat_id,))
-
-            conn.commit()
-
-            cursor.execute("SELECT username FROM users WHERE id = ?", (user_id,))
-            user_row = cursor.fetchone()
-            staff_name = user_row["username"] if user_row else "Unknown"
-
-        # ✅ Send confirmation email using current_app
-
-        try:
-            msg = Message(
-                subject="🎟️ Horizon Cinemas Booking Confirmation",
-                sender=current_app.config["MAIL_USERNAME"],
-                recipients=[customer_email]
-            )
+                    user_id, booking_reference, price_for, booked_at=now,
+                    hold_token=hold_token
+                )
+                total_price = sum(line["price"] for line in lines)
 
-            msg.body = f"""
+                enqueue_email(cursor, customer_email, "🎟️ Horizon Cinemas Booking Confirmation", f"""
 Hi {customer_name},
 
 🎬 Thank you for booking with Horizon Cinemas!
@@ -478,12 +458,27 @@ Please arrive 10 minutes before the showtime.
 Enjoy your movie! 🍿
 
 - Horizon Cinemas Team
-"""
-            current_app.extensions["mail"].send(msg)
-            print(f"✅ Confirmation email sent to {customer_email}")
+""", kind="booking_confirmation")
+                return booking_reference, total_price
+
+            try:
+                booking_reference, total_price = run_write_transaction(conn, book_and_confirm)
+            except SeatNotFound as e:
+                return jsonify({"error": str(e)}), 400
+            except SeatConflict as e:
+                return jsonify({
+                    "error": "❌ Some seats are already held or booked.",
+                    "conflicts": e.seat_ids
+                }), 409
+            wake_outbox_workers()
+
+            applied_codes = {rule["code"] for rule in discounts}
+            last_minute_discount_applied = "last_minute" in applied_codes
+            family_discount_applied = "family" in applied_codes
 
-        except Exception as e:
-            print(f"❌ Failed to send confirmation email: {e}")
+            cursor.execute("SELECT username FROM users WHERE id = ?", (user_id,))
+            user_row = cursor.fetchone()
+            staff_name = user_row["username"] if user_row else "Unknown"
 
         message = "✅ Booking successful!"
         if last_minute_discount_applied:
@@ -510,19 +505,24 @@ Enjoy your movie! 🍿
 @booking_routes.route('/process_refund', methods=['POST'])
 @jwt_required()
 def process_refund():
-    booking_id = request.form.get("booking_id")
+    order_id = request.form.get("order_id")
+    booking_id = request.form.get("booking_id")  # older forms post one of the booking's seats
 
-    if not booking_id:
+    if not order_id and not booking_id:
         flash("❌ Booking ID is missing!", "danger")
         return redirect(url_for('booking.refund_page'))
 
     with get_db_connection() as conn:
         cursor = conn.cursor()
 
-        # Get booking reference from any one booking
-        cursor.execute("""
-            SELECT booking_reference FROM bookings WHERE id = ?
-        """, (booking_id,))
+        # Resolve the order header to its reference
+        if order_id:
+            cursor.execute("SELECT booking_reference FROM booking_orders WHERE id = ?", (order_id,))
+        else:
+            cursor.execute("""
+                SELECT o.booking_reference FROM bookings b JOIN booking_orders o ON o.id = b.order_id
+                WHERE b.id = ?
+            """, (booking_id,))
         ref_row = cursor.fetchone()
 
         if not ref_row:
@@ -531,76 +531,17 @@ def process_refund():
 
         booking_reference = ref_row["booking_reference"]
 
-        # Fetch all bookings with this reference
-        cursor.execute("""
-            SELECT b.id, b.total_price, s.show_time, b.seat_id,
-                   b.customer_name, b.customer_email,
-                   f.title AS film_title, seats.seat_number
-            FROM bookings b
-            JOIN showtimes s ON b.showtime_id = s.id
-            JOIN films f ON s.film_id = f.id
-            JOIN seats ON b.seat_id = seats.id
-            WHERE b.booking_reference = ?
-        """, (booking_reference,))
-        bookings = cursor.fetchall()
-
-        if not bookings:
+        try:
+            refund, = refund_references(conn, [booking_reference], staff_id=int(get_jwt_identity()))
+        except RefundNotFound:
             flash("❌ No bookings found for refund!", "danger")
             return redirect(url_for('booking.refund_page'))
-
-        showtime_str = bookings[0]["show_time"]
-        from datetime import datetime, timedelta
-        showtime_dt = datetime.strptime(showtime_str, "%Y-%m-%d %H:%M:%S")
-        now = datetime.now()
-
-        if showtime_dt - now < timedelta(days=1):
+        except RefundWindowClosed:
             flash("❌ Refunds can only be processed at least 1 day in advance.", "danger")
             return redirect(url_for('booking.refund_page', ref=booking_reference))
 
-        original_total = sum(b["total_price"] for b in bookings)
-        refund_amount = round(original_total * 0.5, 2)
-
-        for b in bookings:
-            cursor.execute("DELETE FROM bookings WHERE id = ?", (b["id"],))
-            cursor.execute("UPDATE seats SET is_booked = 0 WHERE id = ?", (b["seat_id"],))
-
-        conn.commit()
-
-        # ✅ Send refund confirmation email
-        try:
-            customer_name = bookings[0]["customer_name"]
-            customer_email = bookings[0]["customer_email"]
-            film_title = bookings[0]["film_title"]
-            seat_numbers = [str(b["seat_number"]) for b in bookings]
-
-            msg = Message(
-                subject="💸 Horizon Cinemas Refund Confirmation",
-                sender=current_app.config["MAIL_USERNAME"],
-                recipients=[customer_email]
-            )
-
-            msg.body = f"""
-Hi {customer_name},
-
-This is a confirmation that your refund has been successfully processed for the following booking:
-
-📌 Booking Reference: {booking_reference}
-🎬 Film: {film_title}
-📅 Showtime: {showtime_str}
-💺 Seats: {', '.join(str(s) for s in seat_numbers)}
-💰 Refunded Amount: £{refund_amount}
-
-We're sorry you couldn't make it! We hope to see you again soon at Horizon Cinemas 🎥
-
-- Horizon Cinemas Team
-"""
-            current_app.extensions['mail'].send(msg)
-            print(f"✅ Refund email sent to {customer_email}")
-
-        except Exception as e:
-            print(f"❌ Failed to send refund email: {e}")
-
-    flash(f"✅ Refund processed! £{refund_amount} will be returned to the customer.", "success")
+    wake_outbox_workers()
+    flash(f"✅ Refund processed! £{refund['refund_amount']} will be returned to the customer.", "success")
     return redirect(url_for('booking.refund_page', ref=booking_reference))
 
 # ===============================
@@ -610,37 +551,19 @@ We're sorry you couldn't make it! We hope to see you again soon at Horizon Cinem
 @booking_routes.route('/receipt/<booking_ref>')
 @jwt_required()
 def receipt(booking_ref):
+    # A mistyped reference fails its check character without a lookup
+    try:
+        booking_ref = parse_reference(booking_ref) or booking_ref
+    except InvalidReference:
+        return "Invalid booking reference", 404
+
     with get_db_connection() as conn:
-        cursor = conn.cursor()
+        # Order header by its unique reference, then its seat lines
+        details = load_order(conn.cursor(), booking_ref)
 
-        # Get all booking rows with the same reference
-        cursor.execute("""
-            SELECT b.booking_reference, b.booking_date, b.customer_name,
-                   b.customer_email, b.customer_phone, b.total_price,
-                   f.title AS film_title, s.show_time, s.screen_number,
-                   c.city, c.location, u.username AS staff_name, seats.seat_number
-            FROM bookings b
-            JOIN showtimes s ON b.showtime_id = s.id
-            JOIN films f ON s.film_id = f.id
-            JOIN cinemas c ON s.cinema_id = c.id
-            JOIN users u ON b.booking_staff_id = u.id
-            JOIN seats ON b.seat_id = seats.id
-            WHERE b.booking_reference = ?
-        """, (booking_ref,))
-        rows = cursor.fetchall()
-
-        if not rows:
+        if details is None:
             return "Booking not found", 404
 
-        # Group info
-        seat_numbers = [r["seat_number"] for r in rows]
-        total_price = sum(r["total_price"] for r in rows)
-
-        # Take shared info from first row
-        details = dict(rows[0])
-        details["seat_numbers"] = seat_numbers
-        details["total_price"] = round(total_price, 2)
-
     return render_template("receipt.html", booking=details)
 
 # ===============================
@@ -650,34 +573,73 @@ def receipt(booking_ref):
 @booking_routes.route('/refund', methods=['GET', 'POST'])
 @jwt_required()
 def refund_page():
-    booking = None
-    search_query = request.args.get('ref')  # booking reference or email
+    bookings, next_cursor = [], None
+    search_query = request.args.get('ref')  # booking reference, email, phone or name
 
     if search_query:
+        after = request.args.get("after")
+        if after:
+            try:
+                decode_cursor(after)
+            except ValueError:
+                flash("❌ Invalid page link, showing the first page.", "danger")
+                after = None
+
         with get_db_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-                SELECT b.id AS booking_id, b.booking_reference, b.customer_name, b.customer_email,
-                       b.customer_phone, b.total_price, b.booking_date,
-                       f.title AS film_title, s.show_time, seats.seat_number
-                FROM bookings b
-                JOIN showtimes s ON b.showtime_id = s.id
-                JOIN films f ON s.film_id = f.id
-                JOIN seats ON b.seat_id = seats.id
-                WHERE b.booking_reference = ? OR b.customer_email = ?
-            """, (search_query, search_query))
-            rows = cursor.fetchall()
+            try:
+                bookings, next_cursor = find_bookings(conn.cursor(), search_query, after=after)
+            except InvalidReference:
+                flash("❌ That booking reference has a typo. Please check it and try again.", "danger")
+
+    return render_template("refund.html", bookings=bookings, next_cursor=next_cursor, request=request)
+
+
+# ===============================
+#  Report pages and streaming exports
+# ===============================
 
-            if rows:
-                seat_numbers = [row["seat_number"] for row in rows]
-                total_price = sum(row["total_price"] for row in rows)
+def _report_range():
+    """Optional ``start``/``end`` query args as dates; raises ValueError on bad input."""
+    start, end = (request.args.get(name) or None for name in ("start", "end"))
+    start = date.fromisoformat(start) if start else None
+    end = date.fromisoformat(end) if end else None
+    if start and end and start > end:
+        raise ValueError("start must not be after end")
+    return start, end
 
-                booking = dict(rows[0])
-                booking["seat_numbers"] = seat_numbers
-                booking["total_price"] = round(total_price, 2)
-                booking["booking_id"] = rows[0]["booking_id"]
 
-    return render_template("refund.html", booking=booking, request=request)
+def _report_response(name, template, title, columns=None):
+    """Render report ``name``, or stream it when ``?format=csv|jsonl|parquet`` is given."""
+    try:
+        start, end = _report_range()
+    except ValueError:
+        return jsonify({"error": "❌ start/end must be YYYY-MM-DD dates, start <= end"}), 400
+
+    fmt = request.args.get("format")
+    if fmt is None:
+        with get_db_connection() as conn:
+            report = reporting.run_report(conn.cursor(), name, start, end).fetchall()
+        return render_template(template, report=report, columns=columns, title=title,
+                               report_name=request.endpoint, start=start, end=end)
+
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({"error": f"Unsupported format, use one of: {', '.join(EXPORT_FORMATS)}"}), 400
+    if fmt == "parquet" and not parquet_available():
+        return jsonify({"error": "Parquet export needs pyarrow installed"}), 501
+
+    chunk_size = current_app.config["REPORT_EXPORT_CHUNK_SIZE"]
+
+    @stream_with_context
+    def generate():
+        # ✅ Rows are pulled chunk by chunk while the response is being sent
+        with get_db_connection() as conn:
+            cursor = reporting.run_report(conn.cursor(), name, start, end)
+            yield from stream_export(cursor, fmt, chunk_size, reporting.REPORT_TYPES[name])
+
+    suffix = "".join(f"_{day}" for day in (start, end) if day)
+    return Response(generate(), mimetype=EXPORT_FORMATS[fmt], headers={
+        "Content-Disposition": f"attachment; filename={name}{suffix}.{fmt}"
+    })
 
 
 # ===============================
@@ -687,18 +649,7 @@ def refund_page():
 @booking_routes.route('/report/bookings_per_film')
 @jwt_required()
 def bookings_per_film():
-    with get_db_connection() as conn:
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT films.title, COUNT(bookings.id) AS total_bookings 
-            FROM films 
-            LEFT JOIN showtimes ON films.id = showtimes.film_id 
-            LEFT JOIN bookings ON showtimes.id = bookings.showtime_id 
-            GROUP BY films.title 
-            ORDER BY total_bookings DESC;
-        """)
-        report = cursor.fetchall()
-    return render_template("report.html", report=report, title="Bookings Per Film")
+    return _report_response("bookings_per_film", "report.html", "Bookings Per Film")
 
 # ===============================
 #  Report Monthly Revenue
@@ -707,33 +658,12 @@ def bookings_per_film():
 @booking_routes.route('/report/monthly_revenue')
 @jwt_required()
 def monthly_revenue():
-    with get_db_connection() as conn:
-        cursor = conn.cursor()
-        
-        # Extract month and year from booking_date and sum total_price
-        cursor.execute("""
-            SELECT 
-                strftime('%Y-%m', booking_date) AS month,
-                SUM(total_price) AS total_revenue
-            FROM bookings
-            GROUP BY strftime('%Y-%m', booking_date)
-            ORDER BY month DESC
-        """)
-        
-        report = cursor.fetchall()
-        
-        # Define columns for the report
-        columns = [
-            {"key": "month", "display_name": "Month", "format": "text"},
-            {"key": "total_revenue", "display_name": "Total Revenue", "format": "currency"}
-        ]
-        
-    return render_template(
-        "generic_report.html", 
-        report=report, 
-        columns=columns,
-        title="Monthly Revenue Report"
-    )
+    # Monthly totals rolled up from the daily summary, not from every booking
+    columns = [
+        {"key": "month", "display_name": "Month", "format": "text"},
+        {"key": "total_revenue", "display_name": "Total Revenue", "format": "currency"}
+    ]
+    return _report_response("monthly_revenue", "generic_report.html", "Monthly Revenue Report", columns)
 
 # ===============================
 #  Report  For Top Film
@@ -742,40 +672,14 @@ def monthly_revenue():
 @booking_routes.route('/report/top_film')
 @jwt_required()
 def top_film():
-    with get_db_connection() as conn:
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            SELECT 
-                f.title, 
-                SUM(b.total_price) AS total_revenue,
-                COUNT(b.id) AS booking_count,
-                f.genre,
-                f.age_rating
-            FROM bookings b
-            JOIN showtimes s ON b.showtime_id = s.id
-            JOIN films f ON s.film_id = f.id
-            GROUP BY f.title, f.genre, f.age_rating
-            ORDER BY total_revenue DESC
-        """)
-        
-        report = cursor.fetchall()
-        
-        # Define columns for the report
-        columns = [
-            {"key": "title", "display_name": "Film Title", "format": "text"},
-            {"key": "total_revenue", "display_name": "Total Revenue", "format": "currency"},
-            {"key": "booking_count", "display_name": "Number of Bookings", "format": "integer"},
-            {"key": "genre", "display_name": "Genre", "format": "text"},
-            {"key": "age_rating", "display_name": "Age Rating", "format": "text"}
-        ]
-        
-    return render_template(
-        "generic_report.html", 
-        report=report, 
-        columns=columns,
-        title="Top Revenue-Generating Films"
-    )
+    columns = [
+        {"key": "title", "display_name": "Film Title", "format": "text"},
+        {"key": "total_revenue", "display_name": "Total Revenue", "format": "currency"},
+        {"key": "booking_count", "display_name": "Number of Bookings", "format": "integer"},
+        {"key": "genre", "display_name": "Genre", "format": "text"},
+        {"key": "age_rating", "display_name": "Age Rating", "format": "text"}
+    ]
+    return _report_response("top_films", "generic_report.html", "Top Revenue-Generating Films", columns)
 
 # ===============================
 #  Report Per Staff Bookings
@@ -784,39 +688,31 @@ def top_film():
 @booking_routes.route('/report/staff_bookings')
 @jwt_required()
 def staff_bookings():
+    columns = [
+        {"key": "month", "display_name": "Month", "format": "text"},
+        {"key": "staff_name", "display_name": "Staff Member", "format": "text"},
+        {"key": "booking_count", "display_name": "Number of Bookings", "format": "integer"},
+        {"key": "total_revenue", "display_name": "Total Revenue", "format": "currency"}
+    ]
+    return _report_response("staff_bookings", "generic_report.html", "Monthly Staff Booking Performance", columns)
+
+# ===============================
+#  Report AI-Predicted Bookings
+# ===============================
+
+@booking_routes.route('/report/predicted_bookings')
+@jwt_required()
+def predicted_bookings():
+    # ✅ pandas / scikit-learn / matplotlib load here on first use, never at worker start
+    if not forecasting.is_available():
+        return render_template("report.html", report=[], title="AI-Predicted Bookings (analytics not installed)")
+
     with get_db_connection() as conn:
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            SELECT 
-                strftime('%Y-%m', b.booking_date) AS month,
-                u.username AS staff_name,
-                COUNT(b.id) AS booking_count,
-                SUM(b.total_price) AS total_revenue
-            FROM bookings b
-            JOIN users u ON b.booking_staff_id = u.id
-            GROUP BY month, u.username
-            ORDER BY month DESC, booking_count DESC
-        """)
-        
-        report = cursor.fetchall()
-        
-        # Define columns for the report
-        columns = [
-            {"key": "month", "display_name": "Month", "format": "text"},
-            {"key": "staff_name", "display_name": "Staff Member", "format": "text"},
-            {"key": "booking_count", "display_name": "Number of Bookings", "format": "integer"},
-            {"key": "total_revenue", "display_name": "Total Revenue", "format": "currency"}
-        ]
-        
-    return render_template(
-        "generic_report.html", 
-        report=report, 
-        columns=columns,
-        title="Monthly Staff Booking Performance"
-    )
+        report = forecasting.predict_bookings(conn)
 
-    return render_template("report.html", report=None, title="AI-Predicted Bookings", chart="static/charts/predicted_bookings.png")
+    # Rendered in memory for each request, so concurrent requests never share a chart file
+    chart = forecasting.forecast_chart_data_uri(report)
+    return render_template("report.html", report=report, title="AI-Predicted Bookings", chart=chart)
 
 
 # ===============================
@@ -1,7 +1,16 @@
 from flask import Blueprint, request, jsonify, render_template, redirect, url_for, flash, make_response
 from flask_jwt_extended import jwt_required, create_access_token, get_jwt_identity
-from database.database_setup import get_db_connection  
+from database.database_setup import get_db_connection, run_write_transaction
+from database.seat_layout import insert_layout, layout_seats, sync_seats, SeatsInUse
+from database.booking_references import InvalidReference
+from database.refunds import (
+    cancel_showtimes, find_showtimes, refund_references, RefundNotFound, RefundWindowClosed, REFUND_SHARE,
+    ShowtimeStarted,
+)
+from database.outbox import wake_workers as wake_outbox_workers
+from blueprints.auth import login_token, role_required
 import traceback
+from datetime import datetime
 from flask_bcrypt import Bcrypt
 from flask_jwt_extended import unset_jwt_cookies
 from flask_jwt_extended import create_access_token, set_access_cookies
@@ -39,7 +48,7 @@ def manager_login():
         flash("❌ Access denied: Not a manager account", "danger")
         return redirect(url_for('manager.manager_login'))
 
-    access_token = create_access_token(identity=str(user[0]))
+    access_token = login_token(user[0], user[2])
     response = make_response(redirect(url_for('manager.manager_dashboard')))
     set_access_cookies(response, access_token)
 
@@ -52,28 +61,23 @@ def manager_login():
 
 @manager_routes.route('/manager_dashboard', methods=['GET'])
 @jwt_required(locations=["headers", "cookies"])
+@role_required("manager", "admin")
 def manager_dashboard():
     user_id = get_jwt_identity()
 
     with get_db_connection() as conn:
         cursor = conn.cursor()
-        cursor.execute("SELECT role FROM users WHERE id = ?", (user_id,))
-        user = cursor.fetchone()
-
-    if not user or user["role"] not in ["manager", "admin"]:
-        return jsonify({"error": "Unauthorized access"}), 403
 
-    # ✅ Fetch booking summary with cinema names
-    cursor.execute("""
-    SELECT films.id, films.title, films.genre, films.age_rating,
-           GROUP_CONCAT(DISTINCT showtimes.show_time) AS showtimes
-    FROM films
-    LEFT JOIN showtimes ON films.id = showtimes.film_id AND showtimes.show_time > CURRENT_TIMESTAMP
-    GROUP BY films.id
-""")
+        # ✅ Fetch booking summary with cinema names
+        cursor.execute("""
+        SELECT films.id, films.title, films.genre, films.age_rating,
+               GROUP_CONCAT(DISTINCT showtimes.show_time) AS showtimes
+        FROM films
+        LEFT JOIN showtimes ON films.id = showtimes.film_id AND showtimes.show_time > CURRENT_TIMESTAMP
+        GROUP BY films.id
+    """)
 
-    
-    booking_summary = cursor.fetchall()  # ✅ Fetch data from DB
+        booking_summary = cursor.fetchall()  # ✅ Fetch data from DB
 
     return render_template(
         "manager_dashboard.html", 
@@ -98,18 +102,8 @@ def logout():
 
 @manager_routes.route('/add_cinema', methods=['GET', 'POST'])
 @jwt_required(locations=["cookies"])
+@role_required("manager", "admin", redirect_to="booking.home")
 def add_cinema():
-    user_id = get_jwt_identity()
-
-    with get_db_connection() as conn:
-        cursor = conn.cursor()
-        cursor.execute("SELECT role FROM users WHERE id = ?", (user_id,))
-        user = cursor.fetchone()
-
-        if not user or user["role"] not in ["manager", "admin"]:
-            flash("❌ Unauthorized access!", "danger")
-            return redirect(url_for("home"))
-
     if request.method == 'GET':
         return render_template("add_cinema.html")
 
@@ -123,9 +117,7 @@ def add_cinema():
         flash("❌ All fields are required!", "danger")
         return redirect(url_for("manager.add_cinema"))
 
-    with get_db_connection() as conn:
-        cursor = conn.cursor()
-
+    def insert_cinema(cursor):
         # Step 1: Insert Cinema
         cursor.execute(
             "INSERT INTO cinemas (city, location, num_of_screens) VALUES (?, ?, ?)",
@@ -152,7 +144,8 @@ def add_cinema():
 
             generate_seats(cursor, screen_id, total_seats, vip_count)
 
-        conn.commit()
+    with get_db_connection() as conn:
+        run_write_transaction(conn, insert_cinema)
 
     flash("✅ New cinema and screens added successfully!", "success")
     return redirect(url_for("manager.manager_dashboard"))
@@ -163,16 +156,10 @@ def add_cinema():
 
 @manager_routes.route('/manage_cinemas', methods=['GET'])
 @jwt_required()
+@role_required("admin", "manager", redirect_to="booking.home")
 def manage_cinemas():
-    user_id = get_jwt_identity()
     with get_db_connection() as conn:
         cursor = conn.cursor()
-        cursor.execute("SELECT role FROM users WHERE id = ?", (user_id,))
-        user = cursor.fetchone()
-
-        if not user or user["role"] not in ["admin", "manager"]:
-            flash("❌ Unauthorized access!", "danger")
-            return redirect(url_for("home"))
 
         # ✅ Updated query to dynamically count screens
         cursor.execute("""
@@ -191,17 +178,10 @@ def manage_cinemas():
 
 @manager_routes.route('/edit_screens/<int:cinema_id>', methods=['GET', 'POST'])
 @jwt_required()
+@role_required("manager", "admin", redirect_to="booking.home", message="❌ Unauthorized")
 def edit_screens(cinema_id):
-    user_id = get_jwt_identity()
-
     with get_db_connection() as conn:
         cursor = conn.cursor()
-        cursor.execute("SELECT role FROM users WHERE id = ?", (user_id,))
-        user = cursor.fetchone()
-
-        if not user or user["role"] not in ["manager", "admin"]:
-            flash("❌ Unauthorized", "danger")
-            return redirect(url_for("home"))
 
         if request.method == "POST":
             action = request.form.get("action")
@@ -211,33 +191,39 @@ def edit_screens(cinema_id):
             if action == "add":
                 screen_number = request.form.get("screen_number")
 
-                # Insert screen
-                cursor.execute(
-                    "INSERT INTO screens (cinema_id, screen_number, total_seats) VALUES (?, ?, ?)",
-                    (cinema_id, screen_number, total_seats)
-                )
-                screen_id = cursor.lastrowid
+                def add_screen(cur):
+                    # Insert screen
+                    cur.execute(
+                        "INSERT INTO screens (cinema_id, screen_number, total_seats) VALUES (?, ?, ?)",
+                        (cinema_id, screen_number, total_seats)
+                    )
+                    # Generate seats
+                    generate_seats(cur, cur.lastrowid, total_seats)
 
-                # Generate seats
-                generate_seats(cursor, screen_id, total_seats)
-                conn.commit()
+                run_write_transaction(conn, add_screen)
                 flash("✅ Screen added successfully!", "success")
 
             elif action == "update":
-                # Delete existing seats and regenerate
-                cursor.execute("DELETE FROM seats WHERE screen_id = ?", (screen_id,))
-                cursor.execute(
-                    "UPDATE screens SET total_seats = ? WHERE id = ?",
-                    (total_seats, screen_id)
-                )
-                generate_seats(cursor, screen_id, total_seats)
-                conn.commit()
-                flash("✅ Screen updated!", "success")
+                def update_screen(cur):
+                    cur.execute(
+                        "UPDATE screens SET total_seats = ? WHERE id = ?",
+                        (total_seats, screen_id)
+                    )
+                    # Only touch the seats that changed so existing seat ids (and bookings) survive
+                    return sync_seats(cur, screen_id, layout_seats(total_seats))
+
+                try:
+                    run_write_transaction(conn, update_screen)
+                    flash("✅ Screen updated!", "success")
+                except SeatsInUse as e:
+                    flash(f"❌ {e}", "danger")
 
             elif action == "remove":
-                cursor.execute("DELETE FROM seats WHERE screen_id = ?", (screen_id,))
-                cursor.execute("DELETE FROM screens WHERE id = ?", (screen_id,))
-                conn.commit()
+                def remove_screen(cur):
+                    cur.execute("DELETE FROM seats WHERE screen_id = ?", (screen_id,))
+                    cur.execute("DELETE FROM screens WHERE id = ?", (screen_id,))
+
+                run_write_transaction(conn, remove_screen)
                 flash("🗑️ Screen removed", "info")
 
         # Refresh screen list after POST
@@ -254,25 +240,8 @@ def edit_screens(cinema_id):
 
 # 🔽 Helper Function
 def generate_seats(cursor, screen_id, total_seats, vip_count=10):
-    lower = round(total_seats * 0.3)
-    vip = min(vip_count, total_seats - lower)  # Ensure VIPs don't exceed available
-    upper = total_seats - lower - vip
-    seat_number = 1
-
-    for _ in range(lower):
-        cursor.execute("INSERT INTO seats (screen_id, seat_number, seat_type, is_booked) VALUES (?, ?, ?, 0)",
-                       (screen_id, seat_number, "Lower Hall"))
-        seat_number += 1
-
-    for _ in range(upper):
-        cursor.execute("INSERT INTO seats (screen_id, seat_number, seat_type, is_booked) VALUES (?, ?, ?, 0)",
-                       (screen_id, seat_number, "Upper Gallery"))
-        seat_number += 1
-
-    for _ in range(vip):
-        cursor.execute("INSERT INTO seats (screen_id, seat_number, seat_type, is_booked) VALUES (?, ?, ?, 0)",
-                       (screen_id, seat_number, "VIP"))
-        seat_number += 1
+    # Whole layout built in memory, written with multi-row INSERTs
+    return insert_layout(cursor, screen_id, layout_seats(total_seats, vip_count))
 
 # ===============================
 #  Delete Cinema
@@ -280,19 +249,114 @@ def generate_seats(cursor, screen_id, total_seats, vip_count=10):
 
 @manager_routes.route('/delete_cinema/<int:cinema_id>', methods=['POST'])
 @jwt_required()
+@role_required("admin", "manager", redirect_to="booking.home")
 def delete_cinema(cinema_id):
-    user_id = get_jwt_identity()
     with get_db_connection() as conn:
         cursor = conn.cursor()
-        cursor.execute("SELECT role FROM users WHERE id = ?", (user_id,))
-        user = cursor.fetchone()
-
-        if not user or user["role"] not in ["admin", "manager"]:
-            flash("❌ Unauthorized access!", "danger")
-            return redirect(url_for("home"))
-
         cursor.execute("DELETE FROM cinemas WHERE id = ?", (cinema_id,))
         conn.commit()
 
     flash("🗑️ Cinema deleted successfully!", "success")
     return redirect(url_for("manager.manage_cinemas"))
+
+# ===============================
+#  Bulk Refunds
+# ===============================
+
+@manager_routes.route('/bulk_refund', methods=['POST'])
+@jwt_required(locations=["headers", "cookies"])
+@role_required("manager", "admin")
+def bulk_refund():
+    """Refund a list of booking references in one transaction (all or nothing)."""
+    data = request.get_json(silent=True) or {}
+    references = data.get("booking_references")
+    if not references or not isinstance(references, list):
+        return jsonify({"error": "booking_references must be a non-empty list"}), 400
+
+    # Refunds we owe (e.g. a failed screen) are in full and ignore the notice period
+    full = bool(data.get("full_refund"))
+    try:
+        with get_db_connection() as conn:
+            refunds = refund_references(
+                conn, references,
+                share=1 if full else REFUND_SHARE,
+                reason=data.get("reason") or ("cinema" if full else "customer"),
+                staff_id=int(get_jwt_identity()),
+                enforce_notice=not full,
+                notify=data.get("notify", True),
+            )
+    except InvalidReference as e:
+        return jsonify({"error": str(e), "booking_references": e.references}), 400
+    except RefundNotFound as e:
+        return jsonify({"error": str(e), "booking_references": e.references}), 404
+    except RefundWindowClosed as e:
+        return jsonify({"error": str(e), "booking_references": e.references}), 409
+
+    wake_outbox_workers()
+    return jsonify({
+        "refunded": len(refunds),
+        "seats": sum(len(r["seat_numbers"]) for r in refunds),
+        "refund_total": round(sum(r["refund_amount"] for r in refunds), 2),
+        "refunds": [{"booking_reference": r["booking_reference"], "refund_amount": r["refund_amount"]}
+                    for r in refunds],
+    })
+
+# ===============================
+#  Cancel Showtimes
+# ===============================
+
+def _parse_bound(value, end_of_day=False):
+    """``YYYY-MM-DD[ HH:MM[:SS]]`` as a datetime; a bare end date covers that whole day."""
+    if not value:
+        return None
+    parsed = datetime.fromisoformat(value)
+    if end_of_day and len(value) == 10:
+        parsed = parsed.replace(hour=23, minute=59, second=59)
+    return parsed
+
+
+@manager_routes.route('/cancel_showtimes', methods=['POST'])
+@jwt_required(locations=["headers", "cookies"])
+@role_required("manager", "admin")
+def cancel_showtimes_route():
+    """Cancel showtimes by id, or a cinema's (screen's) from now on or in a date range, refunding in full."""
+    data = request.get_json(silent=True) or {}
+    now = datetime.now()
+
+    showtime_ids = data.get("showtime_ids")
+    if showtime_ids:
+        if not isinstance(showtime_ids, list) or not all(
+                isinstance(showtime_id, int) or str(showtime_id).isdigit() for showtime_id in showtime_ids):
+            return jsonify({"error": "showtime_ids must be a list of integer ids"}), 400
+        showtime_ids = [int(showtime_id) for showtime_id in showtime_ids]
+
+    with get_db_connection() as conn:
+        if not showtime_ids:
+            if not data.get("cinema_id"):
+                return jsonify({"error": "Give showtime_ids or a cinema_id"}), 400
+            try:
+                start = _parse_bound(data.get("start"))
+                end = _parse_bound(data.get("end"), end_of_day=True)
+            except ValueError:
+                return jsonify({"error": "start and end must be YYYY-MM-DD or YYYY-MM-DD HH:MM"}), 400
+            # Only showtimes still to come: the range never reaches back into takings already earned
+            start = max(start or now, now)
+            showtime_ids = find_showtimes(conn.cursor(), data["cinema_id"], data.get("screen_number"), start, end)
+        if not showtime_ids:
+            return jsonify({"error": "No showtimes to cancel"}), 404
+
+        try:
+            result = cancel_showtimes(conn, showtime_ids, reason=data.get("reason") or "cinema",
+                                      staff_id=int(get_jwt_identity()), remove=not data.get("keep_showtimes"),
+                                      notify=data.get("notify", True), now=now)
+        except ShowtimeStarted as e:
+            return jsonify({"error": str(e), "showtime_ids": e.showtime_ids}), 409
+
+    wake_outbox_workers()
+    refunds = result["refunds"]
+    return jsonify({
+        "showtimes": result["showtimes"],
+        "refunded": len(refunds),
+        "seats": sum(len(r["seat_numbers"]) for r in refunds),
+        "refund_total": round(sum(r["refund_amount"] for r in refunds), 2),
+    })
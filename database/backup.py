@@ -0,0 +1,273 @@
+"""Online backups of the SQLite database.
+
+``create_backup`` copies the live database with ``sqlite3.Connection.backup``
+a few hundred pages per step, sleeping between steps, so bookings never
+wait behind the copy for longer than one step. SQLite starts the copy over
+when another connection writes mid-backup; each restart retries with larger
+steps, and if writes keep winning it falls back to a single-step copy
+(which in WAL mode still does not block writers).
+
+Each snapshot is written to a ``.partial`` file, checked with
+``PRAGMA integrity_check`` and only then renamed to
+``<db name>-YYYYmmdd-HHMMSS.db``, so anything listed by ``list_backups``
+is a complete, verified point-in-time copy. ``rotate_backups`` keeps the
+newest ``keep_last`` snapshots plus the newest snapshot of each of the last
+``keep_daily`` days.
+
+Inside the app, ``BackupScheduler`` takes a snapshot every ``BACKUP_INTERVAL``
+seconds (0 disables). Outside it:
+
+    python -m database.backup create [--testing | --db PATH] [--dir DIR]
+    python -m database.backup list|rotate [--dir DIR]
+    python -m database.backup verify BACKUP
+    python -m database.backup restore BACKUP [--testing | --db PATH]
+"""
+import argparse
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+DEFAULT_PAGES_PER_STEP = 256
+DEFAULT_STEP_SLEEP = 0.005
+MAX_RESTARTS = 5
+DEFAULT_KEEP_LAST = 7
+DEFAULT_KEEP_DAILY = 7
+
+_STAMP_FORMAT = "%Y%m%d-%H%M%S"
+_STAMP = re.compile(r"-(\d{8}-\d{6})\.db$")
+
+
+class BackupError(Exception):
+    """A snapshot failed its integrity check."""
+
+
+class _Restarted(Exception):
+    pass
+
+
+def default_backup_dir(db_path):
+    return os.path.join(os.path.dirname(os.path.abspath(db_path)), "backups")
+
+
+def backup_time(path):
+    """When the snapshot at ``path`` was taken, from its file name; ``None`` if not a snapshot."""
+    match = _STAMP.search(os.path.basename(path))
+    return datetime.strptime(match.group(1), _STAMP_FORMAT) if match else None
+
+
+def list_backups(backup_dir):
+    """Snapshot paths in ``backup_dir``, newest first."""
+    if not os.path.isdir(backup_dir):
+        return []
+    paths = [os.path.join(backup_dir, name) for name in os.listdir(backup_dir)]
+    return sorted((path for path in paths if backup_time(path)), key=backup_time, reverse=True)
+
+
+def verify_backup(path):
+    """``PRAGMA integrity_check`` problems for ``path``; an empty list means the copy is sound."""
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        result = [row[0] for row in conn.execute("PRAGMA integrity_check")]
+    except sqlite3.DatabaseError as e:
+        result = [str(e)]  # damaged beyond what integrity_check can report
+    finally:
+        conn.close()
+    return [] if result == ["ok"] else result
+
+
+def copy_database(source, dest, pages=DEFAULT_PAGES_PER_STEP, sleep=DEFAULT_STEP_SLEEP, max_restarts=MAX_RESTARTS):
+    """Copy connection ``source`` into connection ``dest`` page-stepped; returns the number of restarts.
+
+    Each restart retries with four times larger steps, which leaves writers
+    fewer gaps in which to restart the copy again.
+    """
+    restarts = 0
+    while restarts <= max_restarts:
+        previous = None
+
+        def progress(status, remaining, total):
+            nonlocal previous
+            if previous is not None and remaining > previous:
+                raise _Restarted()
+            previous = remaining
+
+        try:
+            source.backup(dest, pages=pages, progress=progress, sleep=sleep)
+            return restarts
+        except _Restarted:
+            restarts += 1
+            pages *= 4
+
+    logging.warning(f"Backup restarted {restarts} times under write load; copying in one step")
+    source.backup(dest)
+    return restarts
+
+
+def create_backup(db_path, backup_dir=None, pages=DEFAULT_PAGES_PER_STEP, sleep=DEFAULT_STEP_SLEEP, now=None):
+    """Snapshot ``db_path`` into ``backup_dir``, verify it and return its path.
+
+    Raises ``BackupError`` (and removes the copy) if the integrity check fails.
+    """
+    backup_dir = backup_dir or default_backup_dir(db_path)
+    os.makedirs(backup_dir, exist_ok=True)
+    name = os.path.splitext(os.path.basename(db_path))[0]
+    path = os.path.join(backup_dir, f"{name}-{(now or datetime.now()).strftime(_STAMP_FORMAT)}.db")
+    partial = path + ".partial"
+
+    source = sqlite3.connect(db_path)
+    dest = sqlite3.connect(partial)
+    try:
+        copy_database(source, dest, pages, sleep)
+    finally:
+        dest.close()
+        source.close()
+
+    problems = verify_backup(partial)
+    if problems:
+        os.remove(partial)
+        raise BackupError(f"Backup of {db_path} failed integrity check: {problems[:5]}")
+    os.replace(partial, path)
+    return path
+
+
+def rotate_backups(backup_dir, keep_last=DEFAULT_KEEP_LAST, keep_daily=DEFAULT_KEEP_DAILY):
+    """Delete snapshots outside the retention policy; returns the deleted paths."""
+    backups = list_backups(backup_dir)
+    keep = set(backups[:keep_last])
+    days = []
+    for path in backups:
+        day = backup_time(path).date()
+        if day not in days:
+            days.append(day)
+            if len(days) <= keep_daily:
+                keep.add(path)
+
+    removed = [path for path in backups if path not in keep]
+    for path in removed:
+        os.remove(path)
+    return removed
+
+
+def restore_backup(backup_path, db_path):
+    """Overwrite ``db_path`` with the snapshot at ``backup_path``.
+
+    The copy goes through the backup API into the live file, so pooled
+    connections see the restored data on their next transaction instead of
+    holding handles to a replaced file.
+    """
+    problems = verify_backup(backup_path)
+    if problems:
+        raise BackupError(f"{backup_path} failed integrity check: {problems[:5]}")
+    source = sqlite3.connect(f"file:{backup_path}?mode=ro", uri=True)
+    dest = sqlite3.connect(db_path, timeout=30)
+    try:
+        source.backup(dest)
+    finally:
+        dest.close()
+        source.close()
+
+
+class BackupScheduler(threading.Thread):
+    """Background thread that snapshots and rotates backups every ``interval`` seconds.
+
+    It is a singleton job: only the process that ``owns_background_jobs``
+    runs one. A run is still skipped when the newest snapshot is under half
+    an interval old, so a manual ``python -m database.backup create`` (or a
+    scheduler in the previous owner, before a restart) does not cause a
+    second snapshot straight after it.
+    """
+
+    def __init__(self, db_path, backup_dir, interval=3600.0, keep_last=DEFAULT_KEEP_LAST,
+                 keep_daily=DEFAULT_KEEP_DAILY):
+        super().__init__(name="db-backup", daemon=True)
+        self.db_path = db_path
+        self.backup_dir = backup_dir
+        self.interval = interval
+        self.keep_last = keep_last
+        self.keep_daily = keep_daily
+        self._stop_event = threading.Event()
+
+    def due(self):
+        latest = list_backups(self.backup_dir)[:1]
+        return not latest or time.time() - os.path.getmtime(latest[0]) >= self.interval / 2
+
+    def backup(self):
+        if not self.due():
+            return None
+        path = create_backup(self.db_path, self.backup_dir)
+        removed = rotate_backups(self.backup_dir, self.keep_last, self.keep_daily)
+        logging.info(f"Backed up {self.db_path} to {path}, rotated out {len(removed)} old snapshots")
+        return path
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            try:
+                self.backup()
+            except (sqlite3.Error, OSError, BackupError) as e:
+                logging.error(f"Database backup failed: {e}")
+
+    def stop(self):
+        self._stop_event.set()
+
+
+def init_app(app):
+    interval = app.config.get("BACKUP_INTERVAL", 0)
+    if interval:
+        from database.database_setup import get_db_path, owns_background_jobs
+
+        with app.app_context():
+            db_path = get_db_path()
+            if not owns_background_jobs(db_path):
+                return
+        backup_dir = app.config.get("BACKUP_DIR") or default_backup_dir(db_path)
+        app.extensions["db_backup"] = scheduler = BackupScheduler(
+            db_path, backup_dir, interval,
+            app.config.get("BACKUP_KEEP_LAST", DEFAULT_KEEP_LAST),
+            app.config.get("BACKUP_KEEP_DAILY", DEFAULT_KEEP_DAILY),
+        )
+        scheduler.start()
+
+
+if __name__ == "__main__":
+    import sys
+
+    sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+    from database.database_setup import get_db_path
+
+    parser = argparse.ArgumentParser(description="Create, rotate, verify or restore database backups.")
+    parser.add_argument("command", choices=["create", "list", "rotate", "verify", "restore"])
+    parser.add_argument("backup", nargs="?", help="snapshot file for verify/restore")
+    parser.add_argument("--testing", action="store_true", help="use the test database")
+    parser.add_argument("--db", help="path to a database file (overrides --testing)")
+    parser.add_argument("--dir", help="backup directory (default: backups/ next to the database)")
+    parser.add_argument("--keep-last", type=int, default=DEFAULT_KEEP_LAST)
+    parser.add_argument("--keep-daily", type=int, default=DEFAULT_KEEP_DAILY)
+    args = parser.parse_args()
+
+    db_path = args.db or get_db_path(args.testing)
+    backup_dir = args.dir or default_backup_dir(db_path)
+    if args.command in ("verify", "restore") and not args.backup:
+        parser.error(f"{args.command} needs a BACKUP path")
+
+    if args.command == "create":
+        print(f"✅ Backed up {db_path} to {create_backup(db_path, backup_dir)}")
+    elif args.command == "list":
+        for path in list_backups(backup_dir):
+            print(f"{backup_time(path):%Y-%m-%d %H:%M:%S}  {os.path.getsize(path):>12}  {path}")
+    elif args.command == "rotate":
+        for path in rotate_backups(backup_dir, args.keep_last, args.keep_daily):
+            print(f"🗑️ Removed {path}")
+    elif args.command == "verify":
+        problems = verify_backup(args.backup)
+        for problem in problems:
+            print(f"❌ {problem}")
+        if not problems:
+            print(f"✅ {args.backup} passed integrity check")
+        sys.exit(1 if problems else 0)
+    else:
+        restore_backup(args.backup, db_path)
+        print(f"✅ Restored {db_path} from {args.backup}")
@@ -0,0 +1,110 @@
+"""Atomic multi-seat booking.
+
+All seats in a basket are claimed in one ``BEGIN IMMEDIATE`` transaction:
+conflicts are checked, the ``booking_orders`` header inserted and the seat
+lines written with a single batched statement each, while the unique index
+on ``bookings(showtime_id, seat_id)`` guarantees no seat can be sold twice
+even by writers bypassing this module.
+"""
+import json
+import sqlite3
+import time
+from datetime import datetime
+
+from database.booking_orders import create_order
+from database.database_setup import run_write_transaction
+
+
+class SeatConflict(Exception):
+    """Some of the requested seats are already booked for the showtime."""
+
+    def __init__(self, seat_ids):
+        self.seat_ids = sorted(seat_ids)
+        super().__init__(f"Seats already booked: {', '.join(str(s) for s in self.seat_ids)}")
+
+
+class SeatNotFound(LookupError):
+    """Some of the requested seats do not exist on the showtime's screen."""
+
+    def __init__(self, seat_ids):
+        self.seat_ids = sorted(seat_ids)
+        super().__init__(f"Seat ID {', '.join(str(s) for s in self.seat_ids)} not found")
+
+
+def normalise_seat_ids(seat_ids):
+    """Parse a list or comma separated string of seat ids into unique ints, keeping order."""
+    if isinstance(seat_ids, str):
+        seat_ids = seat_ids.split(",")
+    return list(dict.fromkeys(int(seat_id) for seat_id in seat_ids if str(seat_id).strip()))
+
+
+def screen_seat_types(cursor, showtime_id, seat_json):
+    cursor.execute("""
+        SELECT seats.id, seats.seat_type
+        FROM showtimes st
+        JOIN screens sc ON sc.cinema_id = st.cinema_id AND sc.screen_number = st.screen_number
+        JOIN seats ON seats.screen_id = sc.id
+        WHERE st.id = ? AND seats.id IN (SELECT value FROM json_each(?))
+    """, (showtime_id, seat_json))
+    return {row[0]: row[1] for row in cursor.fetchall()}
+
+
+def taken_seats(cursor, showtime_id, seat_json):
+    cursor.execute("""
+        SELECT seat_id FROM bookings
+        WHERE showtime_id = ? AND seat_id IN (SELECT value FROM json_each(?))
+    """, (showtime_id, seat_json))
+    return [row[0] for row in cursor.fetchall()]
+
+
+def book_seats(conn, showtime_id, seat_ids, customer_name, customer_email, customer_phone,
+               staff_id, booking_reference, price_for, booked_at=None, hold_token=None):
+    """Book every seat in ``seat_ids`` for ``showtime_id`` or none of them.
+
+    ``price_for(seat_type)`` returns the final per-seat price. Raises
+    ``SeatNotFound`` for seats that are not on the showtime's screen and
+    ``SeatConflict`` listing every seat already taken or held by another
+    till. Seats held under ``hold_token`` are converted into bookings and
+    their holds dropped in the same transaction. Returns a list of
+    ``{"seat_id", "seat_type", "price"}`` dicts in request order.
+    """
+    from database.seat_holds import held_by_others
+
+    seat_ids = normalise_seat_ids(seat_ids)
+    seat_json = json.dumps(seat_ids)
+    booked_at = (booked_at or datetime.now()).strftime("%Y-%m-%d %H:%M:%S")
+
+    def claim(cursor):
+        seat_types = screen_seat_types(cursor, showtime_id, seat_json)
+        missing = set(seat_ids) - set(seat_types)
+        if missing:
+            raise SeatNotFound(missing)
+
+        # We hold the write lock, so this answer cannot go stale before the insert
+        taken = set(taken_seats(cursor, showtime_id, seat_json))
+        taken.update(held_by_others(cursor, showtime_id, seat_json, hold_token, time.time()))
+        if taken:
+            raise SeatConflict(taken)
+
+        lines = [
+            {"seat_id": seat_id, "seat_type": seat_types[seat_id], "price": price_for(seat_types[seat_id])}
+            for seat_id in seat_ids
+        ]
+        # Customer details live once on the header; each seat line only points at it
+        order_id = create_order(cursor, booking_reference, customer_name, customer_email, customer_phone,
+                                staff_id, booked_at)
+        try:
+            cursor.executemany("""
+                INSERT INTO bookings (order_id, showtime_id, seat_id, total_price) VALUES (?, ?, ?, ?)
+            """, [(order_id, showtime_id, line["seat_id"], line["price"]) for line in lines])
+        except sqlite3.IntegrityError:
+            raise SeatConflict(taken_seats(cursor, showtime_id, seat_json))
+
+        cursor.execute("UPDATE seats SET is_booked = 1 WHERE id IN (SELECT value FROM json_each(?))", (seat_json,))
+        cursor.execute(
+            "DELETE FROM seat_holds WHERE showtime_id = ? AND seat_id IN (SELECT value FROM json_each(?))",
+            (showtime_id, seat_json)
+        )
+        return lines
+
+    return run_write_transaction(conn, claim)
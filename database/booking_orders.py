@@ -0,0 +1,156 @@
+"""Booking headers: one ``booking_orders`` row per booking reference.
+
+The customer, staff member, booking date and reference of a booking are
+stored once on its ``booking_orders`` row; each seat is a line in
+``bookings`` holding only ``order_id``, showtime, seat and price. The
+header's ``seat_count`` and ``total_price`` are kept current by triggers on
+``bookings``, so receipts and refunds read a header by its unique reference
+and its lines by ``order_id`` instead of grouping seat rows by a text
+column.
+
+Lines inserted the old way, with the header columns filled in and no
+``order_id`` (ad-hoc SQL, older tools), are attached to the order for
+their reference, which is created on first sight. Their own copies of the
+header columns are left as written; nothing looks a booking up by them.
+"""
+_TOTALS_ADD = """
+    UPDATE booking_orders SET seat_count = seat_count + 1, total_price = total_price + COALESCE({row}.total_price, 0)
+    WHERE id = {row}.order_id;
+"""
+_TOTALS_REMOVE = """
+    UPDATE booking_orders SET seat_count = seat_count - 1, total_price = total_price - COALESCE({row}.total_price, 0)
+    WHERE id = {row}.order_id;
+"""
+
+TRIGGERS = (
+    "trg_bookings_adopt_order",
+    "trg_bookings_order_insert", "trg_bookings_order_delete", "trg_bookings_order_update",
+)
+
+
+def create_order_tables(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS booking_orders (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            booking_reference TEXT NOT NULL UNIQUE,
+            customer_name TEXT,
+            customer_email TEXT,
+            customer_phone TEXT,
+            booking_staff_id INTEGER,
+            booking_date TEXT,
+            seat_count INTEGER NOT NULL DEFAULT 0,
+            total_price REAL NOT NULL DEFAULT 0,
+            FOREIGN KEY (booking_staff_id) REFERENCES users(id)
+        )
+    """)
+    columns = {row[1] for row in cursor.execute("PRAGMA table_info(bookings)")}
+    if "order_id" not in columns:
+        cursor.execute("ALTER TABLE bookings ADD COLUMN order_id INTEGER REFERENCES booking_orders(id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_bookings_order ON bookings (order_id)")
+
+
+def create_order_triggers(cursor):
+    triggers = {
+        "trg_bookings_adopt_order": (
+            "AFTER INSERT ON bookings WHEN NEW.order_id IS NULL AND NEW.booking_reference IS NOT NULL", """
+            INSERT INTO booking_orders (booking_reference, customer_name, customer_email, customer_phone,
+                                        booking_staff_id, booking_date)
+            VALUES (NEW.booking_reference, NEW.customer_name, NEW.customer_email, NEW.customer_phone,
+                    NEW.booking_staff_id, NEW.booking_date)
+            ON CONFLICT (booking_reference) DO NOTHING;
+            UPDATE bookings SET order_id = (SELECT id FROM booking_orders WHERE booking_reference = NEW.booking_reference)
+            WHERE id = NEW.id;
+        """),
+        "trg_bookings_order_insert": ("AFTER INSERT ON bookings WHEN NEW.order_id IS NOT NULL",
+                                      _TOTALS_ADD.format(row="NEW")),
+        "trg_bookings_order_delete": ("AFTER DELETE ON bookings WHEN OLD.order_id IS NOT NULL",
+                                      _TOTALS_REMOVE.format(row="OLD")),
+        "trg_bookings_order_update": ("AFTER UPDATE OF order_id, total_price ON bookings",
+                                      _TOTALS_REMOVE.format(row="OLD") + _TOTALS_ADD.format(row="NEW")),
+    }
+    for name, (event, body) in triggers.items():
+        cursor.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {event} BEGIN {body} END")
+
+
+def convert_bookings(cursor):
+    """Copy the header columns of un-attached ``bookings`` rows onto ``booking_orders``.
+
+    Rows sharing a reference become one order (customer details from the
+    earliest row) and are attached to it by ``order_id``; their header
+    columns are not rewritten. Run before the triggers exist, since it
+    writes the totals itself; returns the number of orders created.
+    """
+    cursor.execute("""
+        INSERT INTO booking_orders (booking_reference, customer_name, customer_email, customer_phone,
+                                    booking_staff_id, booking_date, seat_count, total_price)
+        SELECT first.booking_reference, first.customer_name, first.customer_email, first.customer_phone,
+               first.booking_staff_id, first.booking_date, agg.seats, agg.total
+        FROM (
+            SELECT booking_reference, MIN(id) AS first_id, COUNT(*) AS seats,
+                   SUM(COALESCE(total_price, 0)) AS total
+            FROM bookings WHERE order_id IS NULL AND booking_reference IS NOT NULL
+            GROUP BY booking_reference
+        ) agg
+        JOIN bookings first ON first.id = agg.first_id
+        WHERE true
+        ON CONFLICT (booking_reference) DO UPDATE SET
+            seat_count = seat_count + excluded.seat_count, total_price = total_price + excluded.total_price
+    """)
+    created = cursor.rowcount
+    cursor.execute("""
+        UPDATE bookings
+        SET order_id = (SELECT id FROM booking_orders o WHERE o.booking_reference = bookings.booking_reference)
+        WHERE order_id IS NULL AND booking_reference IS NOT NULL
+    """)
+    return created
+
+
+def create_order(cursor, booking_reference, customer_name, customer_email, customer_phone, staff_id, booked_at):
+    """Insert an empty header and return its id; lines added later fill in the totals."""
+    cursor.execute("""
+        INSERT INTO booking_orders (booking_reference, customer_name, customer_email, customer_phone,
+                                    booking_staff_id, booking_date)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """, (booking_reference, customer_name, customer_email, customer_phone, staff_id, booked_at))
+    return cursor.lastrowid
+
+
+def load_order(cursor, booking_reference):
+    """Header and seats for ``booking_reference`` as one dict, or ``None``.
+
+    One unique-index lookup for the header (with the staff name) and one
+    ``order_id`` index range for its lines.
+    """
+    cursor.execute("""
+        SELECT o.id, o.booking_reference, o.booking_date, o.customer_name, o.customer_email, o.customer_phone,
+               o.seat_count, o.total_price, u.username
+        FROM booking_orders o LEFT JOIN users u ON u.id = o.booking_staff_id
+        WHERE o.booking_reference = ?
+    """, (booking_reference,))
+    header = cursor.fetchone()
+    if header is None:
+        return None
+
+    cursor.execute("""
+        SELECT s.seat_number, f.title, st.show_time, st.screen_number, c.city, c.location
+        FROM bookings b
+        JOIN showtimes st ON st.id = b.showtime_id
+        JOIN films f ON f.id = st.film_id
+        LEFT JOIN cinemas c ON c.id = st.cinema_id
+        JOIN seats s ON s.id = b.seat_id
+        WHERE b.order_id = ?
+        ORDER BY s.seat_number
+    """, (header[0],))
+    lines = cursor.fetchall()
+    if not lines:
+        return None
+
+    first = lines[0]
+    return {
+        "order_id": header[0], "booking_reference": header[1], "booking_date": header[2],
+        "customer_name": header[3], "customer_email": header[4], "customer_phone": header[5],
+        "seat_count": header[6], "total_price": round(header[7], 2), "staff_name": header[8],
+        "seat_numbers": [line[0] for line in lines],
+        "film_title": first[1], "show_time": first[2], "screen_number": first[3],
+        "city": first[4], "location": first[5],
+    }
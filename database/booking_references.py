@@ -0,0 +1,100 @@
+"""Booking references: short, unique, issue-ordered and self-checking.
+
+A reference is a number from the ``booking_reference_sequence`` counter,
+written as ``BODY_LENGTH`` Crockford base32 characters followed by one
+Luhn mod 32 check character, e.g. ``00000001Z``. The counter is bumped
+inside the booking's write transaction, so two tills can never be handed
+the same number, and the unique index on ``booking_orders`` stands behind
+it for references written by other tools. Fixed width means text order is
+issue order: new headers land at the right-hand edge of that index.
+
+Typed references are upper-cased, stripped of spaces and dashes and read
+with Crockford's ``O`` -> ``0`` and ``I``/``L`` -> ``1``. One with the
+wrong check character (any single mistyped character, most swapped
+neighbours) raises ``InvalidReference`` before the database is touched.
+Older references (uuid fragments and the like) are a different shape and
+are passed through unchanged.
+"""
+ALPHABET = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+BODY_LENGTH = 8
+LENGTH = BODY_LENGTH + 1
+
+_VALUES = {char: value for value, char in enumerate(ALPHABET)}
+_TYPED = str.maketrans({"O": "0", "I": "1", "L": "1", "-": None, " ": None})
+
+
+class InvalidReference(ValueError):
+    """Some typed references are shaped like ours but fail the check character."""
+
+    def __init__(self, references):
+        self.references = sorted(references)
+        super().__init__(f"Invalid booking reference: {', '.join(self.references)}")
+
+
+def create_reference_sequence(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS booking_reference_sequence (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            value INTEGER NOT NULL
+        )
+    """)
+    cursor.execute("INSERT OR IGNORE INTO booking_reference_sequence (id, value) VALUES (1, 0)")
+
+
+def check_character(body):
+    """Luhn mod 32 check character for ``body`` (canonical characters only)."""
+    total = 0
+    for position, char in enumerate(reversed(body)):
+        value = _VALUES[char] * (2 if position % 2 == 0 else 1)
+        total += value // 32 + value % 32
+    return ALPHABET[-total % 32]
+
+
+def encode_reference(number):
+    if not 0 < number < 32 ** BODY_LENGTH:
+        raise ValueError(f"Reference number out of range: {number}")
+    body = ""
+    for _ in range(BODY_LENGTH):
+        number, digit = divmod(number, 32)
+        body = ALPHABET[digit] + body
+    return body + check_character(body)
+
+
+def parse_reference(text):
+    """Canonical form of a typed reference, or ``None`` if it is not shaped like one of ours.
+
+    Our shape is ``LENGTH`` base32 characters including at least one
+    typed digit (so a nine-letter name is not mistaken for one). Raises
+    ``InvalidReference`` if the check character does not match.
+    """
+    text = str(text).strip()
+    typed = text.upper().translate(_TYPED)
+    if len(typed) != LENGTH or not any(char.isdigit() for char in text) or not all(c in _VALUES for c in typed):
+        return None
+    if check_character(typed[:-1]) != typed[-1]:
+        raise InvalidReference([text])
+    return typed
+
+
+def canonical_references(texts):
+    """Each reference in canonical form (older shapes unchanged); ``InvalidReference`` lists every bad one."""
+    canonical, invalid = [], []
+    for text in texts:
+        try:
+            canonical.append(parse_reference(text) or str(text).strip())
+        except InvalidReference:
+            invalid.append(str(text).strip())
+    if invalid:
+        raise InvalidReference(invalid)
+    return canonical
+
+
+def allocate_reference(cursor):
+    """Next unused reference; call inside the write transaction that inserts its order."""
+    while True:
+        cursor.execute("UPDATE booking_reference_sequence SET value = value + 1 WHERE id = 1 RETURNING value")
+        reference = encode_reference(cursor.fetchone()[0])
+        # Only an imported reference could already hold this value; skip past it
+        cursor.execute("SELECT 1 FROM booking_orders WHERE booking_reference = ?", (reference,))
+        if cursor.fetchone() is None:
+            return reference
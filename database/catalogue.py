@@ -0,0 +1,73 @@
+"""Film catalogue queries for the admin dashboard.
+
+One joined aggregate query returns every ``(film, cinema)`` pair with its
+showtimes, and rows are grouped into dicts in a single pass, so the cost is
+linear in the size of the catalogue. ``after_id``/``limit`` page through
+films by primary key (keyset pagination, no OFFSET scans) and
+``iter_film_catalogue`` streams the whole catalogue page by page.
+"""
+
+
+def film_catalogue(cursor, limit=None, after_id=0):
+    """Films with their cinemas and showtimes; returns ``(films, film_cinemas, next_after)``.
+
+    ``next_after`` is the ``after_id`` for the following page, or ``None``
+    once the catalogue is exhausted.
+    """
+    if limit:
+        film_filter, params = "f.id IN (SELECT id FROM films WHERE id > ? ORDER BY id LIMIT ?)", (after_id, limit)
+    else:
+        film_filter, params = "f.id > ?", (after_id,)
+
+    cursor.execute(f"""
+        SELECT f.id, f.title, f.genre, f.age_rating,
+               c.id, c.city, c.location,
+               GROUP_CONCAT(DISTINCT st.show_time)
+        FROM films f
+        LEFT JOIN showtimes st ON st.film_id = f.id
+        LEFT JOIN cinemas c ON c.id = st.cinema_id
+        WHERE {film_filter}
+        GROUP BY f.id, c.id
+        ORDER BY f.id, c.id
+    """, params)
+
+    films, film_cinemas = {}, {}
+    for film_id, title, genre, age_rating, cinema_id, city, location, showtimes in cursor:
+        film = films.get(film_id)
+        if film is None:
+            film = films[film_id] = {"id": film_id, "title": title, "genre": genre,
+                                     "age_rating": age_rating, "showtimes": []}
+        if showtimes:
+            film["showtimes"].append(showtimes)
+        if cinema_id is not None:
+            film_cinemas.setdefault(film_id, []).append({"id": cinema_id, "city": city, "location": location})
+
+    for film in films.values():
+        film["showtimes"] = ",".join(film["showtimes"]) or "None"
+
+    films = list(films.values())
+    next_after = films[-1]["id"] if limit and len(films) == limit else None
+    return films, film_cinemas, next_after
+
+
+def iter_film_catalogue(cursor, page_size=500):
+    """Yield ``(film, cinemas)`` for every film, fetching ``page_size`` films per query."""
+    after_id = 0
+    while after_id is not None:
+        films, film_cinemas, after_id = film_catalogue(cursor, page_size, after_id)
+        for film in films:
+            yield film, film_cinemas.get(film["id"], [])
+
+
+def cinemas_with_showtimes(cursor):
+    """Cinemas that have at least one showtime, or every cinema when none do."""
+    cursor.execute("""
+        SELECT id, city, location FROM cinemas c
+        WHERE EXISTS (SELECT 1 FROM showtimes st WHERE st.cinema_id = c.id)
+        ORDER BY id
+    """)
+    cinemas = cursor.fetchall()
+    if not cinemas:
+        cursor.execute("SELECT id, city, location FROM cinemas ORDER BY id")
+        cinemas = cursor.fetchall()
+    return cinemas
@@ -0,0 +1,151 @@
+"""Customer and booking lookup for the refund search.
+
+A search term is matched, in order, as an exact booking reference, an
+exact email address (trimmed, case-insensitive), a phone number prefix
+(ignoring spaces, dashes, dots, brackets and ``+``) or a customer name
+prefix (case-insensitive). Each kind has an expression index on
+``booking_orders`` over the normalised value and ``booking_reference``,
+so matches are read in index order: a page is a bounded range scan that
+stops after ``limit`` references however many bookings the table holds.
+
+Results come one per booking reference (header plus seats) and are paged
+with a keyset cursor (the last ``(key, booking_reference)`` returned)
+rather than ``OFFSET``, so later pages cost the same as the first.
+"""
+import base64
+import json
+
+from database.booking_references import InvalidReference, parse_reference
+
+DEFAULT_PAGE_SIZE = 20
+MIN_PREFIX = 2
+
+_PHONE_IGNORED = " -.()+"
+
+# Normalised values; the lookup indexes use these exact expressions
+EMAIL_KEY = "lower(trim(customer_email))"
+NAME_KEY = "lower(trim(customer_name))"
+PHONE_KEY = "customer_phone"
+for _char in _PHONE_IGNORED:
+    PHONE_KEY = f"replace({PHONE_KEY}, '{_char}', '')"
+
+LOOKUP_INDEXES = {
+    "idx_orders_email_key": EMAIL_KEY,
+    "idx_orders_name_key": NAME_KEY,
+    "idx_orders_phone_key": PHONE_KEY,
+}
+
+# Sorts after any UTF-8 text starting with the prefix
+_PREFIX_END = "\U0010ffff"
+
+
+def create_lookup_indexes(cursor):
+    for name, key in LOOKUP_INDEXES.items():
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS {name} ON booking_orders ({key}, booking_reference)")
+
+
+def normalise_phone(phone):
+    return "".join(char for char in phone.strip() if char not in _PHONE_IGNORED)
+
+
+def classify(query):
+    """``(kind, key)`` for a search term: ``email``, ``phone`` or ``name``, or ``None`` if too short."""
+    query = query.strip()
+    if "@" in query:
+        return "email", query.lower()
+    phone = normalise_phone(query)
+    if phone.isdigit() and len(phone) >= MIN_PREFIX:
+        return "phone", phone
+    if len(query) >= MIN_PREFIX:
+        return "name", query.lower()
+    return None
+
+
+def encode_cursor(key, reference):
+    return base64.urlsafe_b64encode(json.dumps([key, reference]).encode()).decode()
+
+
+def decode_cursor(token):
+    """``(key, reference)`` from ``encode_cursor``; raises ``ValueError`` on a malformed token."""
+    try:
+        key, reference = json.loads(base64.urlsafe_b64decode(token.encode()))
+    except (TypeError, ValueError, UnicodeError) as e:
+        raise ValueError(f"Invalid page cursor: {token!r}") from e
+    return key, reference
+
+
+def _matching_references(cursor, kind, key, after, limit):
+    column = {"email": EMAIL_KEY, "name": NAME_KEY, "phone": PHONE_KEY}[kind]
+    if kind == "email":
+        low, high = key, key
+    else:
+        low, high = key, key + _PREFIX_END
+    after_key, after_ref = after or (low, "")
+    cursor.execute(f"""
+        SELECT {column} AS match_key, booking_reference FROM booking_orders
+        WHERE {column} >= ? AND {column} <= ? AND ({column}, booking_reference) > (?, ?)
+        ORDER BY {column}, booking_reference
+        LIMIT ?
+    """, (low, high, after_key, after_ref, limit))
+    return [(row[0], row[1]) for row in cursor.fetchall()]
+
+
+def _booking_groups(cursor, references):
+    """One dict per reference (in the order given) with its header and seats."""
+    cursor.execute("""
+        SELECT o.id, o.booking_reference, o.customer_name, o.customer_email, o.customer_phone,
+               o.total_price, o.booking_date, f.title AS film_title, st.show_time, s.seat_number
+        FROM booking_orders o
+        JOIN bookings b ON b.order_id = o.id
+        JOIN showtimes st ON st.id = b.showtime_id
+        JOIN films f ON f.id = st.film_id
+        JOIN seats s ON s.id = b.seat_id
+        WHERE o.booking_reference IN (SELECT value FROM json_each(?))
+        ORDER BY o.booking_reference, s.seat_number
+    """, (json.dumps(references),))
+    groups = {}
+    for row in cursor.fetchall():
+        group = groups.get(row[1])
+        if group is None:
+            group = groups[row[1]] = {
+                "order_id": row[0], "booking_reference": row[1], "customer_name": row[2],
+                "customer_email": row[3], "customer_phone": row[4], "total_price": round(row[5], 2),
+                "booking_date": row[6], "film_title": row[7], "show_time": row[8], "seat_numbers": [],
+            }
+        group["seat_numbers"].append(row[9])
+    return [groups[reference] for reference in references if reference in groups]
+
+
+def find_bookings(cursor, query, after=None, limit=DEFAULT_PAGE_SIZE):
+    """Bookings matching ``query`` grouped by reference, as ``(groups, next_cursor)``.
+
+    ``after`` is the ``next_cursor`` of the previous page; ``next_cursor``
+    is ``None`` on the last page. Raises ``ValueError`` for a bad cursor
+    and ``InvalidReference`` (a ``ValueError``) for a reference with the
+    wrong check character.
+    """
+    query = (query or "").strip()
+    if not query:
+        return [], None
+
+    if after is None:
+        try:
+            reference = parse_reference(query) or query
+        except InvalidReference:
+            # A mistyped reference is rejected here, unless it could be a phone number
+            if not normalise_phone(query).isdigit():
+                raise
+            reference = query
+        cursor.execute("SELECT 1 FROM booking_orders WHERE booking_reference = ?", (reference,))
+        if cursor.fetchone():
+            return _booking_groups(cursor, [reference]), None
+
+    match = classify(query)
+    if match is None:
+        return [], None
+    kind, key = match
+    # One extra row tells us whether there is another page
+    found = _matching_references(cursor, kind, key, after and decode_cursor(after), limit + 1)
+    page = found[:limit]
+    next_cursor = encode_cursor(*page[-1]) if len(found) > limit else None
+    return _booking_groups(cursor, [reference for _, reference in page]), next_cursor
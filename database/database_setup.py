@@ -1,30 +1,272 @@
+import calendar
+import logging
 import os
+import random
 import sqlite3
-from flask import current_app
+import threading
+import time
+from datetime import datetime, timedelta
+from flask import current_app, g, has_app_context
 
-def get_db_connection(testing=False):
-    try:
+from database.migrations import migrate
+from database.pool import ConnectionPool
+
+# PRAGMAs applied once when the pool opens a connection
+DEFAULT_PRAGMAS = {
+    "temp_store": "MEMORY",
+    "cache_size": -8000,  # ~8 MB page cache per connection
+}
+
+# Journaling/durability profiles selectable with DB_STORAGE_MODE.
+# "wal" lets readers run alongside a single writer; NORMAL sync is durable
+# across application crashes and only risks the last commits on power loss.
+STORAGE_MODES = {
+    "wal": {"journal_mode": "WAL", "synchronous": "NORMAL", "busy_timeout": 5000},
+    "rollback": {"journal_mode": "DELETE", "synchronous": "FULL", "busy_timeout": 5000},
+}
+DEFAULT_STORAGE_MODE = os.environ.get("DB_STORAGE_MODE", "wal")
+
+_pools = {}
+_pools_lock = threading.Lock()
+_checkpointers = {}
+_job_locks = {}
+_job_locks_lock = threading.Lock()
+
+
+def get_db_path(testing=False):
+    if has_app_context():
         # Use Flask config if inside app context
+        db_path = current_app.config.get("DATABASE")
+        if db_path:
+            return db_path
         testing = current_app.config.get("TESTING", False)
-    except RuntimeError:
-        # Use passed parameter if no app context
-        pass
 
     db_name = 'horizon_cinemas_test.db' if testing else 'horizon_cinemas.db'
-    db_path = os.path.join(os.path.dirname(__file__), db_name)
+    return os.path.join(os.path.dirname(__file__), db_name)
 
-    print("✅ get_db_connection() called")
-    print(f"📍 USING DB: {db_path}")
 
-    conn = sqlite3.connect(db_path)
-    conn.row_factory = sqlite3.Row
+def get_pool(db_path):
+    """Return the connection pool for ``db_path``, creating it on first use."""
+    with _pools_lock:
+        pool = _pools.get(db_path)
+        # A forked gunicorn worker must not share its parent's sqlite handles
+        if pool is None or pool.pid != os.getpid():
+            size, timeout, mode, interval, auto_migrate = 5, 10.0, DEFAULT_STORAGE_MODE, 0, True
+            if has_app_context():
+                size = current_app.config.get("DB_POOL_SIZE", size)
+                timeout = current_app.config.get("DB_POOL_TIMEOUT", timeout)
+                mode = current_app.config.get("DB_STORAGE_MODE", mode)
+                interval = current_app.config.get("DB_CHECKPOINT_INTERVAL", interval)
+                auto_migrate = current_app.config.get("DB_AUTO_MIGRATE", auto_migrate)
+            pool = ConnectionPool(db_path, max_size=size, timeout=timeout, pragmas=storage_pragmas(mode))
+            _pools[db_path] = pool
+
+            # Bring existing databases up to the current schema before first use
+            if auto_migrate and os.path.exists(db_path):
+                conn = pool.connection()
+                try:
+                    migrate(conn.raw)
+                finally:
+                    conn.close()
+
+            if mode == "wal" and interval and owns_background_jobs(db_path):
+                start_checkpointer(db_path, interval)
+        return pool
+
+
+def storage_pragmas(mode=DEFAULT_STORAGE_MODE):
+    if mode not in STORAGE_MODES:
+        raise ValueError(f"Unknown storage mode {mode!r}; expected one of {sorted(STORAGE_MODES)}")
+    return {**STORAGE_MODES[mode], **DEFAULT_PRAGMAS}
+
+
+def _is_busy(error):
+    message = str(error).lower()
+    return "locked" in message or "busy" in message
+
+
+def run_write_transaction(conn, work, retries=5, base_delay=0.02, max_delay=0.5):
+    """Run ``work(cursor)`` inside ``BEGIN IMMEDIATE`` and commit it.
+
+    Taking the write lock up front means a competing till fails fast at
+    BEGIN instead of deadlocking half way through its statements. If the
+    database is still locked once busy_timeout expires, the whole
+    transaction is retried with jittered exponential backoff.
+    When the connection is already inside a transaction the work simply
+    joins it and the caller stays responsible for committing.
+    """
+    if conn.in_transaction:
+        # Already inside the caller's transaction: join it, caller commits
+        return work(conn.cursor())
+
+    for attempt in range(retries + 1):
+        cursor = conn.cursor()
+        try:
+            cursor.execute("BEGIN IMMEDIATE")
+            result = work(cursor)
+            conn.commit()
+            return result
+        except sqlite3.OperationalError as e:
+            if conn.in_transaction:
+                conn.rollback()
+            if not _is_busy(e) or attempt == retries:
+                raise
+            delay = min(max_delay, base_delay * (2 ** attempt))
+            logging.warning(f"Database busy, retrying write in {delay:.3f}s (attempt {attempt + 1})")
+            time.sleep(delay * random.uniform(0.5, 1.0))
+        except Exception:
+            if conn.in_transaction:
+                conn.rollback()
+            raise
+
+
+class WalCheckpointer(threading.Thread):
+    """Background thread that periodically folds the WAL back into the database.
+
+    SQLite only auto-checkpoints from inside a committing connection, which
+    adds latency to whichever booking trips the threshold. Running a PASSIVE
+    checkpoint off the request path keeps the -wal file small without ever
+    blocking readers or writers.
+    """
+
+    def __init__(self, db_path, interval=60.0, mode="PASSIVE"):
+        super().__init__(name=f"wal-checkpoint:{os.path.basename(db_path)}", daemon=True)
+        self.db_path = db_path
+        self.interval = interval
+        self.mode = mode
+        self.runs = 0
+        self._stop_event = threading.Event()
+
+    def checkpoint(self):
+        conn = sqlite3.connect(self.db_path)
+        try:
+            busy, log_frames, checkpointed = conn.execute(f"PRAGMA wal_checkpoint({self.mode})").fetchone()
+            self.runs += 1
+            return {"busy": busy, "log_frames": log_frames, "checkpointed": checkpointed}
+        finally:
+            conn.close()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            try:
+                self.checkpoint()
+            except sqlite3.Error as e:
+                logging.warning(f"WAL checkpoint failed for {self.db_path}: {e}")
+
+    def stop(self):
+        self._stop_event.set()
+
+
+def start_checkpointer(db_path, interval):
+    checkpointer = _checkpointers.get(db_path)
+    if checkpointer is None or not checkpointer.is_alive():
+        checkpointer = WalCheckpointer(db_path, interval)
+        checkpointer.start()
+        _checkpointers[db_path] = checkpointer
+    return checkpointer
+
+
+def owns_background_jobs(db_path):
+    """True if this process should run the database's singleton background jobs.
+
+    Hold sweeping, the email outbox, backups, occupancy reconciliation and
+    WAL checkpoints must run once per database, not once per worker. The
+    first process to take an exclusive lock on ``<db_path>.jobs.lock`` owns
+    them until it exits; other processes skip them. ``BACKGROUND_JOBS =
+    False`` in the app config opts a process out entirely (e.g. web workers
+    when a separate process runs the jobs).
+    """
+    if has_app_context() and not current_app.config.get("BACKGROUND_JOBS", True):
+        return False
+    with _job_locks_lock:
+        pid, handle = _job_locks.get(db_path, (None, None))
+        if pid == os.getpid():
+            return True
+        handle = open(db_path + ".jobs.lock", "a")
+        try:
+            import fcntl
+            fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except ImportError:
+            pass  # No flock (Windows): assume the single-process dev server
+        except OSError:
+            handle.close()
+            return False
+        _job_locks[db_path] = (os.getpid(), handle)
+        return True
+
+
+def release_background_jobs():
+    """Give up every job lock this process holds (tests, shutdown)."""
+    with _job_locks_lock:
+        locks = list(_job_locks.values())
+        _job_locks.clear()
+    for pid, handle in locks:
+        if pid == os.getpid():
+            handle.close()
+
+
+def get_db_connection(testing=False):
+    """Check a connection out of the pool.
+
+    Inside an app context every call shares one connection, which is handed
+    back to the pool when the context tears down. Outside a context the
+    caller owns the connection and returns it with ``conn.close()``.
+    """
+    db_path = get_db_path(testing)
+
+    if not has_app_context():
+        return get_pool(db_path).connection()
+
+    conn = g.get("_db_conn")
+    if conn is None or conn._raw is None or conn._pool.db_path != db_path:
+        if conn is not None:
+            conn.release()
+        conn = get_pool(db_path).connection(bound=True)
+        g._db_conn = conn
     return conn
 
 
-def initialize_database(testing=False):
+def close_db_connection(exc=None):
+    conn = g.pop("_db_conn", None)
+    if conn is not None:
+        conn.release()
+
+
+def get_pool_stats():
+    with _pools_lock:
+        return [pool.stats() for pool in _pools.values()]
+
+
+def close_all_pools():
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+        checkpointers = list(_checkpointers.values())
+        _checkpointers.clear()
+    for checkpointer in checkpointers:
+        checkpointer.stop()
+    for pool in pools:
+        pool.close()
+
+
+def init_app(app):
+    app.teardown_appcontext(close_db_connection)
+
+
+def day_epoch_range(date_str):
+    """Return the ``[start, end)`` show_epoch bounds for a ``YYYY-MM-DD`` day.
+
+    show_epoch is the naive show_time read as UTC, matching SQLite's
+    ``strftime('%s', show_time)`` used to populate it.
+    """
+    day = datetime.strptime(date_str, "%Y-%m-%d")
+    start = calendar.timegm(day.timetuple())
+    return start, start + int(timedelta(days=1).total_seconds())
+
+
+def initialize_database(testing=False, db_path=None):
     # Use correct database path even when run directly
-    db_name = 'horizon_cinemas_test.db' if testing else 'horizon_cinemas.db'
-    db_path = os.path.join(os.path.dirname(__file__), db_name)
+    db_path = db_path or get_db_path(testing)
     conn = sqlite3.connect(db_path)
     cursor = conn.cursor()
 
@@ -136,6 +378,10 @@ def initialize_database(testing=False):
     ''')
 
     conn.commit()
+
+    # Indexes and later schema changes
+    migrate(conn)
+
     conn.close()
     print("✅ Database Initialized Successfully!")
 
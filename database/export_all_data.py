@@ -1,43 +1,279 @@
-import sqlite3
+"""Export every table to per-table files, and load such an export into a fresh database.
+
+The export never reads the live database table by table. It first copies a
+consistent snapshot with the page-stepped online backup used by
+``database.backup``, so bookings carry on while the pages are copied. Each table is then dumped from that
+snapshot on its own thread and connection, ``chunk_size`` rows at a time,
+so peak memory is one chunk per thread rather than the largest table.
+
+An export directory holds:
+
+* ``schema.sql`` - ``CREATE`` statements for tables, then indexes, triggers and views
+* ``<table>.jsonl`` or ``<table>.csv`` (optionally ``.gz``) - one file per table
+* ``manifest.json`` - format, compression, and the columns and row count of each table
+
+JSON lines round-trip exactly. CSV relies on the declared column types to
+turn text back into numbers, and cannot tell NULL from an empty string, so
+empty CSV fields are restored as NULL.
+
+    python -m database.export_all_data export OUT_DIR [--format csv|jsonl] [--gzip] [--jobs N]
+    python -m database.export_all_data import OUT_DIR NEW_DB
+
+``python database/export_all_data.py ...`` works the same way.
+"""
+import argparse
+import csv
+import gzip
+import json
 import os
+import sqlite3
+import sys
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+if not __package__:
+    # Run as a script (python database/export_all_data.py): make the project root importable
+    sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from database.backup import copy_database
+from database.report_export import DEFAULT_CHUNK_SIZE, stream_csv, stream_jsonl
+
+EXPORT_FORMATS = {"csv": stream_csv, "jsonl": stream_jsonl}
+MANIFEST = "manifest.json"
+SCHEMA = "schema.sql"
+DEFAULT_JOBS = 4
+
+
+def snapshot(db_path, dest_path):
+    """Copy a transactionally consistent image of ``db_path`` to ``dest_path``."""
+    source = sqlite3.connect(db_path)
+    dest = sqlite3.connect(dest_path)
+    try:
+        copy_database(source, dest)
+    finally:
+        dest.close()
+        source.close()
+    return dest_path
+
+
+def _table_file(table, fmt, compress):
+    return f"{table}.{fmt}" + (".gz" if compress else "")
+
+
+def _open_text(path, mode):
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8", newline="")
+    return open(path, mode, encoding="utf-8", newline="")
+
+
+def _quote(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _schema_objects(conn):
+    """Tables (data first) followed by indexes, triggers and views, each in creation order."""
+    return conn.execute("""
+        SELECT type, name, sql FROM sqlite_master
+        WHERE sql IS NOT NULL AND name NOT LIKE 'sqlite_%'
+        ORDER BY CASE type WHEN 'table' THEN 0 WHEN 'index' THEN 1 WHEN 'trigger' THEN 2 ELSE 3 END, rowid
+    """).fetchall()
+
+
+def _split_statements(script):
+    """Split a SQL script into statements; trigger bodies keep their inner semicolons."""
+    statements, current = [], ""
+    for line in script.splitlines(keepends=True):
+        current += line
+        if sqlite3.complete_statement(current):
+            # Drop the separator and the semicolon so sqlite_master text is kept verbatim
+            statements.append(current.lstrip("\n").rstrip()[:-1])
+            current = ""
+    return statements
+
+
+def _dump_table(snapshot_path, table, out_dir, fmt, compress, chunk_size, progress):
+    conn = sqlite3.connect(f"file:{snapshot_path}?mode=ro", uri=True)
+    try:
+        total = conn.execute(f"SELECT COUNT(*) FROM {_quote(table)}").fetchone()[0]
+        cursor = conn.execute(f"SELECT * FROM {_quote(table)}")
+        columns = [column[0] for column in cursor.description]
+        done = 0
+        with _open_text(os.path.join(out_dir, _table_file(table, fmt, compress)), "w") as f:
+            for chunk in EXPORT_FORMATS[fmt](cursor, chunk_size):
+                f.write(chunk)
+                done = min(total, done + chunk_size)
+                progress(table, done, total)
+        if total == 0:
+            progress(table, 0, 0)
+        return {"columns": columns, "rows": total}
+    finally:
+        conn.close()
+
+
+def export_database(db_path, out_dir, fmt="jsonl", compress=False, jobs=DEFAULT_JOBS,
+                    chunk_size=DEFAULT_CHUNK_SIZE, progress=None):
+    """Write a snapshot of ``db_path`` to ``out_dir``; returns the manifest."""
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format {fmt!r}; expected one of {sorted(EXPORT_FORMATS)}")
+    os.makedirs(out_dir, exist_ok=True)
+    lock = threading.Lock()
+
+    def report(table, done, total):
+        if progress:
+            with lock:
+                progress(table, done, total)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        snapshot_path = snapshot(db_path, os.path.join(tmp, "snapshot.db"))
+        conn = sqlite3.connect(snapshot_path)
+        objects = _schema_objects(conn)
+        # sqlite_sequence has no CREATE statement but carries AUTOINCREMENT counters
+        has_sequence = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'sqlite_sequence'"
+        ).fetchone() is not None
+        conn.close()
+
+        tables = [name for kind, name, _ in objects if kind == "table"]
+        tables += ["sqlite_sequence"] if has_sequence else []
+        with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+            futures = {
+                table: pool.submit(_dump_table, snapshot_path, table, out_dir, fmt, compress, chunk_size, report)
+                for table in tables
+            }
+            dumped = {table: future.result() for table, future in futures.items()}
+
+    with open(os.path.join(out_dir, SCHEMA), "w", encoding="utf-8") as f:
+        for _, _, sql in objects:
+            f.write(sql + ";\n\n")
+
+    manifest = {
+        "format": fmt,
+        "compressed": compress,
+        "tables": {table: dict(info, file=_table_file(table, fmt, compress)) for table, info in dumped.items()},
+    }
+    with open(os.path.join(out_dir, MANIFEST), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def _read_rows(path, fmt, columns):
+    with _open_text(path, "r") as f:
+        if fmt == "jsonl":
+            for line in f:
+                record = json.loads(line)
+                yield tuple(record[column] for column in columns)
+        else:
+            reader = csv.reader(f)
+            next(reader)  # header
+            for row in reader:
+                yield tuple(value if value != "" else None for value in row)
+
+
+def _chunked(rows, size):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def import_database(export_dir, db_path, chunk_size=DEFAULT_CHUNK_SIZE, progress=None):
+    """Restore an export into a new database file at ``db_path``; returns ``{table: rows}``.
+
+    Tables are created and filled first, indexes and triggers afterwards, so
+    rows load without index maintenance and triggers (such as the report
+    summaries) do not fire a second time over restored data. The whole
+    restore is one transaction on a file nobody else is using.
+    """
+    if os.path.exists(db_path) and os.path.getsize(db_path):
+        raise FileExistsError(f"{db_path} already exists; restore into a new file")
+
+    with open(os.path.join(export_dir, MANIFEST), encoding="utf-8") as f:
+        manifest = json.load(f)
+    with open(os.path.join(export_dir, SCHEMA), encoding="utf-8") as f:
+        statements = _split_statements(f.read())
+    tables_sql = [sql for sql in statements if sql.lstrip().upper().startswith("CREATE TABLE")]
+    other_sql = [sql for sql in statements if sql not in tables_sql]
+
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    counts = {}
+    try:
+        conn.execute("PRAGMA journal_mode = OFF")
+        conn.execute("PRAGMA synchronous = OFF")
+        conn.execute("BEGIN")
+        for sql in tables_sql:
+            conn.execute(sql)
+
+        # AUTOINCREMENT counters are restored last, over the ones the inserts produced
+        tables = sorted(manifest["tables"], key=lambda table: table == "sqlite_sequence")
+        for table in tables:
+            info = manifest["tables"][table]
+            if table == "sqlite_sequence":
+                conn.execute("DELETE FROM sqlite_sequence")
+            columns = info["columns"]
+            # CSV values are text; declared column types convert them back, but
+            # sqlite_sequence.seq has no declared type and needs an explicit cast
+            values = ["CAST(? AS INTEGER)" if (table, column) == ("sqlite_sequence", "seq") else "?"
+                      for column in columns]
+            insert = (f"INSERT INTO {_quote(table)} ({', '.join(_quote(column) for column in columns)}) "
+                      f"VALUES ({', '.join(values)})")
+            rows = _read_rows(os.path.join(export_dir, info["file"]), manifest["format"], columns)
+            counts[table] = 0
+            for chunk in _chunked(rows, chunk_size):
+                conn.executemany(insert, chunk)
+                counts[table] += len(chunk)
+                if progress:
+                    progress(table, counts[table], info["rows"])
+
+        for sql in other_sql:
+            conn.execute(sql)
+        conn.execute("COMMIT")
+    except Exception:
+        conn.close()
+        os.remove(db_path)
+        raise
+    conn.execute("PRAGMA journal_mode = DELETE")
+    conn.close()
+
+    mismatched = {table: rows for table, rows in counts.items() if rows != manifest["tables"][table]["rows"]}
+    if mismatched:
+        raise ValueError(f"Row counts differ from the manifest: {mismatched}")
+    return counts
+
+
+def _print_progress(table, done, total):
+    print(f"  {table}: {done}/{total} rows", flush=True)
+
+
+if __name__ == "__main__":
+    from database.database_setup import get_db_path
+
+    parser = argparse.ArgumentParser(description="Export the database to per-table files or restore an export.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export_cmd = commands.add_parser("export", help="snapshot the database and dump every table")
+    export_cmd.add_argument("out_dir")
+    export_cmd.add_argument("--format", choices=sorted(EXPORT_FORMATS), default="jsonl")
+    export_cmd.add_argument("--gzip", action="store_true", help="gzip each table file")
+    export_cmd.add_argument("--jobs", type=int, default=DEFAULT_JOBS, help="tables dumped in parallel")
+    export_cmd.add_argument("--testing", action="store_true", help="export the test database")
+    export_cmd.add_argument("--db", help="path to a database file (overrides --testing)")
+
+    import_cmd = commands.add_parser("import", help="restore an export into a new database file")
+    import_cmd.add_argument("export_dir")
+    import_cmd.add_argument("db_path")
+    args = parser.parse_args()
 
-# Path to DB and output file
-db_path = 'database/horizon_cinemas.db'
-output_path = 'database/all_data.txt'
-
-# Connect to the database
-conn = sqlite3.connect(db_path)
-
-# Export all tables and their contents
-with open(output_path, 'w') as f:
-    cursor = conn.cursor()
-    
-    # Get all table names
-    cursor.execute("SELECT name FROM sqlite_master WHERE type='table';")
-    tables = cursor.fetchall()
-
-    for table_name in tables:
-        table = table_name[0]
-
-        f.write(f"\n\n-- Table: {table}\n\n")
-
-        # Table schema
-        f.write(f"-- Schema:\n")
-        cursor.execute(f"PRAGMA table_info({table})")
-        schema_info = cursor.fetchall()
-        for col in schema_info:
-            f.write(f"{col[1]} ({col[2]})\n")
-
-        # Table content
-        cursor.execute(f"SELECT * FROM {table}")
-        rows = cursor.fetchall()
-        columns = [col[1] for col in schema_info]
-
-        f.write('\n' + '\t'.join(columns) + '\n')
-        f.write('-' * 50 + '\n')
-        for row in rows:
-            f.write('\t'.join(str(item) for item in row) + '\n')
-
-# Close connection
-conn.close()
-print("✅ All data and schema exported to 'database/all_data.txt' successfully!");
\ No newline at end of file
+    if args.command == "export":
+        db_path = args.db or get_db_path(args.testing)
+        manifest = export_database(db_path, args.out_dir, args.format, args.gzip, args.jobs,
+                                   progress=_print_progress)
+        rows = sum(info["rows"] for info in manifest["tables"].values())
+        print(f"✅ Exported {len(manifest['tables'])} tables ({rows} rows) from {db_path} to {args.out_dir}")
+    else:
+        counts = import_database(args.export_dir, args.db_path, progress=_print_progress)
+        print(f"✅ Restored {len(counts)} tables ({sum(counts.values())} rows) into {args.db_path}")
@@ -0,0 +1,101 @@
+"""Booking demand forecasting (optional analytics).
+
+pandas, numpy, scikit-learn and matplotlib cost seconds of import time and
+tens of MB per worker, and only the forecast report needs them. They are
+imported on first use through ``_deps()``, so booking and admin routes never
+load them; ``is_available()`` lets callers degrade when they are not
+installed.
+"""
+import base64
+import importlib.util
+import io
+import threading
+from datetime import date, timedelta
+from types import SimpleNamespace
+
+ANALYTICS_MODULES = ("pandas", "numpy", "sklearn", "matplotlib")
+
+_deps_lock = threading.Lock()
+_loaded = None
+
+
+def is_available():
+    return all(importlib.util.find_spec(name) is not None for name in ANALYTICS_MODULES)
+
+
+def _deps():
+    global _loaded
+    if _loaded is None:
+        with _deps_lock:
+            if _loaded is None:
+                import matplotlib
+                matplotlib.use("Agg")  # worker threads have no display
+                import matplotlib.pyplot as plt
+                import numpy as np
+                import pandas as pd
+                from sklearn.linear_model import LinearRegression
+
+                _loaded = SimpleNamespace(pd=pd, np=np, plt=plt, LinearRegression=LinearRegression)
+    return _loaded
+
+
+def daily_bookings(conn):
+    """DataFrame of seats booked per film (by id) per show day."""
+    pd = _deps().pd
+    rows = conn.execute("""
+        SELECT f.id, f.title, s.show_date, COUNT(b.id) AS bookings
+        FROM bookings b
+        JOIN showtimes s ON s.id = b.showtime_id
+        JOIN films f ON f.id = s.film_id
+        GROUP BY f.id, s.show_date
+        ORDER BY f.id, s.show_date
+    """).fetchall()
+    return pd.DataFrame([tuple(row) for row in rows], columns=["film_id", "title", "show_date", "bookings"])
+
+
+def predict_bookings(conn, days_ahead=7, today=None):
+    """Predicted seats booked per film ``days_ahead`` days from ``today``, busiest first.
+
+    Fits a per-film linear trend of daily bookings against the day number;
+    films with a single day of history are predicted at that day's level.
+    """
+    deps = _deps()
+    history = daily_bookings(conn)
+    if history.empty:
+        return []
+
+    target = (today or date.today()) + timedelta(days=days_ahead)
+    history["day"] = deps.pd.to_datetime(history["show_date"]).map(lambda d: d.toordinal())
+
+    predictions = []
+    # Keyed on the film id: two films can share a title
+    for film_id, film in history.groupby("film_id"):
+        if film["day"].nunique() < 2:
+            predicted = film["bookings"].mean()
+        else:
+            model = deps.LinearRegression().fit(film[["day"]].to_numpy(), film["bookings"].to_numpy())
+            predicted = model.predict(deps.np.array([[target.toordinal()]]))[0]
+        predictions.append({"film_id": int(film_id), "title": film["title"].iloc[0],
+                            "total_bookings": max(0, int(round(predicted)))})
+
+    return sorted(predictions, key=lambda row: (-row["total_bookings"], row["title"], row["film_id"]))
+
+
+def forecast_chart_png(predictions):
+    """Bar chart of ``predict_bookings()`` output as PNG bytes, rendered in memory."""
+    plt = _deps().plt
+    fig, ax = plt.subplots(figsize=(10, 5))
+    ax.bar(range(len(predictions)), [row["total_bookings"] for row in predictions])
+    ax.set_xticks(range(len(predictions)), [row["title"] for row in predictions])
+    ax.set_ylabel("Predicted bookings")
+    ax.tick_params(axis="x", labelrotation=45)
+    fig.tight_layout()
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format="png")
+    plt.close(fig)
+    return buffer.getvalue()
+
+
+def forecast_chart_data_uri(predictions):
+    """``forecast_chart_png()`` as a ``data:`` URI, so each response carries its own chart."""
+    return "data:image/png;base64," + base64.b64encode(forecast_chart_png(predictions)).decode()
@@ -0,0 +1,600 @@
+"""Versioned schema migrations for the Horizon Cinemas SQLite database.
+
+Each migration is a function taking a cursor; it runs inside its own
+``BEGIN IMMEDIATE`` transaction together with the row recording it in
+``schema_migrations``, so a crash never leaves a half-applied version and
+concurrent workers starting up at the same time apply it exactly once.
+
+Once a later migration changes a table or trigger, earlier migrations
+keep their own inline copy of the SQL instead of calling the module that
+owns it today, so replaying an old version (``migrate(conn, target=N)``)
+always builds the schema it shipped with.
+
+Run manually with:
+
+    python -m database.migrations            # production database
+    python -m database.migrations --testing  # test database
+"""
+import argparse
+import sqlite3
+from datetime import datetime
+
+
+def _001_hot_query_indexes(cursor):
+    # Seat map LEFT JOIN (showtime_id + seat_id) and occupancy COUNT(*) by showtime
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_bookings_showtime_seat ON bookings (showtime_id, seat_id)")
+    # Receipt / refund lookups
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_bookings_reference ON bookings (booking_reference)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_bookings_email ON bookings (customer_email)")
+    # Timetables by cinema and day, film listings
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_showtimes_cinema_time ON showtimes (cinema_id, show_time)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_showtimes_film ON showtimes (film_id)")
+    # Screen resolution for a showtime; rowid makes it covering for SELECT id
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_screens_cinema_number ON screens (cinema_id, screen_number)")
+    # Covering index for the seat map: filter by screen, ordered by seat number
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_seats_screen_number_type ON seats (screen_id, seat_number, seat_type)")
+
+
+def _002_showtime_date_columns(cursor):
+    # Precomputed calendar day and (naive, UTC-interpreted) epoch so day and
+    # range filters compare plain indexed values instead of DATE(show_time)
+    columns = {row[1] for row in cursor.execute("PRAGMA table_info(showtimes)")}
+    if "show_date" not in columns:
+        cursor.execute("ALTER TABLE showtimes ADD COLUMN show_date TEXT")
+    if "show_epoch" not in columns:
+        cursor.execute("ALTER TABLE showtimes ADD COLUMN show_epoch INTEGER")
+
+    cursor.execute("""
+        UPDATE showtimes
+        SET show_date = DATE(show_time),
+            show_epoch = CAST(strftime('%s', show_time) AS INTEGER)
+    """)
+
+    # Keep the derived columns in sync for every writer, including ad-hoc SQL
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_showtimes_dates_insert
+        AFTER INSERT ON showtimes
+        BEGIN
+            UPDATE showtimes
+            SET show_date = DATE(NEW.show_time),
+                show_epoch = CAST(strftime('%s', NEW.show_time) AS INTEGER)
+            WHERE id = NEW.id;
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_showtimes_dates_update
+        AFTER UPDATE OF show_time ON showtimes
+        BEGIN
+            UPDATE showtimes
+            SET show_date = DATE(NEW.show_time),
+                show_epoch = CAST(strftime('%s', NEW.show_time) AS INTEGER)
+            WHERE id = NEW.id;
+        END
+    """)
+
+    # Daily timetables per cinema and across all cinemas
+    cursor.execute("DROP INDEX IF EXISTS idx_showtimes_cinema_time")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_showtimes_cinema_epoch ON showtimes (cinema_id, show_epoch)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_showtimes_epoch ON showtimes (show_epoch)")
+
+
+def _003_unique_showtime_seat(cursor):
+    # Legacy data can hold double-sold seats. Keep the first sale on the seat
+    # and archive the later rows (nothing is deleted without a copy) so the
+    # unique index can be built.
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS bookings_duplicates AS
+        SELECT *, '' AS archived_at FROM bookings WHERE 0
+    """)
+    cursor.execute("""
+        INSERT INTO bookings_duplicates
+        SELECT b.*, datetime('now') FROM bookings b
+        WHERE EXISTS (
+            SELECT 1 FROM bookings first
+            WHERE first.showtime_id = b.showtime_id AND first.seat_id = b.seat_id AND first.id < b.id
+        )
+    """)
+    cursor.execute("DELETE FROM bookings WHERE id IN (SELECT id FROM bookings_duplicates)")
+
+    cursor.execute("DROP INDEX IF EXISTS idx_bookings_showtime_seat")
+    cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS uq_bookings_showtime_seat ON bookings (showtime_id, seat_id)")
+
+
+def _004_seat_holds(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS seat_holds (
+            showtime_id INTEGER NOT NULL,
+            seat_id INTEGER NOT NULL,
+            hold_token TEXT NOT NULL,
+            staff_id INTEGER,
+            expires_at REAL NOT NULL,
+            PRIMARY KEY (showtime_id, seat_id)
+        ) WITHOUT ROWID
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_seat_holds_token ON seat_holds (hold_token)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_seat_holds_expiry ON seat_holds (expires_at)")
+
+
+def _005_pricing_rules(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS seat_type_pricing (
+            seat_type TEXT PRIMARY KEY,
+            multiplier REAL NOT NULL
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS discount_rules (
+            code TEXT PRIMARY KEY,
+            description TEXT,
+            multiplier REAL NOT NULL,
+            min_seats INTEGER,
+            minutes_before INTEGER,
+            max_occupancy REAL,
+            active INTEGER NOT NULL DEFAULT 1
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS pricing_version (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            version INTEGER NOT NULL
+        )
+    """)
+    cursor.execute("INSERT OR IGNORE INTO pricing_version (id, version) VALUES (1, 1)")
+
+    # Former hard-coded grid; '*' is the default for cities without their own rows
+    cursor.execute("""
+        DELETE FROM pricing WHERE id NOT IN (SELECT MIN(id) FROM pricing GROUP BY city, time_slot)
+    """)
+    cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS uq_pricing_city_slot ON pricing (city, time_slot)")
+    grid = {
+        "Birmingham": [5, 6, 7],
+        "Bristol": [6, 7, 8],
+        "Cardiff": [5, 6, 7],
+        "London": [10, 11, 12],
+        "*": [6, 7, 8],
+    }
+    cursor.executemany(
+        "INSERT OR IGNORE INTO pricing (city, time_slot, lower_hall_price) VALUES (?, ?, ?)",
+        [(city, slot, price) for city, prices in grid.items()
+         for slot, price in zip(("morning", "afternoon", "evening"), prices)]
+    )
+    cursor.executemany(
+        "INSERT OR IGNORE INTO seat_type_pricing (seat_type, multiplier) VALUES (?, ?)",
+        [("Lower Hall", 1.0), ("Upper Gallery", 1.2), ("VIP", 1.44)]
+    )
+    cursor.executemany("""
+        INSERT OR IGNORE INTO discount_rules (code, description, multiplier, min_seats, minutes_before, max_occupancy)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """, [
+        ("family", "20% off baskets of 4 or more seats", 0.80, 4, None, None),
+        ("last_minute", "25% off within 30 minutes of start while under 70% full", 0.75, None, 30, 0.7),
+    ])
+
+    for table in ("pricing", "seat_type_pricing", "discount_rules"):
+        for event in ("INSERT", "UPDATE", "DELETE"):
+            cursor.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS trg_{table}_{event.lower()}_version
+                AFTER {event} ON {table}
+                BEGIN
+                    UPDATE pricing_version SET version = version + 1 WHERE id = 1;
+                END
+            """)
+
+
+def _006_email_outbox(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS email_outbox (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            kind TEXT NOT NULL,
+            recipient TEXT NOT NULL,
+            subject TEXT NOT NULL,
+            body TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'pending',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            next_attempt_at REAL,
+            last_error TEXT,
+            created_at REAL NOT NULL,
+            sent_at REAL
+        )
+    """)
+    # Workers poll for due work; sent and dead rows drop out of the index
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_email_outbox_due ON email_outbox (next_attempt_at)
+        WHERE status IN ('pending', 'sending')
+    """)
+
+
+def _007_seat_geometry(cursor):
+    def label(index):
+        # 0 -> 'A', 25 -> 'Z', 26 -> 'AA'
+        text = ""
+        index += 1
+        while index:
+            index, remainder = divmod(index - 1, 26)
+            text = chr(ord("A") + remainder) + text
+        return text
+
+    def geometry(seat_types, seats_per_row=10):
+        # Rows of 10, and every seat type section starts a new row
+        placed, row, col, previous = [], -1, seats_per_row, None
+        for seat_type in seat_types:
+            if col >= seats_per_row or seat_type != previous:
+                row, col = row + 1, 0
+            col += 1
+            previous = seat_type
+            placed.append((label(row), col))
+        return placed
+
+    columns = {row[1] for row in cursor.execute("PRAGMA table_info(seats)")}
+    if "row_label" not in columns:
+        cursor.execute("ALTER TABLE seats ADD COLUMN row_label TEXT")
+    if "col_number" not in columns:
+        cursor.execute("ALTER TABLE seats ADD COLUMN col_number INTEGER")
+
+    # Lay existing screens out the same way new ones are generated
+    cursor.execute("SELECT id, screen_id, seat_type FROM seats ORDER BY screen_id, seat_number, id")
+    by_screen = {}
+    for seat_id, screen_id, seat_type in cursor.fetchall():
+        by_screen.setdefault(screen_id, []).append((seat_id, seat_type))
+    cursor.executemany("UPDATE seats SET row_label = ?, col_number = ? WHERE id = ?", [
+        (label, col, seat_id)
+        for seats in by_screen.values()
+        for (seat_id, _), (label, col) in zip(seats, geometry([seat_type for _, seat_type in seats]))
+    ])
+
+
+def _008_user_revocations(cursor):
+    # Users whose outstanding JWT role claims must no longer be trusted
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS user_revocations (
+            user_id INTEGER PRIMARY KEY,
+            revoked_at INTEGER NOT NULL
+        )
+    """)
+
+
+def _009_reporting_tables(cursor):
+    for table, keys in (("report_film_sales", "film_id INTEGER NOT NULL"),
+                        ("report_daily_cinema_sales", "day TEXT NOT NULL, cinema_id INTEGER NOT NULL"),
+                        ("report_daily_staff_sales", "day TEXT NOT NULL, staff_id INTEGER NOT NULL")):
+        cursor.execute(f"""
+            CREATE TABLE IF NOT EXISTS {table} (
+                {keys}, bookings INTEGER NOT NULL, revenue REAL NOT NULL,
+                PRIMARY KEY ({", ".join(key.split()[0] for key in keys.split(", "))})
+            ) WITHOUT ROWID
+        """)
+
+    film = "COALESCE((SELECT film_id FROM showtimes WHERE id = {row}.showtime_id), 0)"
+    cinema = "COALESCE((SELECT cinema_id FROM showtimes WHERE id = {row}.showtime_id), 0)"
+    day = "COALESCE(DATE({row}.booking_date), '')"
+    staff = "COALESCE({row}.booking_staff_id, 0)"
+
+    def add(row):
+        return f"""
+            INSERT INTO report_film_sales (film_id, bookings, revenue)
+            SELECT {film}, 1, COALESCE({row}.total_price, 0) WHERE 1
+            ON CONFLICT (film_id) DO UPDATE SET bookings = bookings + 1, revenue = revenue + excluded.revenue;
+            INSERT INTO report_daily_cinema_sales (day, cinema_id, bookings, revenue)
+            SELECT {day}, {cinema}, 1, COALESCE({row}.total_price, 0) WHERE 1
+            ON CONFLICT (day, cinema_id) DO UPDATE SET bookings = bookings + 1, revenue = revenue + excluded.revenue;
+            INSERT INTO report_daily_staff_sales (day, staff_id, bookings, revenue)
+            SELECT {day}, {staff}, 1, COALESCE({row}.total_price, 0) WHERE 1
+            ON CONFLICT (day, staff_id) DO UPDATE SET bookings = bookings + 1, revenue = revenue + excluded.revenue;
+        """.format(row=row)
+
+    def remove(row):
+        return f"""
+            UPDATE report_film_sales SET bookings = bookings - 1, revenue = revenue - COALESCE({row}.total_price, 0)
+            WHERE film_id = {film};
+            DELETE FROM report_film_sales WHERE film_id = {film} AND bookings <= 0;
+            UPDATE report_daily_cinema_sales SET bookings = bookings - 1, revenue = revenue - COALESCE({row}.total_price, 0)
+            WHERE day = {day} AND cinema_id = {cinema};
+            DELETE FROM report_daily_cinema_sales WHERE day = {day} AND cinema_id = {cinema} AND bookings <= 0;
+            UPDATE report_daily_staff_sales SET bookings = bookings - 1, revenue = revenue - COALESCE({row}.total_price, 0)
+            WHERE day = {day} AND staff_id = {staff};
+            DELETE FROM report_daily_staff_sales WHERE day = {day} AND staff_id = {staff} AND bookings <= 0;
+        """.format(row=row)
+
+    for name, event, body in (
+        ("insert", "AFTER INSERT ON bookings", add("NEW")),
+        ("delete", "AFTER DELETE ON bookings", remove("OLD")),
+        ("update", "AFTER UPDATE OF showtime_id, booking_date, total_price, booking_staff_id ON bookings",
+         remove("OLD") + add("NEW")),
+    ):
+        cursor.execute(f"CREATE TRIGGER IF NOT EXISTS trg_bookings_report_{name} {event} BEGIN {body} END")
+
+    totals = "COUNT(*), SUM(COALESCE(b.total_price, 0)) FROM bookings b LEFT JOIN showtimes st ON st.id = b.showtime_id"
+    cursor.execute("DELETE FROM report_film_sales")
+    cursor.execute(f"INSERT INTO report_film_sales SELECT COALESCE(st.film_id, 0), {totals} GROUP BY 1")
+    cursor.execute("DELETE FROM report_daily_cinema_sales")
+    cursor.execute(f"""
+        INSERT INTO report_daily_cinema_sales
+        SELECT COALESCE(DATE(b.booking_date), ''), COALESCE(st.cinema_id, 0), {totals} GROUP BY 1, 2
+    """)
+    cursor.execute("DELETE FROM report_daily_staff_sales")
+    cursor.execute(f"""
+        INSERT INTO report_daily_staff_sales
+        SELECT COALESCE(DATE(b.booking_date), ''), COALESCE(b.booking_staff_id, 0), {totals} GROUP BY 1, 2
+    """)
+
+
+def _010_daily_film_sales(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS report_daily_film_sales (
+            day TEXT NOT NULL, film_id INTEGER NOT NULL, bookings INTEGER NOT NULL, revenue REAL NOT NULL,
+            PRIMARY KEY (day, film_id)
+        ) WITHOUT ROWID
+    """)
+
+    # Its own triggers, alongside the ones from 9 (17 replaces both sets)
+    day = "COALESCE(DATE({row}.booking_date), '')"
+    film = "COALESCE((SELECT film_id FROM showtimes WHERE id = {row}.showtime_id), 0)"
+    add = f"""
+        INSERT INTO report_daily_film_sales (day, film_id, bookings, revenue)
+        SELECT {day}, {film}, 1, COALESCE({{row}}.total_price, 0) WHERE 1
+        ON CONFLICT (day, film_id) DO UPDATE SET bookings = bookings + 1, revenue = revenue + excluded.revenue;
+    """
+    remove = f"""
+        UPDATE report_daily_film_sales SET bookings = bookings - 1, revenue = revenue - COALESCE({{row}}.total_price, 0)
+        WHERE day = {day} AND film_id = {film};
+        DELETE FROM report_daily_film_sales WHERE day = {day} AND film_id = {film} AND bookings <= 0;
+    """
+    for name, event, body in (
+        ("insert", "AFTER INSERT ON bookings", add.format(row="NEW")),
+        ("delete", "AFTER DELETE ON bookings", remove.format(row="OLD")),
+        ("update", "AFTER UPDATE OF showtime_id, booking_date, total_price ON bookings",
+         remove.format(row="OLD") + add.format(row="NEW")),
+    ):
+        cursor.execute(f"CREATE TRIGGER IF NOT EXISTS trg_bookings_report_film_{name} {event} BEGIN {body} END")
+
+    cursor.execute("DELETE FROM report_daily_film_sales")
+    cursor.execute("""
+        INSERT INTO report_daily_film_sales
+        SELECT COALESCE(DATE(b.booking_date), ''), COALESCE(st.film_id, 0), COUNT(*), SUM(COALESCE(b.total_price, 0))
+        FROM bookings b LEFT JOIN showtimes st ON st.id = b.showtime_id
+        GROUP BY 1, 2
+    """)
+
+
+# Seats on the screen of showtimes row {st}, and the showtimes on the screen of seats row {row}
+_011_CAPACITY = """(
+    SELECT COUNT(*) FROM seats WHERE screen_id = (
+        SELECT id FROM screens WHERE cinema_id = {st}.cinema_id AND screen_number = {st}.screen_number
+        ORDER BY id LIMIT 1
+    )
+)"""
+_011_SHOWTIMES_ON_SCREEN = """(
+    SELECT st.id FROM screens sc
+    JOIN showtimes st ON st.cinema_id = sc.cinema_id AND st.screen_number = sc.screen_number
+    WHERE sc.id = {row}.screen_id
+)"""
+
+
+def _011_showtime_occupancy(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS showtime_occupancy (
+            showtime_id INTEGER PRIMARY KEY,
+            capacity INTEGER NOT NULL,
+            booked INTEGER NOT NULL
+        )
+    """)
+
+    triggers = {
+        "trg_bookings_occupancy_insert": ("AFTER INSERT ON bookings", """
+            UPDATE showtime_occupancy SET booked = booked + 1 WHERE showtime_id = NEW.showtime_id;
+        """),
+        "trg_bookings_occupancy_delete": ("AFTER DELETE ON bookings", """
+            UPDATE showtime_occupancy SET booked = booked - 1 WHERE showtime_id = OLD.showtime_id;
+        """),
+        "trg_bookings_occupancy_update": ("AFTER UPDATE OF showtime_id ON bookings", """
+            UPDATE showtime_occupancy SET booked = booked - 1 WHERE showtime_id = OLD.showtime_id;
+            UPDATE showtime_occupancy SET booked = booked + 1 WHERE showtime_id = NEW.showtime_id;
+        """),
+        "trg_showtimes_occupancy_insert": ("AFTER INSERT ON showtimes", f"""
+            INSERT OR REPLACE INTO showtime_occupancy (showtime_id, capacity, booked)
+            VALUES (NEW.id, {_011_CAPACITY.format(st="NEW")},
+                    (SELECT COUNT(*) FROM bookings WHERE showtime_id = NEW.id));
+        """),
+        "trg_showtimes_occupancy_update": ("AFTER UPDATE OF cinema_id, screen_number ON showtimes", f"""
+            UPDATE showtime_occupancy SET capacity = {_011_CAPACITY.format(st="NEW")} WHERE showtime_id = NEW.id;
+        """),
+        "trg_showtimes_occupancy_delete": ("AFTER DELETE ON showtimes", """
+            DELETE FROM showtime_occupancy WHERE showtime_id = OLD.id;
+        """),
+        "trg_seats_occupancy_insert": ("AFTER INSERT ON seats", f"""
+            UPDATE showtime_occupancy SET capacity = capacity + 1
+            WHERE showtime_id IN {_011_SHOWTIMES_ON_SCREEN.format(row="NEW")};
+        """),
+        "trg_seats_occupancy_delete": ("AFTER DELETE ON seats", f"""
+            UPDATE showtime_occupancy SET capacity = capacity - 1
+            WHERE showtime_id IN {_011_SHOWTIMES_ON_SCREEN.format(row="OLD")};
+        """),
+    }
+    for name, (event, body) in triggers.items():
+        cursor.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {event} BEGIN {body} END")
+
+    cursor.execute("DELETE FROM showtime_occupancy")
+    cursor.execute(f"""
+        INSERT INTO showtime_occupancy (showtime_id, capacity, booked)
+        SELECT st.id, {_011_CAPACITY.format(st="st")}, (SELECT COUNT(*) FROM bookings b WHERE b.showtime_id = st.id)
+        FROM showtimes st
+    """)
+
+
+def _012_seat_bitmaps(cursor):
+    from database.occupancy import _rebuild, create_occupancy_triggers
+
+    columns = {row[1] for row in cursor.execute("PRAGMA table_info(showtime_occupancy)")}
+    for column in ("bits_lo", "bits_hi"):
+        if column not in columns:
+            cursor.execute(f"ALTER TABLE showtime_occupancy ADD COLUMN {column} INTEGER NOT NULL DEFAULT 0")
+
+    # The bookings and showtime-insert triggers now also maintain the bitmaps
+    create_occupancy_triggers(cursor)
+    _rebuild(cursor)
+
+
+def _013_cancellation_audit(cursor):
+    # Bookings are deleted on refund, so the audit row keeps what was refunded
+    columns = {row[1] for row in cursor.execute("PRAGMA table_info(cancellations)")}
+    for column, kind in (("booking_reference", "TEXT"), ("showtime_id", "INTEGER"), ("seat_id", "INTEGER"),
+                         ("customer_email", "TEXT"), ("original_price", "REAL"), ("reason", "TEXT"),
+                         ("staff_id", "INTEGER")):
+        if column not in columns:
+            cursor.execute(f"ALTER TABLE cancellations ADD COLUMN {column} {kind}")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_cancellations_reference ON cancellations (booking_reference)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_cancellations_showtime ON cancellations (showtime_id)")
+
+
+def _014_customer_lookup_indexes(cursor):
+    # Refund search by normalised email, name prefix and phone prefix (moved to booking_orders in 15)
+    phone = "customer_phone"
+    for char in " -.()+":
+        phone = f"replace({phone}, '{char}', '')"
+    for name, key in (("email", "lower(trim(customer_email))"), ("name", "lower(trim(customer_name))"),
+                      ("phone", phone)):
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_bookings_{name}_key ON bookings ({key}, booking_reference)")
+
+
+def _015_booking_orders(cursor):
+    from database.booking_orders import convert_bookings, create_order_tables, create_order_triggers
+    from database.customer_lookup import create_lookup_indexes
+
+    for name in ("email", "name", "phone"):
+        cursor.execute(f"DROP INDEX IF EXISTS idx_bookings_{name}_key")
+
+    create_order_tables(cursor)
+    convert_bookings(cursor)
+    create_order_triggers(cursor)
+    create_lookup_indexes(cursor)
+
+
+def _016_booking_reference_sequence(cursor):
+    from database.booking_references import create_reference_sequence
+
+    create_reference_sequence(cursor)
+
+
+def _017_report_order_headers(cursor):
+    from database.reporting import create_reporting_schema, _rebuild
+
+    # One trigger set for all four summaries, reading the day and staff member from the order header
+    for event in ("insert", "delete", "update"):
+        cursor.execute(f"DROP TRIGGER IF EXISTS trg_bookings_report_{event}")
+        cursor.execute(f"DROP TRIGGER IF EXISTS trg_bookings_report_film_{event}")
+    create_reporting_schema(cursor)
+    _rebuild(cursor)
+
+
+def _018_duplicates_match_bookings(cursor):
+    # Migration 3 archives with SELECT b.*, so keep the archive's columns in
+    # step with bookings (order_id arrived in 15), archived_at last
+    bookings = [row[1] for row in cursor.execute("PRAGMA table_info(bookings)")]
+    archived = [row[1] for row in cursor.execute("PRAGMA table_info(bookings_duplicates)")]
+    if archived == bookings + ["archived_at"]:
+        return
+    cursor.execute("""
+        CREATE TABLE bookings_duplicates_new AS
+        SELECT *, '' AS archived_at FROM bookings WHERE 0
+    """)
+    kept = ", ".join(column for column in bookings + ["archived_at"] if column in archived)
+    cursor.execute(f"INSERT INTO bookings_duplicates_new ({kept}) SELECT {kept} FROM bookings_duplicates")
+    cursor.execute("DROP TABLE bookings_duplicates")
+    cursor.execute("ALTER TABLE bookings_duplicates_new RENAME TO bookings_duplicates")
+
+
+def _019_drop_line_header_indexes(cursor):
+    # Lines written since 15 leave these columns NULL and every lookup reads
+    # booking_orders, so the indexes only cost writes
+    cursor.execute("DROP INDEX IF EXISTS idx_bookings_reference")
+    cursor.execute("DROP INDEX IF EXISTS idx_bookings_email")
+
+
+MIGRATIONS = [
+    (1, "hot query indexes", _001_hot_query_indexes),
+    (2, "showtime date/epoch columns", _002_showtime_date_columns),
+    (3, "unique seat per showtime", _003_unique_showtime_seat),
+    (4, "seat holds", _004_seat_holds),
+    (5, "pricing rules", _005_pricing_rules),
+    (6, "email outbox", _006_email_outbox),
+    (7, "seat row/column geometry", _007_seat_geometry),
+    (8, "user revocations", _008_user_revocations),
+    (9, "materialised report tables", _009_reporting_tables),
+    (10, "daily film sales report table", _010_daily_film_sales),
+    (11, "showtime occupancy counters", _011_showtime_occupancy),
+    (12, "booked seat bitmaps", _012_seat_bitmaps),
+    (13, "cancellation audit columns", _013_cancellation_audit),
+    (14, "customer lookup indexes", _014_customer_lookup_indexes),
+    (15, "booking order headers", _015_booking_orders),
+    (16, "booking reference sequence", _016_booking_reference_sequence),
+    (17, "report triggers read order headers", _017_report_order_headers),
+    (18, "duplicate archive matches bookings", _018_duplicates_match_bookings),
+    (19, "drop line-level reference and email indexes", _019_drop_line_header_indexes),
+]
+
+
+def _ensure_migrations_table(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            applied_at TEXT NOT NULL
+        )
+    """)
+    conn.commit()
+
+
+def applied_versions(conn):
+    _ensure_migrations_table(conn)
+    return {row[0] for row in conn.execute("SELECT version FROM schema_migrations")}
+
+
+def migrate(conn, target=None):
+    """Apply every pending migration up to ``target`` and return their versions."""
+    applied = []
+    done = applied_versions(conn)
+
+    for version, name, upgrade in MIGRATIONS:
+        if version in done or (target is not None and version > target):
+            continue
+
+        cursor = conn.cursor()
+        cursor.execute("BEGIN IMMEDIATE")
+        try:
+            # Another worker may have applied it while we waited for the lock
+            cursor.execute("SELECT 1 FROM schema_migrations WHERE version = ?", (version,))
+            if cursor.fetchone():
+                conn.rollback()
+                continue
+
+            upgrade(cursor)
+            cursor.execute(
+                "INSERT INTO schema_migrations (version, name, applied_at) VALUES (?, ?, ?)",
+                (version, name, datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+            )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        applied.append(version)
+
+    return applied
+
+
+if __name__ == "__main__":
+    import os
+    import sys
+
+    sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+    from database.database_setup import get_db_path
+
+    parser = argparse.ArgumentParser(description="Apply pending schema migrations.")
+    parser.add_argument("--testing", action="store_true", help="migrate the test database")
+    parser.add_argument("--db", help="path to a database file (overrides --testing)")
+    args = parser.parse_args()
+
+    db_path = args.db or get_db_path(args.testing)
+    conn = sqlite3.connect(db_path)
+    versions = migrate(conn)
+    conn.close()
+    print(f"✅ Applied migrations {versions} to {db_path}" if versions else f"✅ {db_path} is up to date")
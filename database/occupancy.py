@@ -0,0 +1,237 @@
+"""Per-showtime booked/capacity counters and booked-seat bitmaps.
+
+``showtime_occupancy`` holds one row per showtime: ``capacity`` is the
+number of seats on the showtime's screen, ``booked`` the number of
+bookings for it, and ``bits_lo``/``bits_hi`` a bitmap of the booked seat
+numbers (bit ``n - 1`` of the 128-bit value for seat ``n``, see
+``database.seat_bitmap``). Triggers on ``bookings``, ``showtimes`` and
+``seats`` keep all of it current inside the writing transaction, so
+booking, refunds and screen resizes update it atomically and occupancy or
+availability is a primary-key lookup.
+
+Changes the triggers do not follow (screens renumbered or deleted, bulk
+loads with triggers dropped) can leave counters stale; ``check_occupancy``
+finds them and ``rebuild_occupancy`` recomputes everything:
+
+    python -m database.occupancy check|rebuild [--testing | --db PATH]
+
+Inside the app, ``OccupancyReconciler`` runs the check every
+``OCCUPANCY_RECONCILE_INTERVAL`` seconds and repairs any drift it finds.
+"""
+import argparse
+import logging
+import sqlite3
+import threading
+
+from database.database_setup import run_write_transaction
+
+# Seats on the screen a showtime plays on, for a showtimes row aliased {st}
+_CAPACITY = """(
+    SELECT COUNT(*) FROM seats WHERE screen_id = (
+        SELECT id FROM screens WHERE cinema_id = {st}.cinema_id AND screen_number = {st}.screen_number
+        ORDER BY id LIMIT 1
+    )
+)"""
+
+# Showtimes playing on the screen of seat row {row}
+_SHOWTIMES_ON_SCREEN = """(
+    SELECT st.id FROM screens sc
+    JOIN showtimes st ON st.cinema_id = sc.cinema_id AND st.screen_number = sc.screen_number
+    WHERE sc.id = {row}.screen_id
+)"""
+
+# Bitmap halves for the seat booked by bookings row {row}: seats 1-64 and 65-128
+_SEAT_NUMBER = "(SELECT seat_number FROM seats WHERE id = {row}.seat_id)"
+_BIT_LO = "(CASE WHEN {n} BETWEEN 1 AND 64 THEN 1 << ({n} - 1) ELSE 0 END)"
+_BIT_HI = "(CASE WHEN {n} BETWEEN 65 AND 128 THEN 1 << ({n} - 65) ELSE 0 END)"
+
+
+def _bits(row):
+    n = _SEAT_NUMBER.format(row=row)
+    return _BIT_LO.format(n=n), _BIT_HI.format(n=n)
+
+
+def _add(row):
+    lo, hi = _bits(row)
+    return f"""
+        UPDATE showtime_occupancy SET booked = booked + 1, bits_lo = bits_lo | {lo}, bits_hi = bits_hi | {hi}
+        WHERE showtime_id = {row}.showtime_id;
+    """
+
+
+def _remove(row):
+    lo, hi = _bits(row)
+    return f"""
+        UPDATE showtime_occupancy SET booked = booked - 1, bits_lo = bits_lo & ~{lo}, bits_hi = bits_hi & ~{hi}
+        WHERE showtime_id = {row}.showtime_id;
+    """
+
+
+# Distinct single-bit masks sum to their OR (SQLite has no bitwise aggregate)
+_EXPECTED = f"""
+    SELECT st.id AS showtime_id, {_CAPACITY.format(st="st")} AS capacity,
+           (SELECT COUNT(*) FROM bookings b WHERE b.showtime_id = st.id) AS booked,
+           (SELECT COALESCE(SUM(DISTINCT {_BIT_LO.format(n="s.seat_number")}), 0)
+            FROM bookings b JOIN seats s ON s.id = b.seat_id WHERE b.showtime_id = st.id) AS bits_lo,
+           (SELECT COALESCE(SUM(DISTINCT {_BIT_HI.format(n="s.seat_number")}), 0)
+            FROM bookings b JOIN seats s ON s.id = b.seat_id WHERE b.showtime_id = st.id) AS bits_hi
+    FROM showtimes st
+"""
+
+TRIGGERS = (
+    "trg_bookings_occupancy_insert", "trg_bookings_occupancy_delete", "trg_bookings_occupancy_update",
+    "trg_showtimes_occupancy_insert", "trg_showtimes_occupancy_update", "trg_showtimes_occupancy_delete",
+    "trg_seats_occupancy_insert", "trg_seats_occupancy_delete",
+)
+
+
+def create_occupancy_triggers(cursor):
+    """(Re)create every trigger in ``TRIGGERS``; migrations call this after changing them."""
+    triggers = {
+        "trg_bookings_occupancy_insert": ("AFTER INSERT ON bookings", _add("NEW")),
+        "trg_bookings_occupancy_delete": ("AFTER DELETE ON bookings", _remove("OLD")),
+        "trg_bookings_occupancy_update": ("AFTER UPDATE OF showtime_id, seat_id ON bookings",
+                                          _remove("OLD") + _add("NEW")),
+        "trg_showtimes_occupancy_insert": ("AFTER INSERT ON showtimes", f"""
+            INSERT OR REPLACE INTO showtime_occupancy (showtime_id, capacity, booked, bits_lo, bits_hi)
+            SELECT showtime_id, capacity, booked, bits_lo, bits_hi FROM ({_EXPECTED}) WHERE showtime_id = NEW.id;
+        """),
+        "trg_showtimes_occupancy_update": ("AFTER UPDATE OF cinema_id, screen_number ON showtimes", f"""
+            UPDATE showtime_occupancy SET capacity = {_CAPACITY.format(st="NEW")} WHERE showtime_id = NEW.id;
+        """),
+        "trg_showtimes_occupancy_delete": ("AFTER DELETE ON showtimes", """
+            DELETE FROM showtime_occupancy WHERE showtime_id = OLD.id;
+        """),
+        "trg_seats_occupancy_insert": ("AFTER INSERT ON seats", f"""
+            UPDATE showtime_occupancy SET capacity = capacity + 1
+            WHERE showtime_id IN {_SHOWTIMES_ON_SCREEN.format(row="NEW")};
+        """),
+        "trg_seats_occupancy_delete": ("AFTER DELETE ON seats", f"""
+            UPDATE showtime_occupancy SET capacity = capacity - 1
+            WHERE showtime_id IN {_SHOWTIMES_ON_SCREEN.format(row="OLD")};
+        """),
+    }
+    for name, (event, body) in triggers.items():
+        cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+        cursor.execute(f"CREATE TRIGGER {name} {event} BEGIN {body} END")
+
+
+def _rebuild(cursor):
+    cursor.execute("DELETE FROM showtime_occupancy")
+    cursor.execute(f"INSERT INTO showtime_occupancy (showtime_id, capacity, booked, bits_lo, bits_hi) {_EXPECTED}")
+    return cursor.execute("SELECT COUNT(*) FROM showtime_occupancy").fetchone()[0]
+
+
+def rebuild_occupancy(conn):
+    """Recompute every counter from ``seats`` and ``bookings``; returns the number of showtimes."""
+    return run_write_transaction(conn, _rebuild)
+
+
+def check_occupancy(conn):
+    """Showtimes whose counters have drifted, as ``(showtime_id, stored, expected)``.
+
+    ``stored`` and ``expected`` are ``(capacity, booked, bits_lo, bits_hi)``
+    tuples; a missing counter row (or showtime) is reported as ``None``.
+    """
+    rows = conn.execute(f"""
+        SELECT e.showtime_id, o.capacity, o.booked, o.bits_lo, o.bits_hi,
+               e.capacity, e.booked, e.bits_lo, e.bits_hi
+        FROM ({_EXPECTED}) e
+        LEFT JOIN showtime_occupancy o ON o.showtime_id = e.showtime_id
+        WHERE o.showtime_id IS NULL OR (o.capacity, o.booked, o.bits_lo, o.bits_hi)
+                                       != (e.capacity, e.booked, e.bits_lo, e.bits_hi)
+        UNION ALL
+        SELECT o.showtime_id, o.capacity, o.booked, o.bits_lo, o.bits_hi, NULL, NULL, NULL, NULL
+        FROM showtime_occupancy o
+        WHERE NOT EXISTS (SELECT 1 FROM showtimes WHERE id = o.showtime_id)
+    """).fetchall()
+    return [
+        (row[0], None if row[1] is None else tuple(row[1:5]), None if row[5] is None else tuple(row[5:9]))
+        for row in rows
+    ]
+
+
+def get_occupancy(cursor, showtime_id):
+    """``(booked, capacity)`` for a showtime, or ``None`` if it has no counter row."""
+    cursor.execute("SELECT booked, capacity FROM showtime_occupancy WHERE showtime_id = ?", (showtime_id,))
+    row = cursor.fetchone()
+    return (row[0], row[1]) if row else None
+
+
+def occupancy_ratio(booked, capacity):
+    """Share of the screen that is booked; a screen without seats counts as full."""
+    return booked / capacity if capacity else 1
+
+
+class OccupancyReconciler(threading.Thread):
+    """Background thread that checks the counters every ``interval`` seconds and repairs drift."""
+
+    def __init__(self, db_path, interval=3600.0):
+        super().__init__(name="occupancy-reconciler", daemon=True)
+        self.db_path = db_path
+        self.interval = interval
+        self._stop_event = threading.Event()
+
+    def reconcile(self):
+        from database.database_setup import get_pool
+
+        conn = get_pool(self.db_path).connection()
+        try:
+            drift = check_occupancy(conn)
+            if drift:
+                logging.warning(f"Occupancy counters drifted for {len(drift)} showtimes, e.g. {drift[:3]}; rebuilding")
+                rebuild_occupancy(conn)
+            return drift
+        finally:
+            conn.close()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            try:
+                self.reconcile()
+            except sqlite3.Error as e:
+                logging.warning(f"Occupancy reconciliation failed: {e}")
+
+    def stop(self):
+        self._stop_event.set()
+
+
+def init_app(app):
+    interval = app.config.get("OCCUPANCY_RECONCILE_INTERVAL", 0)
+    if interval:
+        from database.database_setup import get_db_path, owns_background_jobs
+
+        with app.app_context():
+            db_path = get_db_path()
+            if not owns_background_jobs(db_path):
+                return
+        app.extensions["occupancy_reconciler"] = reconciler = OccupancyReconciler(db_path, interval)
+        reconciler.start()
+
+
+if __name__ == "__main__":
+    import os
+    import sys
+
+    sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+    from database.database_setup import get_db_path
+
+    parser = argparse.ArgumentParser(description="Verify or rebuild the per-showtime occupancy counters.")
+    parser.add_argument("command", choices=["check", "rebuild"])
+    parser.add_argument("--testing", action="store_true", help="use the test database")
+    parser.add_argument("--db", help="path to a database file (overrides --testing)")
+    args = parser.parse_args()
+
+    db_path = args.db or get_db_path(args.testing)
+    conn = sqlite3.connect(db_path)
+    drift = []
+    if args.command == "rebuild":
+        print(f"✅ Rebuilt occupancy counters for {rebuild_occupancy(conn)} showtimes")
+    else:
+        drift = check_occupancy(conn)
+        for showtime_id, stored, expected in drift:
+            print(f"❌ showtime {showtime_id}: stored (capacity, booked, bits) {stored}, expected {expected}")
+        if not drift:
+            print(f"✅ Occupancy counters and seat bitmaps match seats and bookings in {db_path}")
+    conn.close()
+    sys.exit(1 if drift else 0)
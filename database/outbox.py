@@ -0,0 +1,222 @@
+"""Durable outbound email queue.
+
+Confirmation emails are written to ``email_outbox`` inside the same
+transaction as the booking or refund that triggers them, so the request
+never waits on SMTP and a committed sale always has its email queued.
+``OutboxWorker`` threads claim due rows in batches, send each batch over a
+single SMTP connection, then mark rows ``sent``, reschedule them with
+exponential backoff, or park them as ``dead`` after ``max_attempts``.
+
+A claimed row is leased rather than locked: if a worker dies mid-send the
+lease expires and another worker picks the row up again.
+"""
+import logging
+import sqlite3
+import threading
+import time
+
+from database.database_setup import get_db_path, get_pool, owns_background_jobs, run_write_transaction
+
+STATUS_PENDING = "pending"
+STATUS_SENDING = "sending"
+STATUS_SENT = "sent"
+STATUS_DEAD = "dead"
+
+DEFAULT_BATCH_SIZE = 20
+DEFAULT_MAX_ATTEMPTS = 5
+DEFAULT_LEASE = 120
+
+_wakeup = threading.Event()
+
+
+def enqueue_email(cursor, recipient, subject, body, kind="generic", now=None):
+    """Queue a message on the caller's transaction; returns the outbox id."""
+    now = now or time.time()
+    cursor.execute("""
+        INSERT INTO email_outbox (kind, recipient, subject, body, status, attempts, next_attempt_at, created_at)
+        VALUES (?, ?, ?, ?, ?, 0, ?, ?)
+    """, (kind, recipient, subject, body, STATUS_PENDING, now, now))
+    return cursor.lastrowid
+
+
+def enqueue_emails(cursor, messages, kind="generic", now=None):
+    """Queue ``(recipient, subject, body)`` messages with one batched insert; returns how many."""
+    now = now or time.time()
+    rows = [(kind, recipient, subject, body, STATUS_PENDING, now, now) for recipient, subject, body in messages]
+    cursor.executemany("""
+        INSERT INTO email_outbox (kind, recipient, subject, body, status, attempts, next_attempt_at, created_at)
+        VALUES (?, ?, ?, ?, ?, 0, ?, ?)
+    """, rows)
+    return len(rows)
+
+
+def wake_workers():
+    """Nudge idle workers so a freshly committed message goes out without waiting a poll."""
+    _wakeup.set()
+
+
+def claim_batch(conn, limit=DEFAULT_BATCH_SIZE, lease=DEFAULT_LEASE, now=None):
+    """Lease up to ``limit`` due messages to the caller and return them oldest first."""
+    now = now or time.time()
+
+    def claim(cursor):
+        cursor.execute("""
+            UPDATE email_outbox
+            SET status = ?, attempts = attempts + 1, next_attempt_at = ?
+            WHERE id IN (
+                SELECT id FROM email_outbox
+                WHERE status IN ('pending', 'sending') AND next_attempt_at <= ?
+                ORDER BY next_attempt_at, id
+                LIMIT ?
+            )
+            RETURNING id, kind, recipient, subject, body, attempts
+        """, (STATUS_SENDING, now + lease, now, limit))
+        columns = [c[0] for c in cursor.description]
+        return sorted((dict(zip(columns, row)) for row in cursor.fetchall()), key=lambda row: row["id"])
+
+    return run_write_transaction(conn, claim)
+
+
+def retry_delay(attempts, base_delay=30.0, max_delay=3600.0):
+    return min(max_delay, base_delay * (2 ** (attempts - 1)))
+
+
+def record_results(conn, rows, failures, max_attempts=DEFAULT_MAX_ATTEMPTS,
+                   base_delay=30.0, max_delay=3600.0, now=None):
+    """Mark ``rows`` sent, except those in ``failures`` (id -> error) which are retried or dead-lettered."""
+    now = now or time.time()
+    sent = [(STATUS_SENT, now, row["id"]) for row in rows if row["id"] not in failures]
+    retried = []
+    for row in rows:
+        if row["id"] not in failures:
+            continue
+        if row["attempts"] >= max_attempts:
+            status, next_attempt_at = STATUS_DEAD, None
+        else:
+            status, next_attempt_at = STATUS_PENDING, now + retry_delay(row["attempts"], base_delay, max_delay)
+        retried.append((status, next_attempt_at, str(failures[row["id"]])[:500], row["id"]))
+
+    def record(cursor):
+        cursor.executemany("UPDATE email_outbox SET status = ?, sent_at = ?, last_error = NULL WHERE id = ?", sent)
+        cursor.executemany(
+            "UPDATE email_outbox SET status = ?, next_attempt_at = ?, last_error = ? WHERE id = ?", retried
+        )
+
+    run_write_transaction(conn, record)
+    return len(sent), len(retried)
+
+
+def drain(conn, send_batch, batch_size=DEFAULT_BATCH_SIZE, max_attempts=DEFAULT_MAX_ATTEMPTS,
+          base_delay=30.0, lease=DEFAULT_LEASE, now=None):
+    """Send one batch with ``send_batch(rows) -> {id: error}``; returns ``(sent, failed)``.
+
+    If ``send_batch`` raises (e.g. the SMTP server is unreachable) the
+    whole batch counts as failed.
+    """
+    rows = claim_batch(conn, batch_size, lease, now)
+    if not rows:
+        return 0, 0
+
+    try:
+        failures = send_batch(rows)
+    except Exception as e:
+        logging.warning(f"Outbox batch of {len(rows)} failed: {e}")
+        failures = {row["id"]: e for row in rows}
+
+    return record_results(conn, rows, failures, max_attempts, base_delay, now=now)
+
+
+def requeue_dead(conn, ids=None):
+    """Give dead-lettered messages a fresh set of attempts; returns the number requeued."""
+    def requeue(cursor):
+        sql = "UPDATE email_outbox SET status = ?, attempts = 0, next_attempt_at = ? WHERE status = ?"
+        params = [STATUS_PENDING, time.time(), STATUS_DEAD]
+        if ids is not None:
+            sql += f" AND id IN ({', '.join('?' for _ in ids)})"
+            params.extend(ids)
+        return cursor.execute(sql, params).rowcount
+
+    return run_write_transaction(conn, requeue)
+
+
+def outbox_stats(conn):
+    return dict(conn.execute("SELECT status, COUNT(*) FROM email_outbox GROUP BY status").fetchall())
+
+
+def flask_mail_sender(app):
+    """Build a ``send_batch`` that delivers a batch over one Flask-Mail SMTP connection."""
+    from flask_mail import Message
+
+    def send_batch(rows):
+        failures = {}
+        with app.app_context():
+            mail = app.extensions["mail"]
+            sender = app.config.get("MAIL_DEFAULT_SENDER") or app.config.get("MAIL_USERNAME")
+            with mail.connect() as smtp:
+                for row in rows:
+                    try:
+                        smtp.send(Message(subject=row["subject"], sender=sender,
+                                          recipients=[row["recipient"]], body=row["body"]))
+                    except Exception as e:
+                        failures[row["id"]] = e
+        return failures
+
+    return send_batch
+
+
+class OutboxWorker(threading.Thread):
+    """Background thread that drains the outbox every ``interval`` seconds, or when woken."""
+
+    def __init__(self, db_path, send_batch, interval=5.0, batch_size=DEFAULT_BATCH_SIZE,
+                 max_attempts=DEFAULT_MAX_ATTEMPTS, name="outbox-worker"):
+        super().__init__(name=name, daemon=True)
+        self.db_path = db_path
+        self.send_batch = send_batch
+        self.interval = interval
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            _wakeup.wait(self.interval)
+            _wakeup.clear()
+            if self._stop_event.is_set():
+                break
+
+            conn = get_pool(self.db_path).connection()
+            try:
+                # Keep going while batches come back full, then go back to sleep
+                while not self._stop_event.is_set():
+                    sent, failed = drain(conn, self.send_batch, self.batch_size, self.max_attempts)
+                    if sent or failed:
+                        logging.info(f"Outbox: sent {sent}, failed {failed}")
+                    if sent + failed < self.batch_size:
+                        break
+            except sqlite3.Error as e:
+                logging.warning(f"Outbox drain failed: {e}")
+            finally:
+                conn.close()
+
+    def stop(self):
+        self._stop_event.set()
+        _wakeup.set()
+
+
+def init_app(app):
+    interval = app.config.get("OUTBOX_POLL_INTERVAL", 5)
+    if interval:
+        with app.app_context():
+            db_path = get_db_path()
+            if not owns_background_jobs(db_path):
+                return
+        send_batch = flask_mail_sender(app)
+        app.extensions["outbox_workers"] = workers = [
+            OutboxWorker(db_path, send_batch, interval,
+                         batch_size=app.config.get("OUTBOX_BATCH_SIZE", DEFAULT_BATCH_SIZE),
+                         max_attempts=app.config.get("OUTBOX_MAX_ATTEMPTS", DEFAULT_MAX_ATTEMPTS),
+                         name=f"outbox-worker-{i}")
+            for i in range(app.config.get("OUTBOX_WORKERS", 2))
+        ]
+        for worker in workers:
+            worker.start()
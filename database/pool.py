@@ -0,0 +1,163 @@
+import os
+import sqlite3
+import threading
+import time
+
+
+class PoolTimeout(RuntimeError):
+    """Raised when no pooled connection frees up within the checkout timeout."""
+
+
+class PooledConnection:
+    """Thin handle around a pooled sqlite3 connection.
+
+    Behaves like the raw connection (``cursor()``, ``execute()``, ``commit()``,
+    ``with conn:`` transaction scoping) but ``close()`` hands the connection
+    back to its pool instead of tearing it down.
+    """
+
+    def __init__(self, pool, raw, bound=False):
+        self._pool = pool
+        self._raw = raw
+        # Handles bound to a Flask app context are released on teardown, so
+        # an early close() from route code must not return them to the pool.
+        self._bound = bound
+
+    @property
+    def raw(self):
+        if self._raw is None:
+            raise sqlite3.ProgrammingError("Cannot operate on a released connection.")
+        return self._raw
+
+    def __getattr__(self, name):
+        return getattr(self.raw, name)
+
+    def __enter__(self):
+        self.raw.__enter__()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return self.raw.__exit__(exc_type, exc, tb)
+
+    def close(self):
+        if not self._bound:
+            self.release()
+
+    def release(self):
+        raw, self._raw = self._raw, None
+        if raw is not None:
+            self._pool.release(raw)
+
+    def __del__(self):
+        try:
+            self.release()
+        except Exception:
+            pass
+
+
+class ConnectionPool:
+    """Bounded, thread-safe pool of SQLite connections for one database file.
+
+    Connections are created lazily up to ``max_size``, configured once with
+    ``pragmas`` and then reused across requests. When every connection is
+    checked out, callers wait up to ``timeout`` seconds for one to be released.
+    """
+
+    def __init__(self, db_path, max_size=5, timeout=10.0, pragmas=None):
+        self.db_path = db_path
+        self.max_size = max_size
+        self.timeout = timeout
+        self.pragmas = dict(pragmas or {})
+        self.pid = os.getpid()
+
+        self._idle = []
+        self._created = 0
+        self._in_use = 0
+        self._closed = False
+        self._cond = threading.Condition(threading.Lock())
+        self._stats = {"checkouts": 0, "waits": 0, "wait_time": 0.0, "timeouts": 0, "high_water": 0}
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        for name, value in self.pragmas.items():
+            conn.execute(f"PRAGMA {name} = {value}")
+        return conn
+
+    def acquire(self):
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Connection pool is closed.")
+
+            waited = False
+            started = time.monotonic()
+            while not self._idle and self._created >= self.max_size:
+                if not waited:
+                    waited = True
+                    self._stats["waits"] += 1
+                remaining = self.timeout - (time.monotonic() - started)
+                if remaining <= 0 or not self._cond.wait(remaining):
+                    self._stats["timeouts"] += 1
+                    raise PoolTimeout(f"No connection available for {self.db_path} after {self.timeout}s")
+            if waited:
+                self._stats["wait_time"] += time.monotonic() - started
+
+            conn = self._idle.pop() if self._idle else None
+            if conn is None:
+                # Reserve the slot before connecting outside the lock
+                self._created += 1
+            self._in_use += 1
+            self._stats["checkouts"] += 1
+            self._stats["high_water"] = max(self._stats["high_water"], self._in_use)
+
+        if conn is None:
+            try:
+                conn = self._connect()
+            except Exception:
+                with self._cond:
+                    self._created -= 1
+                    self._in_use -= 1
+                    self._cond.notify()
+                raise
+        return conn
+
+    def release(self, conn):
+        # Never hand a half-finished transaction to the next caller
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+            healthy = True
+        except sqlite3.Error:
+            healthy = False
+
+        with self._cond:
+            self._in_use -= 1
+            if healthy and not self._closed:
+                self._idle.append(conn)
+            else:
+                self._created -= 1
+                conn.close()
+            self._cond.notify()
+
+    def connection(self, bound=False):
+        return PooledConnection(self, self.acquire(), bound=bound)
+
+    def stats(self):
+        with self._cond:
+            return dict(
+                self._stats,
+                db_path=self.db_path,
+                max_size=self.max_size,
+                created=self._created,
+                in_use=self._in_use,
+                idle=len(self._idle),
+            )
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._created -= len(idle)
+            self._cond.notify_all()
+        for conn in idle:
+            conn.close()
@@ -0,0 +1,144 @@
+"""Data-driven seat pricing.
+
+Rules live in the database: ``pricing`` holds the Lower Hall base price per
+city and time slot (city ``'*'`` is the default for unlisted cities),
+``seat_type_pricing`` the multiplier per seat type and ``discount_rules``
+the basket discounts. ``PricingEngine`` compiles them into a dict keyed by
+``(city, time_slot, seat_type)`` so pricing a seat is a single lookup.
+
+Triggers bump ``pricing_version`` whenever any rule changes; the cached
+engine for a database is rebuilt the next time a caller sees a new version,
+so admin price changes reach every worker without a restart.
+"""
+import threading
+from datetime import datetime
+from functools import lru_cache
+
+SEAT_TYPES = ("Lower Hall", "Upper Gallery", "VIP")
+TIME_SLOTS = ("morning", "afternoon", "evening")
+DEFAULT_CITY = "*"
+
+_engines = {}
+_engines_lock = threading.Lock()
+
+
+@lru_cache(maxsize=1024)
+def _show_hour(show_time):
+    return datetime.strptime(show_time, "%Y-%m-%d %H:%M:%S").hour
+
+
+def time_slot(show_time):
+    """'morning' (8-12), 'afternoon' (12-17) or 'evening'."""
+    hour = show_time.hour if isinstance(show_time, datetime) else _show_hour(show_time)
+    if 8 <= hour < 12:
+        return "morning"
+    elif 12 <= hour < 17:
+        return "afternoon"
+    return "evening"
+
+
+def normalise_seat_type(seat_type):
+    raw_type = str(seat_type).strip().lower()
+    if raw_type == "vip":
+        return "VIP"
+    elif raw_type == "upper gallery":
+        return "Upper Gallery"
+    return "Lower Hall"
+
+
+class PricingEngine:
+    def __init__(self, base_prices, multipliers, discount_rules, version=0):
+        self.version = version
+        self.discount_rules = discount_rules
+        self.prices = {
+            (city, slot, seat_type): round(base * multiplier, 2)
+            for (city, slot), base in base_prices.items()
+            for seat_type, multiplier in multipliers.items()
+        }
+
+    @classmethod
+    def load(cls, conn):
+        version = conn.execute("SELECT version FROM pricing_version WHERE id = 1").fetchone()[0]
+        base_prices = {
+            (row[0], row[1]): row[2]
+            for row in conn.execute("SELECT city, time_slot, lower_hall_price FROM pricing")
+        }
+        multipliers = dict(conn.execute("SELECT seat_type, multiplier FROM seat_type_pricing").fetchall())
+        discount_rules = [
+            {"code": row[0], "multiplier": row[1], "min_seats": row[2],
+             "minutes_before": row[3], "max_occupancy": row[4]}
+            for row in conn.execute("""
+                SELECT code, multiplier, min_seats, minutes_before, max_occupancy
+                FROM discount_rules WHERE active = 1 ORDER BY code
+            """)
+        ]
+        return cls(base_prices, multipliers, discount_rules, version)
+
+    def price_table(self, city, show_time):
+        """``{seat_type: price}`` for one showtime."""
+        slot = time_slot(show_time)
+        if (city, slot, SEAT_TYPES[0]) not in self.prices:
+            city = DEFAULT_CITY
+        return {seat_type: self.prices[(city, slot, seat_type)] for seat_type in SEAT_TYPES
+                if (city, slot, seat_type) in self.prices}
+
+    def prices_for(self, city, show_time, seat_types):
+        """Price a whole seat map; ``seat_types`` may be any iterable (list, numpy array)."""
+        table = self.price_table(city, show_time)
+        lower_hall = table.get("Lower Hall", 0)
+        prices = []
+        for seat_type in seat_types:
+            price = table.get(seat_type)
+            if price is None:
+                price = table.get(normalise_seat_type(seat_type), lower_hall)
+            prices.append(price)
+        return prices
+
+    def discounts(self, seat_count, show_dt, now, occupancy):
+        """Active discount rules that apply to a basket, in a stable order."""
+        minutes_to_show = (show_dt - now).total_seconds() / 60
+        applied = []
+        for rule in self.discount_rules:
+            if rule["min_seats"] is not None and seat_count < rule["min_seats"]:
+                continue
+            if rule["minutes_before"] is not None and not 0 <= minutes_to_show <= rule["minutes_before"]:
+                continue
+            if rule["max_occupancy"] is not None and occupancy >= rule["max_occupancy"]:
+                continue
+            applied.append(rule)
+        return applied
+
+
+def get_pricing_engine(conn, version=None):
+    """Compiled engine for ``conn``'s database, rebuilt when the rules version moves.
+
+    Callers that already read ``pricing_version`` in their own query can
+    pass it as ``version`` to skip the lookup.
+    """
+    db_file = conn.execute("PRAGMA database_list").fetchone()[2]
+    if version is None:
+        version = conn.execute("SELECT version FROM pricing_version WHERE id = 1").fetchone()[0]
+
+    engine = _engines.get(db_file)
+    if engine is None or engine.version != version:
+        with _engines_lock:
+            engine = _engines.get(db_file)
+            if engine is None or engine.version != version:
+                engine = _engines[db_file] = PricingEngine.load(conn)
+    return engine
+
+
+def invalidate_pricing(db_file=None):
+    with _engines_lock:
+        if db_file is None:
+            _engines.clear()
+        else:
+            _engines.pop(db_file, None)
+
+
+def get_dynamic_prices(conn, city, show_time, seat_types):
+    return get_pricing_engine(conn).prices_for(city, show_time, seat_types)
+
+
+def get_dynamic_price(conn, city, show_time, seat_type):
+    return get_dynamic_prices(conn, city, show_time, (seat_type,))[0]
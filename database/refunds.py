@@ -0,0 +1,218 @@
+"""Set-based refunds for whole booking references.
+
+``refund_references`` refunds any number of booking references in one
+``BEGIN IMMEDIATE`` transaction: one query reads the bookings being
+refunded, then one ``INSERT ... SELECT`` writes their ``cancellations``
+audit rows, one ``UPDATE`` frees the seats, one ``DELETE`` drops the
+booking lines and another their emptied ``booking_orders`` headers, each
+driven by the same ``json_each`` list, so the statement count does not grow
+with the number of seats. Confirmation
+emails go through the outbox on the same transaction.
+
+Customer refunds return ``REFUND_SHARE`` of the price and close
+``REFUND_NOTICE`` before the showtime; bulk refunds such as a screen
+failure pass ``share=1`` and ``enforce_notice=False``.
+
+``cancel_showtimes`` does the same keyed by showtime instead of reference,
+for when a showing cannot go ahead: every booking on the showtimes is
+refunded in full, their holds are dropped and the showtimes removed, with
+the confirmations queued by one batched outbox insert. Showtimes that
+have already started are never cancelled.
+"""
+import json
+from datetime import datetime, timedelta
+
+from database.booking_references import canonical_references
+from database.database_setup import run_write_transaction
+from database.outbox import enqueue_emails
+
+REFUND_SHARE = 0.5
+REFUND_NOTICE = timedelta(days=1)
+
+
+class RefundNotFound(LookupError):
+    """None of the bookings for some references exist (already refunded or mistyped)."""
+
+    def __init__(self, references):
+        self.references = sorted(references)
+        super().__init__(f"No bookings found for {', '.join(self.references)}")
+
+
+class RefundWindowClosed(Exception):
+    """Some references are for showtimes less than ``REFUND_NOTICE`` away."""
+
+    def __init__(self, references):
+        self.references = sorted(references)
+        super().__init__(f"Refunds close {REFUND_NOTICE} before the showtime: {', '.join(self.references)}")
+
+
+class ShowtimeStarted(Exception):
+    """Some showtimes to cancel have already started; their takings are not refunded."""
+
+    def __init__(self, showtime_ids):
+        self.showtime_ids = sorted(showtime_ids)
+        super().__init__(f"Showtimes already started: {', '.join(str(s) for s in self.showtime_ids)}")
+
+
+# Booking line filters, each taking one JSON array parameter
+_BY_REFERENCE = ("order_id IN (SELECT id FROM booking_orders "
+                 "WHERE booking_reference IN (SELECT value FROM json_each(?)))")
+_BY_SHOWTIME = "showtime_id IN (SELECT value FROM json_each(?))"
+
+
+def _refunded_bookings(cursor, match, key_json):
+    cursor.execute(f"""
+        SELECT b.id, COALESCE(o.booking_reference, b.booking_reference),
+               COALESCE(o.customer_name, b.customer_name), COALESCE(o.customer_email, b.customer_email),
+               b.total_price, st.show_time, f.title AS film_title, s.seat_number, b.order_id
+        FROM bookings b
+        LEFT JOIN booking_orders o ON o.id = b.order_id
+        JOIN showtimes st ON st.id = b.showtime_id
+        JOIN films f ON f.id = st.film_id
+        JOIN seats s ON s.id = b.seat_id
+        WHERE b.{match}
+        ORDER BY 2, s.seat_number
+    """, (key_json,))
+    return cursor.fetchall()
+
+
+def _summaries(rows, share):
+    refunds = {}
+    for row in rows:
+        refund = refunds.setdefault(row[1], {
+            "booking_reference": row[1], "customer_name": row[2], "customer_email": row[3],
+            "show_time": row[5], "film_title": row[6], "seat_numbers": [], "original_total": 0.0,
+            "order_id": row[8],
+        })
+        refund["seat_numbers"].append(row[7])
+        refund["original_total"] += row[4] or 0
+    for refund in refunds.values():
+        refund["refund_amount"] = round(refund["original_total"] * share, 2)
+    return list(refunds.values())
+
+
+def _confirmation(refund, reason):
+    apology = ("We're sorry you couldn't make it! We hope to see you again soon at Horizon Cinemas 🎥"
+               if reason == "customer" else
+               "We're sorry we had to cancel this showing. We hope to see you again soon at Horizon Cinemas 🎥")
+    return f"""
+Hi {refund['customer_name']},
+
+This is a confirmation that your refund has been successfully processed for the following booking:
+
+📌 Booking Reference: {refund['booking_reference']}
+🎬 Film: {refund['film_title']}
+📅 Showtime: {refund['show_time']}
+💺 Seats: {', '.join(str(s) for s in refund['seat_numbers'])}
+💰 Refunded Amount: £{refund['refund_amount']}
+
+{apology}
+
+- Horizon Cinemas Team
+"""
+
+
+def _refund(cursor, match, key_json, refunds, share, reason, staff_id, cancelled_at, notify):
+    """Audit, free and delete the bookings matching ``match``, then queue confirmations."""
+    cursor.execute(f"""
+        INSERT INTO cancellations (
+            booking_id, cancellation_date, refund_amount, booking_reference, showtime_id, seat_id,
+            customer_email, original_price, reason, staff_id
+        )
+        SELECT b.id, ?, ROUND(COALESCE(b.total_price, 0) * ?, 2), COALESCE(o.booking_reference, b.booking_reference),
+               b.showtime_id, b.seat_id, COALESCE(o.customer_email, b.customer_email), b.total_price, ?, ?
+        FROM bookings b LEFT JOIN booking_orders o ON o.id = b.order_id
+        WHERE b.{match}
+    """, (cancelled_at, share, reason, staff_id, key_json))
+    cursor.execute(f"UPDATE seats SET is_booked = 0 WHERE id IN (SELECT seat_id FROM bookings WHERE {match})",
+                   (key_json,))
+    cursor.execute(f"DELETE FROM bookings WHERE {match}", (key_json,))
+    # The line triggers have brought the refunded headers down to zero seats
+    cursor.execute("DELETE FROM booking_orders WHERE id IN (SELECT value FROM json_each(?)) AND seat_count <= 0",
+                   (json.dumps(sorted({r["order_id"] for r in refunds if r["order_id"] is not None})),))
+
+    if notify:
+        enqueue_emails(cursor, [
+            (r["customer_email"], "💸 Horizon Cinemas Refund Confirmation", _confirmation(r, reason))
+            for r in refunds if r["customer_email"]
+        ], kind="refund_confirmation")
+
+
+def refund_references(conn, references, share=REFUND_SHARE, reason="customer", staff_id=None,
+                      enforce_notice=True, notify=True, now=None):
+    """Refund every booking under ``references`` in one transaction.
+
+    Raises ``InvalidReference`` (before touching the database) if any
+    reference fails its check character, ``RefundNotFound`` if any
+    reference has no bookings and
+    ``RefundWindowClosed`` if ``enforce_notice`` and any showtime is less
+    than ``REFUND_NOTICE`` away; nothing is refunded in either case.
+    Returns one summary dict per reference (``booking_reference``,
+    ``customer_email``, ``seat_numbers``, ``original_total``,
+    ``refund_amount``, ...).
+    """
+    references = list(dict.fromkeys(canonical_references(references)))
+    ref_json = json.dumps(references)
+    now = now or datetime.now()
+
+    def refund(cursor):
+        refunds = _summaries(_refunded_bookings(cursor, _BY_REFERENCE, ref_json), share)
+        missing = set(references) - {r["booking_reference"] for r in refunds}
+        if missing:
+            raise RefundNotFound(missing)
+        if enforce_notice:
+            closed = [r["booking_reference"] for r in refunds
+                      if datetime.strptime(r["show_time"], "%Y-%m-%d %H:%M:%S") - now < REFUND_NOTICE]
+            if closed:
+                raise RefundWindowClosed(closed)
+
+        _refund(cursor, _BY_REFERENCE, ref_json, refunds, share, reason, staff_id,
+                now.strftime("%Y-%m-%d %H:%M:%S"), notify)
+        return refunds
+
+    return run_write_transaction(conn, refund)
+
+
+def find_showtimes(cursor, cinema_id, screen_number=None, start=None, end=None):
+    """Ids of a cinema's showtimes, optionally on one screen and within ``[start, end]`` datetimes."""
+    start = start and start.strftime("%Y-%m-%d %H:%M:%S")
+    end = end and end.strftime("%Y-%m-%d %H:%M:%S")
+    cursor.execute("""
+        SELECT id FROM showtimes
+        WHERE cinema_id = ? AND (? IS NULL OR screen_number = ?)
+          AND (? IS NULL OR show_time >= ?) AND (? IS NULL OR show_time <= ?)
+        ORDER BY show_time
+    """, (cinema_id, screen_number, screen_number, start, start, end, end))
+    return [row[0] for row in cursor.fetchall()]
+
+
+def cancel_showtimes(conn, showtime_ids, reason="cinema", staff_id=None, remove=True, notify=True, now=None):
+    """Cancel ``showtime_ids``: refund every booking on them in full and drop their holds.
+
+    Runs as one transaction whatever the number of showtimes or seats;
+    with ``remove`` the showtimes are also taken off the timetable.
+    Raises ``ShowtimeStarted`` (cancelling nothing) if any showtime is
+    not after ``now``. Returns ``{"showtimes", "refunds"}`` where ``refunds`` are the
+    per-reference summaries as from ``refund_references``.
+    """
+    showtime_json = json.dumps(sorted({int(showtime_id) for showtime_id in showtime_ids}))
+    now = now or datetime.now()
+
+    def cancel(cursor):
+        cursor.execute("SELECT COUNT(*) FROM showtimes WHERE id IN (SELECT value FROM json_each(?))",
+                       (showtime_json,))
+        showtimes = cursor.fetchone()[0]
+        cursor.execute("SELECT id FROM showtimes WHERE id IN (SELECT value FROM json_each(?)) AND show_time <= ?",
+                       (showtime_json, now.strftime("%Y-%m-%d %H:%M:%S")))
+        started = [row[0] for row in cursor.fetchall()]
+        if started:
+            raise ShowtimeStarted(started)
+        refunds = _summaries(_refunded_bookings(cursor, _BY_SHOWTIME, showtime_json), 1)
+        _refund(cursor, _BY_SHOWTIME, showtime_json, refunds, 1, reason, staff_id,
+                now.strftime("%Y-%m-%d %H:%M:%S"), notify)
+        cursor.execute(f"DELETE FROM seat_holds WHERE {_BY_SHOWTIME}", (showtime_json,))
+        if remove:
+            cursor.execute("DELETE FROM showtimes WHERE id IN (SELECT value FROM json_each(?))", (showtime_json,))
+        return {"showtimes": showtimes, "refunds": refunds}
+
+    return run_write_transaction(conn, cancel)
@@ -0,0 +1,156 @@
+"""Streaming report exports (CSV, JSON lines, Parquet).
+
+Each exporter takes an executed cursor and yields encoded chunks, pulling
+``chunk_size`` rows at a time with ``fetchmany``. Nothing holds more than one
+chunk of rows, so memory stays flat however large the report is and the
+first bytes leave before the query has finished.
+
+Parquet needs pyarrow, which is optional and imported on first use only;
+``parquet_available()`` lets callers refuse the format when it is missing.
+"""
+import csv
+import importlib.util
+import io
+import json
+
+DEFAULT_CHUNK_SIZE = 1000
+
+EXPORT_FORMATS = {
+    "csv": "text/csv",
+    "jsonl": "application/x-ndjson",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+
+def parquet_available():
+    return importlib.util.find_spec("pyarrow") is not None
+
+
+def column_names(cursor):
+    return [column[0] for column in cursor.description]
+
+
+def iter_chunks(cursor, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield lists of at most ``chunk_size`` rows until the cursor is exhausted."""
+    while True:
+        rows = cursor.fetchmany(chunk_size)
+        if not rows:
+            return
+        yield rows
+
+
+def stream_csv(cursor, chunk_size=DEFAULT_CHUNK_SIZE):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(column_names(cursor))
+    for rows in iter_chunks(cursor, chunk_size):
+        writer.writerows(tuple(row) for row in rows)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()  # header only: empty report
+
+
+def stream_jsonl(cursor, chunk_size=DEFAULT_CHUNK_SIZE):
+    columns = column_names(cursor)
+    for rows in iter_chunks(cursor, chunk_size):
+        yield "".join(json.dumps(dict(zip(columns, row))) + "\n" for row in rows)
+
+
+class _ByteSink(io.RawIOBase):
+    """Write-only stream that hands back what was written since the last drain."""
+
+    def __init__(self):
+        super().__init__()
+        self._parts = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._parts.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self):
+        data, self._parts = b"".join(self._parts), []
+        return data
+
+
+PARQUET_TYPES = ("int64", "float64", "string", "binary")
+
+
+def _inferred_type(values):
+    """Parquet type for an undeclared column, judged from its first chunk.
+
+    Numbers are widened to float64 because a later chunk may hold floats
+    where the first only held ints; all-NULL columns become strings.
+    """
+    kinds = {type(value) for value in values if value is not None}
+    if kinds and kinds <= {int, float}:
+        return "float64"
+    if kinds == {bytes}:
+        return "binary"
+    return "string"
+
+
+def parquet_types(columns, rows, declared=None):
+    """One of ``PARQUET_TYPES`` per column: ``declared[name]`` if given, else inferred from ``rows``."""
+    declared = declared or {}
+    values = list(zip(*rows)) or [()] * len(columns)
+    return [declared.get(name) or _inferred_type(column) for name, column in zip(columns, values)]
+
+
+def _as_text(values):
+    # SQLite columns are loosely typed; a string column may meet numbers after an all-NULL first chunk
+    return [value if value is None or isinstance(value, str) else str(value) for value in values]
+
+
+def _arrow_schema(pa, columns, rows, types):
+    return pa.schema([(name, getattr(pa, kind)()) for name, kind in zip(columns, parquet_types(columns, rows, types))])
+
+
+def stream_parquet(cursor, chunk_size=DEFAULT_CHUNK_SIZE, types=None):
+    """One Parquet row group per chunk, flushed to the client as it is written.
+
+    ``types`` maps column names to one of ``PARQUET_TYPES``; the schema is
+    fixed when the first row group is written, so callers that know their
+    query's columns should declare them.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    columns = column_names(cursor)
+    sink, writer, schema = _ByteSink(), None, None
+    for rows in iter_chunks(cursor, chunk_size):
+        if writer is None:
+            schema = _arrow_schema(pa, columns, rows, types)
+            writer = pq.ParquetWriter(sink, schema)
+        writer.write_batch(pa.record_batch(
+            [pa.array(_as_text(column) if field.type == pa.string() else column, type=field.type)
+             for column, field in zip(zip(*rows), schema)], schema=schema
+        ))
+        yield sink.drain()
+
+    if writer is None:
+        writer = pq.ParquetWriter(sink, _arrow_schema(pa, columns, [], types))
+    writer.close()
+    yield sink.drain()
+
+
+_EXPORTERS = {"csv": stream_csv, "jsonl": stream_jsonl, "parquet": stream_parquet}
+
+
+def stream_export(cursor, fmt, chunk_size=DEFAULT_CHUNK_SIZE, types=None):
+    """Chunks of ``cursor``'s result encoded as ``fmt`` (one of ``EXPORT_FORMATS``).
+
+    ``types`` declares column types for formats that carry a schema (Parquet).
+    """
+    if fmt == "parquet":
+        return stream_parquet(cursor, chunk_size, types)
+    return _EXPORTERS[fmt](cursor, chunk_size)
@@ -0,0 +1,278 @@
+"""Materialised sales summaries behind the /report/* pages.
+
+Each report reads a small summary table at exactly the grain it needs:
+
+* ``report_film_sales`` - bookings and revenue per film
+* ``report_daily_cinema_sales`` - per booking day and cinema
+* ``report_daily_staff_sales`` - per booking day and staff member
+* ``report_daily_film_sales`` - per booking day and film, for date ranges
+
+Triggers on ``bookings`` keep all four current for every writer (booking
+engine, refunds, ad-hoc SQL), so report latency depends on the number of
+films, days, cinemas and staff, never on the number of bookings.
+
+Rows are keyed on the showtime's film and cinema when the booking is
+written. Unknown keys are stored as 0 and an undated booking as ``''``.
+If the summaries could have drifted (bulk loads with triggers dropped,
+showtimes moved between films), rebuild them and check them against the
+raw aggregates:
+
+    python -m database.reporting rebuild [--testing | --db PATH]
+    python -m database.reporting check   [--testing | --db PATH]
+"""
+import argparse
+import sqlite3
+
+from database.database_setup import run_write_transaction
+
+# Key column -> (expression over a trigger row, expression over bookings b / booking_orders o / showtimes st).
+# Booking date and staff come from the order header unless the line carries its own (legacy inserts).
+_KEYS = {
+    "day": ("COALESCE(DATE(COALESCE({row}.booking_date, "
+            "(SELECT booking_date FROM booking_orders WHERE id = {row}.order_id))), '')",
+            "COALESCE(DATE(COALESCE(b.booking_date, o.booking_date)), '')"),
+    "cinema_id": ("COALESCE((SELECT cinema_id FROM showtimes WHERE id = {row}.showtime_id), 0)",
+                  "COALESCE(st.cinema_id, 0)"),
+    "film_id": ("COALESCE((SELECT film_id FROM showtimes WHERE id = {row}.showtime_id), 0)",
+                "COALESCE(st.film_id, 0)"),
+    "staff_id": ("COALESCE({row}.booking_staff_id, "
+                 "(SELECT booking_staff_id FROM booking_orders WHERE id = {row}.order_id), 0)",
+                 "COALESCE(b.booking_staff_id, o.booking_staff_id, 0)"),
+}
+
+SUMMARIES = {
+    "report_film_sales": ("film_id",),
+    "report_daily_cinema_sales": ("day", "cinema_id"),
+    "report_daily_staff_sales": ("day", "staff_id"),
+    "report_daily_film_sales": ("day", "film_id"),
+}
+
+
+def _raw_aggregate(keys):
+    columns = ", ".join(f"{_KEYS[key][1]} AS {key}" for key in keys)
+    return f"""
+        SELECT {columns}, COUNT(*) AS bookings, SUM(COALESCE(b.total_price, 0)) AS revenue
+        FROM bookings b
+        LEFT JOIN booking_orders o ON o.id = b.order_id
+        LEFT JOIN showtimes st ON st.id = b.showtime_id
+        GROUP BY {", ".join(str(n) for n in range(1, len(keys) + 1))}
+    """
+
+
+def _apply(table, keys, row, sign):
+    """Trigger statements adding (+1) or removing (-1) booking ``row`` (NEW/OLD) from ``table``."""
+    values = [_KEYS[key][0].format(row=row) for key in keys]
+    revenue = f"COALESCE({row}.total_price, 0)"
+
+    if sign > 0:
+        return f"""
+            INSERT INTO {table} ({", ".join(keys)}, bookings, revenue)
+            SELECT {", ".join(values)}, 1, {revenue} WHERE 1
+            ON CONFLICT ({", ".join(keys)})
+            DO UPDATE SET bookings = bookings + 1, revenue = revenue + excluded.revenue;
+        """
+    match = " AND ".join(f"{key} = {value}" for key, value in zip(keys, values))
+    return f"""
+        UPDATE {table} SET bookings = bookings - 1, revenue = revenue - {revenue} WHERE {match};
+        DELETE FROM {table} WHERE {match} AND bookings <= 0;
+    """
+
+
+def create_reporting_schema(cursor):
+    for table, keys in SUMMARIES.items():
+        columns = "".join(f"{key} {'TEXT' if key == 'day' else 'INTEGER'} NOT NULL, " for key in keys)
+        cursor.execute(f"""
+            CREATE TABLE IF NOT EXISTS {table} (
+                {columns}bookings INTEGER NOT NULL, revenue REAL NOT NULL,
+                PRIMARY KEY ({", ".join(keys)})
+            ) WITHOUT ROWID
+        """)
+
+    for event, rows in (("INSERT", ("NEW",)), ("DELETE", ("OLD",)), ("UPDATE", ("OLD", "NEW"))):
+        columns = " OF showtime_id, booking_date, total_price, booking_staff_id, order_id" if event == "UPDATE" else ""
+        body = "".join(
+            _apply(table, keys, row, -1 if row == "OLD" else +1)
+            for row in rows for table, keys in SUMMARIES.items()
+        )
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_bookings_report_{event.lower()}
+            AFTER {event}{columns} ON bookings
+            BEGIN {body} END
+        """)
+
+
+def _rebuild(cursor):
+    counts = {}
+    for table, keys in SUMMARIES.items():
+        cursor.execute(f"DELETE FROM {table}")
+        cursor.execute(f"INSERT INTO {table} ({', '.join(keys)}, bookings, revenue) {_raw_aggregate(keys)}")
+        counts[table] = cursor.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+    return counts
+
+
+def rebuild_reports(conn):
+    """Recompute every summary from ``bookings``; returns ``{table: rows}``."""
+    return run_write_transaction(conn, _rebuild)
+
+
+def check_reports(conn):
+    """Summary rows whose counts or revenue (to the penny) disagree with ``bookings``.
+
+    Returns a list of ``(table, problem, row)`` where ``problem`` is
+    ``"missing"`` (a raw aggregate absent from the summary, or stale) or
+    ``"unexpected"`` (a summary row with no matching raw aggregate).
+    """
+    problems = []
+    for table, keys in SUMMARIES.items():
+        columns = ", ".join(keys) + ", bookings, ROUND(revenue, 2)"
+        raw = f"SELECT {columns} FROM ({_raw_aggregate(keys)})"
+        summary = f"SELECT {columns} FROM {table}"
+        problems += [(table, "missing", tuple(row)) for row in conn.execute(f"{raw} EXCEPT {summary}")]
+        problems += [(table, "unexpected", tuple(row)) for row in conn.execute(f"{summary} EXCEPT {raw}")]
+    return problems
+
+
+# ===============================
+#  Report queries
+# ===============================
+
+def _day_range(start, end, column="day"):
+    """SQL condition and params restricting ``column`` to ``start``..``end`` (ISO dates, inclusive)."""
+    if start is None and end is None:
+        return "1", []
+    conditions, params = [f"{column} <> ''"], []
+    if start is not None:
+        conditions.append(f"{column} >= ?")
+        params.append(str(start))
+    if end is not None:
+        conditions.append(f"{column} <= ?")
+        params.append(str(end))
+    return " AND ".join(conditions), params
+
+
+def _film_sales(start, end):
+    # Whole-history film totals skip the per-day rows entirely
+    if start is None and end is None:
+        return "report_film_sales", "1", []
+    return ("report_daily_film_sales",) + _day_range(start, end, "r.day")
+
+
+def _bookings_per_film(start, end):
+    table, where, params = _film_sales(start, end)
+    return f"""
+        SELECT films.title, COALESCE(SUM(r.bookings), 0) AS total_bookings
+        FROM films
+        LEFT JOIN {table} r ON r.film_id = films.id AND {where}
+        GROUP BY films.title
+        ORDER BY total_bookings DESC
+    """, params
+
+
+def _monthly_revenue(start, end):
+    where, params = _day_range(start, end)
+    return f"""
+        SELECT NULLIF(substr(day, 1, 7), '') AS month, ROUND(SUM(revenue), 2) AS total_revenue
+        FROM report_daily_cinema_sales
+        WHERE {where}
+        GROUP BY 1
+        ORDER BY month DESC
+    """, params
+
+
+def _top_films(start, end):
+    table, where, params = _film_sales(start, end)
+    return f"""
+        SELECT f.title, ROUND(SUM(r.revenue), 2) AS total_revenue, SUM(r.bookings) AS booking_count,
+               f.genre, f.age_rating
+        FROM {table} r
+        JOIN films f ON f.id = r.film_id
+        WHERE {where}
+        GROUP BY f.title, f.genre, f.age_rating
+        ORDER BY total_revenue DESC
+    """, params
+
+
+def _staff_bookings(start, end):
+    where, params = _day_range(start, end, "r.day")
+    return f"""
+        SELECT NULLIF(substr(r.day, 1, 7), '') AS month, u.username AS staff_name,
+               SUM(r.bookings) AS booking_count, ROUND(SUM(r.revenue), 2) AS total_revenue
+        FROM report_daily_staff_sales r
+        JOIN users u ON u.id = r.staff_id
+        WHERE {where}
+        GROUP BY 1, u.username
+        ORDER BY month DESC, booking_count DESC
+    """, params
+
+
+REPORTS = {
+    "bookings_per_film": _bookings_per_film,
+    "monthly_revenue": _monthly_revenue,
+    "top_films": _top_films,
+    "staff_bookings": _staff_bookings,
+}
+
+# Column types for exports, so a report's schema never depends on which rows come first
+REPORT_TYPES = {
+    "bookings_per_film": {"title": "string", "total_bookings": "int64"},
+    "monthly_revenue": {"month": "string", "total_revenue": "float64"},
+    "top_films": {"title": "string", "total_revenue": "float64", "booking_count": "int64",
+                  "genre": "string", "age_rating": "string"},
+    "staff_bookings": {"month": "string", "staff_name": "string", "booking_count": "int64",
+                       "total_revenue": "float64"},
+}
+
+
+def run_report(cursor, name, start=None, end=None):
+    """Execute report ``name`` on ``cursor`` and return the cursor, unfetched.
+
+    ``start``/``end`` are optional inclusive booking dates (``date`` or ISO
+    string); any range leaves out undated bookings.
+    """
+    cursor.execute(*REPORTS[name](start, end))
+    return cursor
+
+
+def bookings_per_film(cursor, start=None, end=None):
+    return run_report(cursor, "bookings_per_film", start, end).fetchall()
+
+
+def monthly_revenue(cursor, start=None, end=None):
+    return run_report(cursor, "monthly_revenue", start, end).fetchall()
+
+
+def top_films(cursor, start=None, end=None):
+    return run_report(cursor, "top_films", start, end).fetchall()
+
+
+def staff_bookings(cursor, start=None, end=None):
+    return run_report(cursor, "staff_bookings", start, end).fetchall()
+
+
+if __name__ == "__main__":
+    import os
+    import sys
+
+    sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+    from database.database_setup import get_db_path
+
+    parser = argparse.ArgumentParser(description="Rebuild or verify the materialised report tables.")
+    parser.add_argument("command", choices=["rebuild", "check"])
+    parser.add_argument("--testing", action="store_true", help="use the test database")
+    parser.add_argument("--db", help="path to a database file (overrides --testing)")
+    args = parser.parse_args()
+
+    db_path = args.db or get_db_path(args.testing)
+    conn = sqlite3.connect(db_path)
+    problems = []
+    if args.command == "rebuild":
+        for table, rows in rebuild_reports(conn).items():
+            print(f"✅ Rebuilt {table}: {rows} rows")
+    else:
+        problems = check_reports(conn)
+        for table, problem, row in problems:
+            print(f"❌ {table} {problem}: {row}")
+        if not problems:
+            print(f"✅ Report tables match bookings in {db_path}")
+    conn.close()
+    sys.exit(1 if problems else 0)
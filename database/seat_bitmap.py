@@ -0,0 +1,146 @@
+"""Booked-seat bitmaps and bit-operation availability checks.
+
+A showtime's booked seats are one Python int with bit ``n - 1`` set for
+seat number ``n``. It is persisted as two signed 64-bit halves
+(``bits_lo`` for seats 1-64, ``bits_hi`` for 65-128) on
+``showtime_occupancy``, where the booking triggers flip bits inside the
+same transaction as every booking and refund (see ``database.occupancy``).
+A 120-seat screen therefore costs 16 bytes per showtime, and reading it is
+one primary-key lookup.
+
+``find_adjacent`` answers "N seats together" with shifts and ANDs over a
+row's free-seat mask instead of scanning seat rows.
+"""
+from datetime import datetime
+
+MAX_SEATS = 128
+_HALF = 64
+_MASK64 = (1 << _HALF) - 1
+
+
+def combine(bits_lo, bits_hi):
+    """Python int bitmap from the two stored signed 64-bit halves."""
+    return ((bits_hi & _MASK64) << _HALF) | (bits_lo & _MASK64)
+
+
+def split(bits):
+    """Stored ``(bits_lo, bits_hi)`` halves for a bitmap, as signed 64-bit ints."""
+    def signed(half):
+        return half - (1 << _HALF) if half >> (_HALF - 1) else half
+    return signed(bits & _MASK64), signed((bits >> _HALF) & _MASK64)
+
+
+def seat_mask(seat_numbers):
+    mask = 0
+    for number in seat_numbers:
+        if 1 <= number <= MAX_SEATS:
+            mask |= 1 << (number - 1)
+    return mask
+
+
+def is_set(bits, seat_number):
+    return bool(bits >> (seat_number - 1) & 1)
+
+
+def seat_numbers(bits):
+    """Seat numbers whose bits are set, in order."""
+    numbers = []
+    while bits:
+        low = bits & -bits
+        numbers.append(low.bit_length())
+        bits ^= low
+    return numbers
+
+
+def count(bits):
+    return bin(bits).count("1")
+
+
+def runs_of(free, length):
+    """Bitmap of seats that start ``length`` consecutive free seats in ``free``."""
+    runs = free
+    for shift in range(1, length):
+        runs &= free >> shift
+    return runs
+
+
+def load_bitmap(cursor, showtime_id):
+    """``(booked_bits, capacity)`` for a showtime from ``showtime_occupancy``, or ``None``."""
+    cursor.execute(
+        "SELECT bits_lo, bits_hi, capacity FROM showtime_occupancy WHERE showtime_id = ?", (showtime_id,)
+    )
+    row = cursor.fetchone()
+    return (combine(row[0], row[1]), row[2]) if row else None
+
+
+def held_bitmap(cursor, showtime_id, now, hold_token=None):
+    """Bitmap of seats with an unexpired hold that does not belong to ``hold_token``."""
+    cursor.execute("""
+        SELECT s.seat_number FROM seat_holds h JOIN seats s ON s.id = h.seat_id
+        WHERE h.showtime_id = ? AND h.expires_at > ? AND h.hold_token IS NOT ?
+    """, (showtime_id, now, hold_token))
+    return seat_mask(row[0] for row in cursor.fetchall())
+
+
+def row_masks(cursor, screen_id, seat_type=None):
+    """``[(row_label, mask)]`` for a screen's rows, front row first, optionally one seat type only.
+
+    Seats without a ``row_label`` (screens laid out before seat geometry) form one row.
+    """
+    cursor.execute("""
+        SELECT row_label, GROUP_CONCAT(seat_number)
+        FROM seats WHERE screen_id = ? AND (? IS NULL OR seat_type = ?)
+        GROUP BY row_label
+        ORDER BY MIN(seat_number)
+    """, (screen_id, seat_type, seat_type))
+    return [(label, seat_mask(int(n) for n in numbers.split(","))) for label, numbers in cursor.fetchall()]
+
+
+def find_adjacent(taken, rows, length):
+    """Seat numbers of the ``length`` free seats together nearest the middle of a row.
+
+    ``taken`` is the booked (and held) bitmap, ``rows`` the output of
+    ``row_masks``; rows are tried front to back and ``[]`` means no row
+    has that many free seats side by side.
+    """
+    for _, mask in rows:
+        starts = runs_of(mask & ~taken, length)
+        if not starts:
+            continue
+        middle = (seat_numbers(mask)[0] + mask.bit_length()) / 2
+        start = min(seat_numbers(starts), key=lambda n: abs(n + (length - 1) / 2 - middle))
+        return list(range(start, start + length))
+    return []
+
+
+def best_available(cursor, showtime_id, length, seat_type=None, hold_token=None, now=None):
+    """Seat ids of the best ``length`` free seats together, ``[]`` if none, ``None`` without a showtime.
+
+    Seats held by ``hold_token`` count as free; optionally only seats of
+    ``seat_type`` are considered.
+    """
+    cursor.execute("""
+        SELECT (SELECT id FROM screens WHERE cinema_id = st.cinema_id AND screen_number = st.screen_number
+                ORDER BY id LIMIT 1)
+        FROM showtimes st WHERE st.id = ?
+    """, (showtime_id,))
+    row = cursor.fetchone()
+    if row is None:
+        return None
+    screen_id = row[0]
+
+    loaded = load_bitmap(cursor, showtime_id)
+    if loaded is None:
+        return []
+    now = now or datetime.now()
+    taken = loaded[0] | held_bitmap(cursor, showtime_id, now.timestamp(), hold_token)
+
+    numbers = find_adjacent(taken, row_masks(cursor, screen_id, seat_type), length)
+    if not numbers:
+        return []
+    cursor.execute(
+        f"SELECT id FROM seats WHERE screen_id = ? AND seat_number IN ({','.join('?' * len(numbers))}) "
+        "ORDER BY seat_number",
+        (screen_id, *numbers),
+    )
+    return [r[0] for r in cursor.fetchall()]
@@ -0,0 +1,151 @@
+"""Temporary seat holds so staff can build a basket without racing other tills.
+
+A hold reserves ``(showtime_id, seat_id)`` for one ``hold_token`` until
+``expires_at`` (unix seconds). Holds live in a WITHOUT ROWID table keyed by
+that pair, so placing, extending and checking them are primary-key lookups
+and never scan ``bookings``. Expired holds are ignored by every check and
+removed in bulk by ``sweep_expired_holds`` / ``HoldSweeper``.
+"""
+import json
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+
+from database.booking_engine import SeatConflict, SeatNotFound, normalise_seat_ids, screen_seat_types, taken_seats
+from database.database_setup import run_write_transaction
+
+DEFAULT_HOLD_TTL = 300
+
+
+def held_by_others(cursor, showtime_id, seat_json, hold_token, now):
+    """Seats with an unexpired hold belonging to someone other than ``hold_token``."""
+    cursor.execute("""
+        SELECT seat_id FROM seat_holds
+        WHERE showtime_id = ? AND seat_id IN (SELECT value FROM json_each(?))
+          AND expires_at > ? AND hold_token IS NOT ?
+    """, (showtime_id, seat_json, now, hold_token))
+    return [row[0] for row in cursor.fetchall()]
+
+
+def held_seats(cursor, hold_token, now=None):
+    """``(showtime_id, seat_id)`` pairs still held by ``hold_token``."""
+    cursor.execute(
+        "SELECT showtime_id, seat_id FROM seat_holds WHERE hold_token = ? AND expires_at > ? ORDER BY seat_id",
+        (hold_token, now or time.time())
+    )
+    return [(row[0], row[1]) for row in cursor.fetchall()]
+
+
+def hold_seats(conn, showtime_id, seat_ids, staff_id=None, hold_token=None, ttl=DEFAULT_HOLD_TTL):
+    """Hold ``seat_ids`` for ``ttl`` seconds, adding to ``hold_token``'s basket if given.
+
+    Re-holding a seat already held by the same token refreshes its expiry.
+    Raises ``SeatConflict`` if any seat is booked or held by another token.
+    Returns ``(hold_token, expires_at)``.
+    """
+    seat_ids = normalise_seat_ids(seat_ids)
+    seat_json = json.dumps(seat_ids)
+    hold_token = hold_token or uuid.uuid4().hex
+
+    def place(cursor):
+        now = time.time()
+        expires_at = now + ttl
+
+        missing = set(seat_ids) - set(screen_seat_types(cursor, showtime_id, seat_json))
+        if missing:
+            raise SeatNotFound(missing)
+
+        conflicts = set(held_by_others(cursor, showtime_id, seat_json, hold_token, now))
+        conflicts.update(taken_seats(cursor, showtime_id, seat_json))
+        if conflicts:
+            raise SeatConflict(conflicts)
+
+        # Expired holds from other tokens are simply taken over
+        cursor.executemany("""
+            INSERT INTO seat_holds (showtime_id, seat_id, hold_token, staff_id, expires_at)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (showtime_id, seat_id) DO UPDATE SET
+                hold_token = excluded.hold_token,
+                staff_id = excluded.staff_id,
+                expires_at = excluded.expires_at
+        """, [(showtime_id, seat_id, hold_token, staff_id, expires_at) for seat_id in seat_ids])
+        return hold_token, expires_at
+
+    return run_write_transaction(conn, place)
+
+
+def extend_hold(conn, hold_token, ttl=DEFAULT_HOLD_TTL):
+    """Push every live seat in the basket to ``now + ttl``; returns the number extended."""
+    def extend(cursor):
+        now = time.time()
+        cursor.execute(
+            "UPDATE seat_holds SET expires_at = ? WHERE hold_token = ? AND expires_at > ?",
+            (now + ttl, hold_token, now)
+        )
+        return cursor.rowcount, now + ttl
+
+    return run_write_transaction(conn, extend)
+
+
+def release_hold(conn, hold_token, seat_ids=None):
+    """Release the whole basket, or just ``seat_ids`` from it; returns seats released."""
+    def release(cursor):
+        if seat_ids is None:
+            cursor.execute("DELETE FROM seat_holds WHERE hold_token = ?", (hold_token,))
+        else:
+            cursor.execute(
+                "DELETE FROM seat_holds WHERE hold_token = ? AND seat_id IN (SELECT value FROM json_each(?))",
+                (hold_token, json.dumps(normalise_seat_ids(seat_ids)))
+            )
+        return cursor.rowcount
+
+    return run_write_transaction(conn, release)
+
+
+def sweep_expired_holds(conn, now=None):
+    """Delete every expired hold in one statement; returns the number evicted."""
+    return run_write_transaction(conn, lambda cursor: cursor.execute(
+        "DELETE FROM seat_holds WHERE expires_at <= ?", (now or time.time(),)
+    ).rowcount)
+
+
+class HoldSweeper(threading.Thread):
+    """Background thread that evicts expired holds every ``interval`` seconds."""
+
+    def __init__(self, db_path, interval=30.0):
+        super().__init__(name="seat-hold-sweeper", daemon=True)
+        self.db_path = db_path
+        self.interval = interval
+        self._stop_event = threading.Event()
+
+    def run(self):
+        from database.database_setup import get_pool
+
+        while not self._stop_event.wait(self.interval):
+            conn = get_pool(self.db_path).connection()
+            try:
+                evicted = sweep_expired_holds(conn)
+                if evicted:
+                    logging.info(f"Evicted {evicted} expired seat holds")
+            except sqlite3.Error as e:
+                logging.warning(f"Seat hold sweep failed: {e}")
+            finally:
+                conn.close()
+
+    def stop(self):
+        self._stop_event.set()
+
+
+def init_app(app):
+    interval = app.config.get("SEAT_HOLD_SWEEP_INTERVAL", 30)
+    if interval:
+        from database.database_setup import get_db_path, owns_background_jobs
+
+        with app.app_context():
+            db_path = get_db_path()
+            if not owns_background_jobs(db_path):
+                return
+        app.extensions["seat_hold_sweeper"] = sweeper = HoldSweeper(db_path, interval)
+        sweeper.start()
@@ -0,0 +1,122 @@
+"""Seat layouts for screens, built in memory and written in bulk.
+
+A layout is a list of ``(seat_number, seat_type, row_label, col_number)``
+tuples. Seats keep the flat 1..N numbering bookings already use, grouped
+front to back as Lower Hall, Upper Gallery then VIP; every section starts
+on a fresh row so the geometry matches the auditorium.
+
+``insert_layout`` writes a new screen with multi-row INSERTs;
+``sync_seats`` diffs an existing screen against its new layout and only
+inserts, updates or deletes the seats that changed, so seat ids (and the
+bookings pointing at them) survive a resize.
+"""
+import calendar
+import json
+from datetime import datetime
+
+DEFAULT_SEATS_PER_ROW = 10
+LOWER_HALL_SHARE = 0.3
+# 5 bound values per seat; stays under SQLite's historic 999-variable limit
+INSERT_CHUNK = 150
+
+
+class SeatsInUse(ValueError):
+    """A resize would delete seats that are booked for upcoming showtimes."""
+
+    def __init__(self, seat_numbers):
+        self.seat_numbers = sorted(seat_numbers)
+        super().__init__(f"Seats still booked for upcoming showtimes: {', '.join(str(n) for n in self.seat_numbers)}")
+
+
+def row_label(index):
+    """0 -> 'A', 25 -> 'Z', 26 -> 'AA'."""
+    label = ""
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        label = chr(ord("A") + remainder) + label
+    return label
+
+
+def assign_geometry(seat_types, seats_per_row=DEFAULT_SEATS_PER_ROW):
+    """``(row_label, col_number)`` for each seat type in order; a new section starts a new row."""
+    geometry = []
+    row, col, previous = -1, seats_per_row, None
+    for seat_type in seat_types:
+        if col >= seats_per_row or seat_type != previous:
+            row, col = row + 1, 0
+        col += 1
+        previous = seat_type
+        geometry.append((row_label(row), col))
+    return geometry
+
+
+def layout_seats(total_seats, vip_count=10, seats_per_row=DEFAULT_SEATS_PER_ROW):
+    lower = round(total_seats * LOWER_HALL_SHARE)
+    vip = max(0, min(vip_count, total_seats - lower))  # Ensure VIPs don't exceed available
+    upper = total_seats - lower - vip
+
+    seat_types = ["Lower Hall"] * lower + ["Upper Gallery"] * upper + ["VIP"] * vip
+    return [
+        (seat_number, seat_type, label, col)
+        for seat_number, (seat_type, (label, col)) in enumerate(
+            zip(seat_types, assign_geometry(seat_types, seats_per_row)), start=1
+        )
+    ]
+
+
+def insert_layout(cursor, screen_id, layout):
+    """Write ``layout`` with multi-row INSERTs, one statement per ``INSERT_CHUNK`` seats."""
+    for start in range(0, len(layout), INSERT_CHUNK):
+        chunk = layout[start:start + INSERT_CHUNK]
+        cursor.execute(
+            "INSERT INTO seats (screen_id, seat_number, seat_type, row_label, col_number, is_booked) VALUES "
+            + ", ".join(["(?, ?, ?, ?, ?, 0)"] * len(chunk)),
+            [value for seat_number, seat_type, label, col in chunk
+             for value in (screen_id, seat_number, seat_type, label, col)]
+        )
+    return len(layout)
+
+
+def sync_seats(cursor, screen_id, layout, now=None):
+    """Bring a screen's seats in line with ``layout``; returns ``{"added", "changed", "removed"}`` counts.
+
+    Raises ``SeatsInUse`` rather than delete seats booked for a showtime
+    that has not started by ``now`` (local time, like ``show_time``).
+    """
+    cursor.execute(
+        "SELECT id, seat_number, seat_type, row_label, col_number FROM seats WHERE screen_id = ?", (screen_id,)
+    )
+    existing = {}
+    duplicates = []
+    for seat_id, seat_number, seat_type, label, col in cursor.fetchall():
+        if seat_number in existing:
+            duplicates.append(seat_id)
+        else:
+            existing[seat_number] = (seat_id, seat_type, label, col)
+
+    wanted = {seat[0]: seat for seat in layout}
+    removed = [existing[number][0] for number in existing if number not in wanted] + duplicates
+
+    if removed:
+        cursor.execute("""
+            SELECT DISTINCT seats.seat_number FROM bookings b
+            JOIN seats ON seats.id = b.seat_id
+            JOIN showtimes st ON st.id = b.showtime_id
+            WHERE b.seat_id IN (SELECT value FROM json_each(?)) AND st.show_epoch >= ?
+        """, (json.dumps(removed), calendar.timegm((now or datetime.now()).timetuple())))
+        in_use = [row[0] for row in cursor.fetchall()]
+        if in_use:
+            raise SeatsInUse(in_use)
+
+    added = [seat for number, seat in wanted.items() if number not in existing]
+    changed = [
+        (seat_type, label, col, existing[number][0])
+        for number, (_, seat_type, label, col) in wanted.items()
+        if number in existing and existing[number][1:] != (seat_type, label, col)
+    ]
+
+    cursor.execute("DELETE FROM seats WHERE id IN (SELECT value FROM json_each(?))", (json.dumps(removed),))
+    cursor.executemany("UPDATE seats SET seat_type = ?, row_label = ?, col_number = ? WHERE id = ?", changed)
+    insert_layout(cursor, screen_id, added)
+    return {"added": len(added), "changed": len(changed), "removed": len(removed)}
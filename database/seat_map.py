@@ -0,0 +1,87 @@
+"""Seat map for one showtime from a single joined query.
+
+One statement returns the showtime, film, city, screen, the showtime's
+booked-seat bitmap and every seat with its held flag; booked flags and
+occupancy are bit tests on that bitmap and prices come from the pricing
+engine's compiled table, so rendering a seat map costs one round trip
+however many seats the screen has.
+"""
+from datetime import datetime
+
+from database.pricing import get_pricing_engine
+from database.seat_bitmap import MAX_SEATS, combine, count, is_set
+
+DEFAULT_CITY = "Bristol"
+
+
+def load_seat_map(conn, showtime_id, hold_token=None, now=None):
+    """Seat map for ``showtime_id`` as a dict, or ``None`` if the showtime does not exist.
+
+    ``screen_id`` is ``None`` when the showtime's screen is missing. Seats
+    held by ``hold_token`` are not flagged as held.
+    """
+    now = now or datetime.now()
+    rows = conn.execute("""
+        SELECT st.id AS showtime_id, st.show_time, st.screen_number, st.cinema_id,
+               f.title, c.city, sc.id AS screen_id,
+               s.id AS seat_id, s.seat_number, s.seat_type, s.row_label, s.col_number,
+               o.bits_lo, o.bits_hi,
+               -- Only consulted when the bitmap cannot answer for this seat
+               CASE WHEN o.showtime_id IS NULL OR s.seat_number > ? THEN EXISTS (
+                   SELECT 1 FROM bookings b WHERE b.showtime_id = st.id AND b.seat_id = s.id
+               ) END AS booked_fallback,
+               h.seat_id IS NOT NULL AS is_held,
+               (SELECT version FROM pricing_version WHERE id = 1) AS pricing_version
+        FROM showtimes st
+        JOIN films f ON f.id = st.film_id
+        LEFT JOIN cinemas c ON c.id = st.cinema_id
+        LEFT JOIN screens sc ON sc.id = (
+            SELECT id FROM screens WHERE cinema_id = st.cinema_id AND screen_number = st.screen_number
+            ORDER BY id LIMIT 1
+        )
+        LEFT JOIN seats s ON s.screen_id = sc.id
+        LEFT JOIN showtime_occupancy o ON o.showtime_id = st.id
+        LEFT JOIN seat_holds h ON h.showtime_id = st.id AND h.seat_id = s.id
+                              AND h.expires_at > ? AND h.hold_token IS NOT ?
+        WHERE st.id = ?
+        ORDER BY s.seat_number
+    """, (MAX_SEATS, now.timestamp(), hold_token, showtime_id)).fetchall()
+    if not rows:
+        return None
+
+    first = rows[0]
+    city = first["city"] or DEFAULT_CITY
+    bits = combine(first["bits_lo"] or 0, first["bits_hi"] or 0)
+    seats = [
+        {"id": row["seat_id"], "seat_number": row["seat_number"], "seat_type": row["seat_type"],
+         "row_label": row["row_label"], "col_number": row["col_number"],
+         "is_booked": int(is_set(bits, row["seat_number"]) if row["booked_fallback"] is None
+                          else row["booked_fallback"]),
+         "is_held": row["is_held"]}
+        for row in rows if row["seat_id"] is not None
+    ]
+
+    pricing = get_pricing_engine(conn, first["pricing_version"])
+    for seat, price in zip(seats, pricing.prices_for(city, first["show_time"], [s["seat_type"] for s in seats])):
+        seat["price"] = price
+
+    if first["bits_lo"] is not None and all(seat["seat_number"] <= MAX_SEATS for seat in seats):
+        booked = count(bits)
+    else:
+        booked = sum(seat["is_booked"] for seat in seats)
+    occupancy = booked / len(seats) if seats else 1
+    show_dt = datetime.strptime(first["show_time"], "%Y-%m-%d %H:%M:%S")
+
+    return {
+        "showtime": {"id": first["showtime_id"], "show_time": first["show_time"], "title": first["title"],
+                     "screen_number": first["screen_number"], "cinema_id": first["cinema_id"]},
+        "city": city,
+        "screen_id": first["screen_id"],
+        "seats": seats,
+        "total_seats": len(seats),
+        "booked_seats": booked,
+        "occupancy": occupancy,
+        "discount_eligible": any(
+            rule["code"] == "last_minute" for rule in pricing.discounts(1, show_dt, now, occupancy)
+        ),
+    }
@@ -15,4 +15,103 @@ def client():
 
     with app.test_client() as client:
         with app.app_context():
-            yield client
\ No newline at end of file
+            yield client
+
+@pytest.fixture
+def db_path(tmp_path):
+    from database.database_setup import initialize_database, close_all_pools
+
+    path = str(tmp_path / "horizon_cinemas_test.db")
+    initialize_database(db_path=path)
+    yield path
+    close_all_pools()
+
+
+@pytest.fixture
+def temp_app(db_path):
+    app = create_app(testing=True)
+    app.config["DATABASE"] = db_path
+    return app
+
+
+@pytest.fixture
+def temp_client(temp_app):
+    with temp_app.test_client() as client:
+        with temp_app.app_context():
+            yield client
+
+
+@pytest.fixture
+def staff_client(temp_client, db_path):
+    """Test client logged in (JWT cookie) as a freshly seeded user."""
+    import sqlite3
+    from flask_jwt_extended import create_access_token
+
+    conn = sqlite3.connect(db_path)
+    user_id = conn.execute(
+        "INSERT INTO users (username, password, role) VALUES ('manager1', 'x', 'manager')"
+    ).lastrowid
+    conn.commit()
+    conn.close()
+
+    temp_client.set_cookie("access_token_cookie",
+                           create_access_token(identity=str(user_id), additional_claims={"role": "manager"}))
+    temp_client.user_id = user_id
+    return temp_client
+
+
+@pytest.fixture
+def seeded_showtime(db_path):
+    """A Bristol cinema with one 50-seat screen and an evening showtime in two days."""
+    import sqlite3
+    from datetime import datetime, timedelta
+
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    cursor.execute("INSERT INTO cinemas (city, location, num_of_screens) VALUES ('Bristol', 'Cabot Circus', 1)")
+    cinema_id = cursor.lastrowid
+    cursor.execute("INSERT INTO screens (cinema_id, screen_number, total_seats) VALUES (?, 1, 50)", (cinema_id,))
+    screen_id = cursor.lastrowid
+    seat_types = ["Lower Hall"] * 15 + ["Upper Gallery"] * 25 + ["VIP"] * 10
+    cursor.executemany("INSERT INTO seats (screen_id, seat_number, seat_type) VALUES (?, ?, ?)",
+                       [(screen_id, n, seat_type) for n, seat_type in enumerate(seat_types, start=1)])
+    cursor.execute("INSERT INTO films (title, genre, age_rating) VALUES ('Arrival', 'Sci-Fi', '12A')")
+    film_id = cursor.lastrowid
+    show_time = (datetime.now() + timedelta(days=2)).replace(hour=19, minute=0, second=0).strftime("%Y-%m-%d %H:%M:%S")
+    cursor.execute("INSERT INTO showtimes (film_id, cinema_id, screen_number, show_time, price) VALUES (?, ?, 1, ?, 8)",
+                   (film_id, cinema_id, show_time))
+    showtime_id = cursor.lastrowid
+    seat_ids = [row[0] for row in cursor.execute("SELECT id FROM seats WHERE screen_id = ? ORDER BY seat_number",
+                                                 (screen_id,))]
+    conn.commit()
+    conn.close()
+
+    return {"cinema_id": cinema_id, "screen_id": screen_id, "film_id": film_id,
+            "showtime_id": showtime_id, "show_time": show_time, "seat_ids": seat_ids}
+
+
+@pytest.fixture
+def seed_catalogue(db_path):
+    """Factory seeding ``films`` films, each showing ``showtimes`` times spread over ``cinemas`` cinemas."""
+    import sqlite3
+
+    def seed(films=1000, cinemas=20, showtimes=3):
+        conn = sqlite3.connect(db_path)
+        cinema_ids = [
+            conn.execute("INSERT INTO cinemas (city, location, num_of_screens) VALUES (?, ?, 1)",
+                         (f"City {n}", f"Site {n}")).lastrowid
+            for n in range(cinemas)
+        ]
+        first = conn.execute("SELECT COALESCE(MAX(id), 0) FROM films").fetchone()[0] + 1
+        conn.executemany("INSERT INTO films (title, genre, age_rating) VALUES (?, 'Drama', '12A')",
+                         [(f"Film {n}",) for n in range(films)])
+        conn.executemany(
+            "INSERT INTO showtimes (film_id, cinema_id, screen_number, show_time, price) VALUES (?, ?, 1, ?, 8)",
+            [(film_id, cinema_ids[(film_id + k) % cinemas], f"2025-04-{1 + k % 28:02d} {10 + k % 12}:00:00")
+             for film_id in range(first, first + films) for k in range(showtimes)]
+        )
+        conn.commit()
+        conn.close()
+        return cinema_ids
+
+    return seed
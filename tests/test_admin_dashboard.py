@@ -0,0 +1,81 @@
+import json
+import sqlite3
+
+import pytest
+
+from database.catalogue import film_catalogue, iter_film_catalogue
+
+
+@pytest.fixture
+def conn(db_path):
+    conn = sqlite3.connect(db_path)
+    yield conn
+    conn.close()
+
+
+def test_catalogue_is_one_query(conn, seed_catalogue):
+    seed_catalogue(films=300, cinemas=10)
+    statements = []
+    conn.set_trace_callback(statements.append)
+
+    films, film_cinemas, next_after = film_catalogue(conn.cursor())
+
+    assert len(statements) == 1
+    assert len(films) == 300 and next_after is None
+    assert len(film_cinemas[films[0]["id"]]) == 3
+    assert films[0]["showtimes"].count(",") == 2
+
+
+def test_catalogue_reads_each_film_by_index(conn, seed_catalogue):
+    # Timings across catalogue sizes live in benchmarks/bench_admin_dashboard.py
+    seed_catalogue(films=50)
+    statements = []
+    conn.set_trace_callback(statements.append)
+    film_catalogue(conn.cursor())
+    film_catalogue(conn.cursor(), limit=10, after_id=20)
+    conn.set_trace_callback(None)
+
+    for sql in statements:
+        plan = " | ".join(row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}"))
+        assert "USING INTEGER PRIMARY KEY (rowid>?)" in plan
+        assert "SEARCH st USING INDEX idx_showtimes_film" in plan
+        assert "SEARCH c USING INTEGER PRIMARY KEY" in plan
+        assert "SCAN" not in plan
+
+
+def test_keyset_pages_cover_catalogue(conn, seed_catalogue):
+    seed_catalogue(films=25, cinemas=3)
+
+    page, _, after = film_catalogue(conn.cursor(), limit=10)
+    assert len(page) == 10 and after == page[-1]["id"]
+    assert [film["title"] for film, _ in iter_film_catalogue(conn.cursor(), page_size=10)] == \
+        [f"Film {n}" for n in range(25)]
+
+
+def test_dashboard_pages_and_streams(staff_client, seed_catalogue):
+    seed_catalogue(films=5, cinemas=2)
+
+    first = staff_client.get("/admin_dashboard?per_page=2")
+    assert first.status_code == 200
+    assert b"Film 1" in first.data and b"Film 2" not in first.data
+    assert b"after=2" in first.data
+
+    last = staff_client.get("/admin_dashboard?per_page=2&after=4")
+    assert b"Film 4" in last.data and b"Next Page" not in last.data
+
+    assert staff_client.get("/admin_dashboard?per_page=0").status_code == 400
+    assert staff_client.get("/admin_dashboard?per_page=-5").status_code == 400
+
+    lines = staff_client.get("/admin_dashboard/films.jsonl").data.decode().splitlines()
+    films = [json.loads(line) for line in lines]
+    assert [film["title"] for film in films] == [f"Film {n}" for n in range(5)]
+    assert all(film["cinemas"] for film in films)
+
+
+def test_dashboard_page_size_is_capped(staff_client, seed_catalogue):
+    staff_client.application.config["ADMIN_DASHBOARD_PAGE_SIZE"] = 2
+    seed_catalogue(films=20, cinemas=2)
+
+    page = staff_client.get("/admin_dashboard?per_page=1000000").data
+    assert b"Film 7" in page and b"Film 8" not in page
+    assert b"after=8" in page
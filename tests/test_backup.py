@@ -0,0 +1,102 @@
+import sqlite3
+from datetime import datetime, timedelta
+
+import pytest
+
+from database.backup import (
+    BackupError, BackupScheduler, copy_database, create_backup, list_backups, restore_backup,
+    rotate_backups, verify_backup,
+)
+
+
+def count_bookings(path):
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute("SELECT COUNT(*) FROM bookings").fetchone()[0]
+    finally:
+        conn.close()
+
+
+@pytest.fixture
+def booked_db(db_path, seeded_showtime):
+    conn = sqlite3.connect(db_path)
+    conn.executemany(
+        "INSERT INTO bookings (showtime_id, seat_id, booking_reference, total_price) VALUES (?, ?, 'REF', 8)",
+        [(seeded_showtime["showtime_id"], seat_id) for seat_id in seeded_showtime["seat_ids"][:10]]
+    )
+    conn.commit()
+    conn.close()
+    return db_path
+
+
+def test_backup_is_verified_and_restorable(booked_db, tmp_path):
+    path = create_backup(booked_db, tmp_path / "backups")
+
+    assert list_backups(tmp_path / "backups") == [path]
+    assert verify_backup(path) == []
+    assert count_bookings(path) == 10
+
+    conn = sqlite3.connect(booked_db)
+    conn.execute("DELETE FROM bookings")
+    conn.commit()
+    restore_backup(path, booked_db)
+    # An already-open connection sees the restored rows
+    assert conn.execute("SELECT COUNT(*) FROM bookings").fetchone()[0] == 10
+    conn.close()
+
+
+def test_damaged_backup_is_rejected(booked_db, tmp_path):
+    path = create_backup(booked_db, tmp_path)
+    with open(path, "r+b") as f:
+        f.seek(4096)
+        f.write(b"\xff" * 8192)
+
+    assert verify_backup(path) != []
+    with pytest.raises(BackupError):
+        restore_backup(path, booked_db)
+    assert count_bookings(booked_db) == 10
+
+
+class RestartingSource:
+    """Source whose page-stepped copy keeps restarting, as under heavy write load."""
+
+    def __init__(self, settles_at=None):
+        self.settles_at = settles_at
+        self.calls = []
+
+    def backup(self, dest, pages=-1, progress=None, sleep=0.25):
+        self.calls.append(pages)
+        if 0 < pages < (self.settles_at or float("inf")):
+            for remaining in [90, 80, 80, 100]:
+                progress(0, remaining, 100)
+
+
+def test_copy_retries_with_larger_steps_then_one_step():
+    source = RestartingSource(settles_at=160)
+    assert copy_database(source, None, pages=10, max_restarts=5) == 2
+    assert source.calls == [10, 40, 160]
+
+    source = RestartingSource()
+    assert copy_database(source, None, pages=10, max_restarts=2) == 3
+    assert source.calls == [10, 40, 160, -1]
+
+
+def test_rotation_keeps_latest_and_one_per_day(booked_db, tmp_path):
+    start = datetime(2025, 3, 1, 9, 0, 0)
+    for day in range(5):
+        for hour in (0, 6):
+            create_backup(booked_db, tmp_path, now=start + timedelta(days=day, hours=hour))
+
+    removed = rotate_backups(tmp_path, keep_last=3, keep_daily=3)
+
+    kept = [f"{path.rsplit('-', 2)[1]}-{path.rsplit('-', 2)[2][:4]}" for path in list_backups(tmp_path)]
+    assert kept == ["20250305-1500", "20250305-0900", "20250304-1500", "20250303-1500"]
+    assert len(removed) == 6
+
+
+def test_scheduler_skips_when_a_recent_backup_exists(booked_db, tmp_path):
+    scheduler = BackupScheduler(booked_db, str(tmp_path), interval=3600)
+
+    assert scheduler.backup() is not None
+    assert scheduler.backup() is None
+    assert len(list_backups(tmp_path)) == 1
@@ -0,0 +1,82 @@
+import sqlite3
+import threading
+
+import pytest
+
+from database.booking_engine import SeatConflict, SeatNotFound, book_seats
+
+
+def book(db_path, showtime_id, seat_ids, reference):
+    conn = sqlite3.connect(db_path, timeout=10)
+    try:
+        return book_seats(conn, showtime_id, seat_ids, "Ada", "ada@example.com", "0123",
+                          None, reference, price_for=lambda seat_type: 8.0)
+    finally:
+        conn.close()
+
+
+def test_booking_is_all_or_nothing_with_conflict_list(db_path, seeded_showtime):
+    showtime_id, seats = seeded_showtime["showtime_id"], seeded_showtime["seat_ids"]
+    book(db_path, showtime_id, seats[:2], "first")
+
+    with pytest.raises(SeatConflict) as excinfo:
+        book(db_path, showtime_id, seats[1:4], "second")
+    assert excinfo.value.seat_ids == [seats[1]]
+
+    with pytest.raises(SeatNotFound):
+        book(db_path, showtime_id, [seats[5], 999999], "third")
+
+    conn = sqlite3.connect(db_path)
+    refs = conn.execute("SELECT booking_reference FROM booking_orders").fetchall()
+    assert refs == [("first",)]
+    conn.close()
+
+
+def test_unique_index_rejects_double_sale_outside_engine(db_path, seeded_showtime):
+    book(db_path, seeded_showtime["showtime_id"], seeded_showtime["seat_ids"][:1], "first")
+
+    conn = sqlite3.connect(db_path)
+    with pytest.raises(sqlite3.IntegrityError):
+        conn.execute("INSERT INTO bookings (showtime_id, seat_id) VALUES (?, ?)",
+                     (seeded_showtime["showtime_id"], seeded_showtime["seat_ids"][0]))
+    conn.close()
+
+
+def test_concurrent_tills_never_double_book(db_path, seeded_showtime):
+    showtime_id, seats = seeded_showtime["showtime_id"], seeded_showtime["seat_ids"]
+    outcomes = []
+
+    def till(n):
+        # Overlapping baskets: every till wants seats n and n + 1
+        try:
+            book(db_path, showtime_id, seats[n % 10:n % 10 + 2], f"till{n}")
+            outcomes.append("booked")
+        except SeatConflict:
+            outcomes.append("conflict")
+
+    threads = [threading.Thread(target=till, args=(n,)) for n in range(40)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    conn = sqlite3.connect(db_path)
+    booked = conn.execute("SELECT seat_id FROM bookings WHERE showtime_id = ?", (showtime_id,)).fetchall()
+    conn.close()
+    assert len(booked) == len(set(booked)) == 2 * outcomes.count("booked")
+    assert len(outcomes) == 40
+
+
+def test_book_route_returns_conflicts(staff_client, seeded_showtime):
+    payload = {
+        "showtime_id": seeded_showtime["showtime_id"],
+        "customer_name": "Ada",
+        "customer_email": "ada@example.com",
+        "customer_phone": "0123",
+        "seat_ids": [str(seat_id) for seat_id in seeded_showtime["seat_ids"][:2]],
+    }
+    assert staff_client.post("/book", json=payload).status_code == 201
+
+    response = staff_client.post("/book", json=payload)
+    assert response.status_code == 409
+    assert response.get_json()["conflicts"] == seeded_showtime["seat_ids"][:2]
@@ -0,0 +1,90 @@
+import sqlite3
+
+import pytest
+
+from database.booking_engine import book_seats
+from database.booking_orders import TRIGGERS, convert_bookings, create_order_triggers, load_order
+from database.refunds import refund_references
+
+
+@pytest.fixture
+def conn(db_path):
+    conn = sqlite3.connect(db_path)
+    yield conn
+    conn.close()
+
+
+def order(conn, reference):
+    return conn.execute("SELECT id, customer_email, seat_count, total_price FROM booking_orders "
+                        "WHERE booking_reference = ?", (reference,)).fetchone()
+
+
+def test_engine_writes_one_header_and_bare_lines(conn, seeded_showtime):
+    showtime_id, seats = seeded_showtime["showtime_id"], seeded_showtime["seat_ids"]
+    book_seats(conn, showtime_id, seats[:3], "Ada", "ada@example.com", "0123", None, "ORD1",
+               price_for=lambda seat_type: 8.0)
+
+    order_id, email, seat_count, total = order(conn, "ORD1")
+    assert (email, seat_count, total) == ("ada@example.com", 3, 24)
+    lines = conn.execute("SELECT order_id, booking_reference, customer_email, booking_date FROM bookings").fetchall()
+    assert lines == [(order_id, None, None, None)] * 3
+
+    conn.execute("UPDATE bookings SET total_price = 10 WHERE seat_id = ?", (seats[0],))
+    conn.execute("DELETE FROM bookings WHERE seat_id = ?", (seats[1],))
+    conn.commit()
+    assert order(conn, "ORD1")[2:] == (2, 18)
+
+    refund_references(conn, ["ORD1"], share=1, enforce_notice=False, notify=False)
+    assert order(conn, "ORD1") is None
+
+
+def test_legacy_inserts_are_adopted_by_reference(conn, seeded_showtime):
+    showtime_id, seats = seeded_showtime["showtime_id"], seeded_showtime["seat_ids"]
+    conn.executemany("""
+        INSERT INTO bookings (customer_email, showtime_id, seat_id, booking_reference, total_price)
+        VALUES ('legacy@example.com', ?, ?, 'OLD1', 7.5)
+    """, [(showtime_id, seat_id) for seat_id in seats[:2]])
+    conn.commit()
+
+    order_id, email, seat_count, total = order(conn, "OLD1")
+    assert (email, seat_count, total) == ("legacy@example.com", 2, 15)
+    assert conn.execute("SELECT DISTINCT order_id FROM bookings").fetchall() == [(order_id,)]
+
+
+def test_convert_attaches_lines_to_headers(conn, seeded_showtime):
+    showtime_id, seats = seeded_showtime["showtime_id"], seeded_showtime["seat_ids"]
+    for trigger in TRIGGERS:
+        conn.execute(f"DROP TRIGGER {trigger}")
+    conn.executemany("""
+        INSERT INTO bookings (customer_name, customer_email, showtime_id, seat_id, booking_reference, total_price)
+        VALUES ('Ada', 'ada@example.com', ?, ?, ?, 8)
+    """, [(showtime_id, seat_id, f"CONV{n // 2}") for n, seat_id in enumerate(seats[:6])])
+
+    assert convert_bookings(conn.cursor()) == 3
+    create_order_triggers(conn.cursor())
+    conn.commit()
+
+    assert [order(conn, f"CONV{n}")[2:] for n in range(3)] == [(2, 16)] * 3
+    assert conn.execute("SELECT COUNT(*) FROM bookings WHERE order_id IS NULL").fetchone()[0] == 0
+    assert load_order(conn.cursor(), "CONV1")["seat_numbers"] == [3, 4]
+
+
+def test_receipt_and_refund_read_the_header(staff_client, seeded_showtime, conn):
+    booked = staff_client.post("/book", json={
+        "showtime_id": seeded_showtime["showtime_id"], "customer_name": "Ada", "customer_email": "ada@example.com",
+        "customer_phone": "0123", "seat_ids": seeded_showtime["seat_ids"][:2],
+    }).get_json()
+    reference = booked["booking_reference"]
+
+    page = staff_client.get(f"/receipt/{reference}")
+    assert page.status_code == 200 and b"1, 2" in page.data and b"manager1" in page.data
+    assert staff_client.get("/receipt/nope").status_code == 404
+
+    plan = " | ".join(row[3] for row in conn.execute(
+        "EXPLAIN QUERY PLAN SELECT id FROM booking_orders WHERE booking_reference = ?", (reference,)))
+    assert "USING" in plan and "INDEX" in plan
+
+    staff_client.post("/process_refund", data={"order_id": order(conn, reference)[0]})
+    assert order(conn, reference) is None
+    assert conn.execute("SELECT COUNT(*) FROM cancellations WHERE booking_reference = ?",
+                        (reference,)).fetchone()[0] == 2
@@ -0,0 +1,77 @@
+import sqlite3
+
+import pytest
+
+from database.booking_references import (
+    ALPHABET, LENGTH, InvalidReference, allocate_reference, encode_reference, parse_reference,
+)
+from database.refunds import refund_references
+
+
+def book(client, seeded_showtime, seat_ids):
+    return client.post("/book", json={
+        "showtime_id": seeded_showtime["showtime_id"], "customer_name": "Ada", "customer_email": "ada@example.com",
+        "customer_phone": "0123", "seat_ids": seat_ids,
+    }).get_json()["booking_reference"]
+
+
+def test_references_round_trip_and_catch_typos():
+    reference = encode_reference(123456789)
+    assert len(reference) == LENGTH and parse_reference(reference) == reference
+    assert parse_reference(f" {reference[:4]}-{reference[4:].lower()} ") == reference
+    assert parse_reference(reference.replace("0", "O")) == reference
+
+    for position in range(LENGTH):
+        for char in ALPHABET:
+            if char != reference[position]:
+                with pytest.raises(InvalidReference):
+                    parse_reference(reference[:position] + char + reference[position + 1:])
+
+    # Older references, names and phone numbers are not our shape
+    assert parse_reference("4e873a2b") is None
+    assert parse_reference("Annabeths") is None
+    assert parse_reference("REF03") is None
+
+
+def test_allocation_is_ordered_and_skips_taken_references(db_path):
+    conn = sqlite3.connect(db_path)
+    conn.execute("BEGIN IMMEDIATE")
+    cursor = conn.cursor()
+    first = allocate_reference(cursor)
+    cursor.execute("INSERT INTO booking_orders (booking_reference) VALUES (?)", (encode_reference(2),))
+    assert allocate_reference(cursor) == encode_reference(3) > first == encode_reference(1)
+    conn.rollback()
+    conn.close()
+
+
+def test_booking_issues_sequential_references(staff_client, seeded_showtime):
+    seats = seeded_showtime["seat_ids"]
+    references = [book(staff_client, seeded_showtime, seats[n:n + 1]) for n in range(3)]
+    assert references == sorted(references) and len(set(references)) == 3
+    assert all(parse_reference(reference) == reference for reference in references)
+
+    assert staff_client.get(f"/receipt/{references[0].lower()}").status_code == 200
+    mistyped = references[0][:-1] + ("0" if references[0][-1] != "0" else "1")
+    assert staff_client.get(f"/receipt/{mistyped}").status_code == 404
+
+    response = staff_client.post("/bulk_refund", json={"booking_references": [references[1], mistyped]})
+    assert response.status_code == 400 and response.get_json()["booking_references"] == [mistyped]
+
+    # Early references are all digits and could be a phone prefix, so the search only rejects lettered ones
+    lettered = encode_reference(123456789)
+    lettered = lettered[:-1] + ("0" if lettered[-1] != "0" else "1")
+    assert b"typo" in staff_client.get(f"/refund?ref={lettered}").data
+    # A broken page link falls back to the first page, which still reports the typo
+    page = staff_client.get(f"/refund?ref={lettered}&after=not-a-cursor")
+    assert page.status_code == 200 and b"typo" in page.data and b"Invalid page link" in page.data
+
+
+def test_mistyped_references_never_reach_the_database(db_path):
+    statements = []
+    conn = sqlite3.connect(db_path)
+    conn.set_trace_callback(statements.append)
+    reference = encode_reference(42)
+    with pytest.raises(InvalidReference):
+        refund_references(conn, [reference[:-1] + ("0" if reference[-1] != "0" else "1")])
+    conn.close()
+    assert statements == []
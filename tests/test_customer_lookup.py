@@ -0,0 +1,91 @@
+import sqlite3
+
+import pytest
+
+from database.customer_lookup import EMAIL_KEY, NAME_KEY, PHONE_KEY, classify, find_bookings
+
+
+@pytest.fixture
+def conn(db_path, seeded_showtime):
+    conn = sqlite3.connect(db_path)
+    customers = [
+        ("Ada Lovelace", " Ada@Example.com", "+44 (0)117 496-0001"),
+        ("Adam Smith", "adam@example.com", "0117 496 0002"),
+        ("Grace Hopper", "grace@example.com", "020 7946 0003"),
+    ]
+    rows = []
+    seats = iter(seeded_showtime["seat_ids"])
+    for n, (name, email, phone) in enumerate(customers * 4):
+        for _ in range(2):
+            rows.append((name, email, phone, seeded_showtime["showtime_id"], next(seats), f"REF{n:02d}"))
+    conn.executemany("""
+        INSERT INTO bookings (customer_name, customer_email, customer_phone, showtime_id, seat_id,
+                              booking_reference, total_price)
+        VALUES (?, ?, ?, ?, ?, ?, 7.5)
+    """, rows)
+    conn.commit()
+    yield conn
+    conn.close()
+
+
+def references(groups):
+    return [group["booking_reference"] for group in groups]
+
+
+def test_classify():
+    assert classify(" Ada@Example.COM ") == ("email", "ada@example.com")
+    assert classify("0117 496-") == ("phone", "0117496")
+    assert classify("Ada L") == ("name", "ada l")
+    assert classify("a") is None
+
+
+def test_lookup_by_reference_email_phone_and_name(conn):
+    cursor = conn.cursor()
+
+    groups, next_cursor = find_bookings(cursor, "REF03")
+    assert references(groups) == ["REF03"] and next_cursor is None
+    assert groups[0]["seat_numbers"] == [7, 8]
+    assert groups[0]["total_price"] == 15.0
+
+    assert references(find_bookings(cursor, "ADA@example.com")[0]) == ["REF00", "REF03", "REF06", "REF09"]
+    assert references(find_bookings(cursor, "0117-496")[0]) == ["REF01", "REF04", "REF07", "REF10"]
+    assert references(find_bookings(cursor, "+44 (0) 117")[0]) == ["REF00", "REF03", "REF06", "REF09"]
+    assert references(find_bookings(cursor, "ada")[0]) == [f"REF{n:02d}" for n in (0, 3, 6, 9, 1, 4, 7, 10)]
+    assert references(find_bookings(cursor, "adam ")[0]) == ["REF01", "REF04", "REF07", "REF10"]
+    assert find_bookings(cursor, "nobody") == ([], None)
+
+
+def test_pages_follow_the_cursor(conn):
+    cursor = conn.cursor()
+    seen, after = [], None
+    while True:
+        groups, after = find_bookings(cursor, "ad", after=after, limit=3)
+        seen.append(references(groups))
+        if after is None:
+            break
+
+    assert seen == [["REF00", "REF03", "REF06"], ["REF09", "REF01", "REF04"], ["REF07", "REF10"]]
+    with pytest.raises(ValueError):
+        find_bookings(cursor, "ad", after="not-a-cursor")
+
+
+@pytest.mark.parametrize("key", [EMAIL_KEY, NAME_KEY, PHONE_KEY])
+def test_lookups_are_index_range_scans(conn, key):
+    plan = " | ".join(row[3] for row in conn.execute(f"""
+        EXPLAIN QUERY PLAN
+        SELECT {key}, booking_reference FROM booking_orders
+        WHERE {key} >= ? AND {key} <= ? AND ({key}, booking_reference) > (?, ?)
+        ORDER BY {key}, booking_reference LIMIT 21
+    """, ("a", "b", "a", "")))
+    assert "SEARCH booking_orders USING INDEX idx_orders_" in plan
+    assert "TEMP B-TREE" not in plan
+
+
+def test_refund_page_lists_every_match(staff_client, conn):
+    page = staff_client.get("/refund?ref=grace@example.com")
+    assert page.data.count(b"Confirm Refund") == 4
+
+    first = staff_client.get("/refund?ref=ad").data
+    assert first.count(b"Confirm Refund") == 8
+    assert b"More results" not in first
+    assert b"Booking not found" in staff_client.get("/refund?ref=zz").data
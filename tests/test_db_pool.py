@@ -0,0 +1,55 @@
+import threading
+
+import pytest
+
+from database.database_setup import get_db_connection, get_pool
+from database.pool import ConnectionPool, PoolTimeout
+
+
+def test_pool_reuses_connections_and_tracks_stats(db_path):
+    pool = ConnectionPool(db_path, max_size=2, pragmas={"temp_store": "MEMORY"})
+
+    first = pool.connection()
+    raw = first.raw
+    first.close()
+    second = pool.connection()
+
+    assert second.raw is raw
+    assert second.execute("PRAGMA temp_store").fetchone()[0] == 2
+
+    stats = pool.stats()
+    assert stats["checkouts"] == 2
+    assert stats["created"] == 1
+    assert stats["high_water"] == 1
+    second.close()
+    pool.close()
+
+
+def test_pool_is_bounded_and_waits_for_release(db_path):
+    pool = ConnectionPool(db_path, max_size=1, timeout=0.2)
+    held = pool.connection()
+
+    with pytest.raises(PoolTimeout):
+        pool.acquire()
+
+    threading.Timer(0.05, held.close).start()
+    pool.timeout = 2
+    conn = pool.connection()
+
+    stats = pool.stats()
+    assert stats["waits"] == 2
+    assert stats["timeouts"] == 1
+    assert stats["created"] == 1
+    conn.close()
+    pool.close()
+
+
+def test_app_context_shares_one_connection_until_teardown(temp_app, db_path):
+    with temp_app.app_context():
+        conn = get_db_connection()
+        assert get_db_connection() is conn
+        conn.close()  # route code closing early must not release it
+        conn.execute("SELECT 1")
+        assert get_pool(db_path).stats()["in_use"] == 1
+
+    assert get_pool(db_path).stats()["in_use"] == 0
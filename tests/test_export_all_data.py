@@ -0,0 +1,89 @@
+import os
+import sqlite3
+import subprocess
+import sys
+
+import pytest
+
+from database.export_all_data import export_database, import_database
+from database.migrations import migrate
+from database.reporting import check_reports
+
+
+@pytest.fixture
+def booked_db(db_path, seeded_showtime):
+    conn = sqlite3.connect(db_path)
+    conn.executemany(
+        "INSERT INTO bookings (showtime_id, seat_id, booking_reference, customer_name, total_price, booking_date) "
+        "VALUES (?, ?, 'REF1', ?, 8.5, '2025-03-01 10:00:00')",
+        [(seeded_showtime["showtime_id"], seat_id, None if n % 2 else "") for n, seat_id in
+         enumerate(seeded_showtime["seat_ids"][:5])]
+    )
+    conn.commit()
+    conn.close()
+    return db_path
+
+
+def assert_same_database(original, restored):
+    conn = sqlite3.connect(restored)
+    conn.execute("ATTACH DATABASE ? AS original", (original,))
+    schema = "SELECT type, name, sql FROM {}.sqlite_master ORDER BY type, name"
+    assert conn.execute(schema.format("main")).fetchall() == conn.execute(schema.format("original")).fetchall()
+
+    for (table,) in conn.execute("SELECT name FROM original.sqlite_master WHERE type = 'table'").fetchall():
+        for a, b in (("original", "main"), ("main", "original")):
+            diff = conn.execute(f'SELECT * FROM {a}."{table}" EXCEPT SELECT * FROM {b}."{table}"').fetchall()
+            assert diff == [], table
+    conn.close()
+
+
+def test_jsonl_round_trip_is_exact(booked_db, tmp_path):
+    progress = []
+    manifest = export_database(booked_db, tmp_path / "export", compress=True, jobs=3, chunk_size=20,
+                               progress=lambda *update: progress.append(update))
+
+    assert manifest["tables"]["seats"]["rows"] == 50
+    assert [done for table, done, total in progress if table == "seats"] == [20, 40, 50]
+    assert (tmp_path / "export" / "bookings.jsonl.gz").exists()
+
+    restored = str(tmp_path / "restored.db")
+    counts = import_database(tmp_path / "export", restored, chunk_size=7)
+
+    assert counts["bookings"] == 5
+    assert_same_database(booked_db, restored)
+
+    conn = sqlite3.connect(restored)
+    assert migrate(conn) == []
+    assert check_reports(conn) == []
+    # Restored triggers keep the summaries current for new writes
+    conn.execute("DELETE FROM bookings WHERE id = (SELECT MIN(id) FROM bookings)")
+    assert check_reports(conn) == []
+    conn.close()
+
+
+def test_csv_round_trip_restores_types(booked_db, tmp_path):
+    export_database(booked_db, tmp_path / "export", fmt="csv")
+    restored = str(tmp_path / "restored.db")
+    import_database(tmp_path / "export", restored)
+
+    conn = sqlite3.connect(restored)
+    assert conn.execute("SELECT typeof(total_price), typeof(seat_id) FROM bookings LIMIT 1").fetchone() == (
+        "real", "integer")
+    # CSV cannot keep '' apart from NULL
+    assert conn.execute("SELECT COUNT(*) FROM bookings WHERE customer_name IS NULL").fetchone()[0] == 5
+    assert conn.execute("SELECT typeof(seq) FROM sqlite_sequence LIMIT 1").fetchone() == ("integer",)
+    conn.close()
+
+
+def test_import_refuses_existing_database(booked_db, tmp_path):
+    export_database(booked_db, tmp_path / "export")
+    with pytest.raises(FileExistsError):
+        import_database(tmp_path / "export", booked_db)
+
+
+def test_runs_as_a_script_from_any_directory(booked_db, tmp_path):
+    script = os.path.join(os.path.dirname(__file__), "..", "database", "export_all_data.py")
+    result = subprocess.run([sys.executable, script, "export", str(tmp_path / "out"), "--db", booked_db],
+                            cwd=tmp_path, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    assert (tmp_path / "out" / "manifest.json").exists()
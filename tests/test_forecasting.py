@@ -0,0 +1,60 @@
+import sqlite3
+from datetime import date
+
+import pytest
+
+from database import forecasting
+
+pytestmark = pytest.mark.skipif(not forecasting.is_available(), reason="analytics dependencies not installed")
+
+
+def test_predict_bookings_follows_daily_trend(db_path, seeded_showtime):
+    conn = sqlite3.connect(db_path)
+    film_id, cinema_id = seeded_showtime["film_id"], seeded_showtime["cinema_id"]
+    seats = seeded_showtime["seat_ids"]
+
+    # 1, 2 then 3 seats sold on consecutive days
+    for day, count in ((1, 1), (2, 2), (3, 3)):
+        cursor = conn.execute(
+            "INSERT INTO showtimes (film_id, cinema_id, screen_number, show_time, price) VALUES (?, ?, 1, ?, 8)",
+            (film_id, cinema_id, f"2025-04-0{day} 19:00:00")
+        )
+        conn.executemany(
+            "INSERT INTO bookings (showtime_id, seat_id, customer_name, booking_reference, total_price) VALUES (?, ?, 'Ada', 'ref', 8)",
+            [(cursor.lastrowid, seat_id) for seat_id in seats[:count]]
+        )
+    conn.commit()
+
+    predictions = forecasting.predict_bookings(conn, days_ahead=2, today=date(2025, 4, 3))
+    conn.close()
+
+    assert [row["total_bookings"] for row in predictions] == [5]
+
+
+def test_films_sharing_a_title_are_forecast_separately(db_path, seeded_showtime):
+    conn = sqlite3.connect(db_path)
+    cinema_id, seats = seeded_showtime["cinema_id"], seeded_showtime["seat_ids"]
+    remake = conn.execute("INSERT INTO films (title, genre, age_rating) VALUES ('Arrival', 'Drama', '12A')").lastrowid
+    for film_id, count in ((seeded_showtime["film_id"], 1), (remake, 4)):
+        showtime_id = conn.execute(
+            "INSERT INTO showtimes (film_id, cinema_id, screen_number, show_time, price) VALUES (?, ?, 1, ?, 8)",
+            (film_id, cinema_id, "2025-04-01 19:00:00")
+        ).lastrowid
+        conn.executemany("INSERT INTO bookings (showtime_id, seat_id, booking_reference, total_price) "
+                         "VALUES (?, ?, ?, 8)", [(showtime_id, seat_id, f"ref{film_id}") for seat_id in seats[:count]])
+    conn.commit()
+
+    predictions = forecasting.predict_bookings(conn, today=date(2025, 4, 1))
+    conn.close()
+
+    assert [(row["film_id"], row["title"], row["total_bookings"]) for row in predictions] == [
+        (remake, "Arrival", 4), (seeded_showtime["film_id"], "Arrival", 1)]
+
+
+def test_report_renders_chart_in_memory(staff_client, seeded_showtime, tmp_path, temp_app):
+    temp_app.static_folder = str(tmp_path)
+    response = staff_client.get("/report/predicted_bookings")
+
+    assert response.status_code == 200
+    assert b'src="data:image/png;base64,' in response.data
+    assert not (tmp_path / "charts").exists()
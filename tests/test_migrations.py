@@ -0,0 +1,113 @@
+import sqlite3
+
+import pytest
+
+from database.booking_orders import load_order
+from database.booking_references import encode_reference
+from database.customer_lookup import encode_cursor, find_bookings
+from database.migrations import MIGRATIONS, applied_versions, migrate
+from database.seat_map import load_seat_map
+
+
+def query_plan(conn, sql, params=()):
+    return " | ".join(row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params))
+
+
+@pytest.fixture
+def conn(db_path):
+    conn = sqlite3.connect(db_path)
+    yield conn
+    conn.close()
+
+
+def test_migrations_upgrade_legacy_database_without_data_loss(conn):
+    # Roll the fresh database back to the pre-migration (index-less) schema
+    for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index' AND name LIKE 'idx_%'").fetchall():
+        conn.execute(f"DROP INDEX {name}")
+    conn.execute("DROP TABLE schema_migrations")
+    conn.execute("INSERT INTO bookings (customer_email, showtime_id, seat_id, booking_reference) "
+                 "VALUES ('a@example.com', 1, 1, 'ref1')")
+    conn.commit()
+
+    assert migrate(conn) == [version for version, _, _ in MIGRATIONS]
+    assert migrate(conn) == []
+    assert applied_versions(conn) == {version for version, _, _ in MIGRATIONS}
+    assert conn.execute("SELECT booking_reference FROM bookings").fetchall() == [("ref1",)]
+
+
+@pytest.mark.parametrize("sql, params, index", [
+    ("SELECT COUNT(*) FROM bookings WHERE showtime_id = ?", (1,), "uq_bookings_showtime_seat"),
+    ("SELECT * FROM showtimes WHERE cinema_id = ? AND show_epoch >= ? AND show_epoch < ?", (1, 0, 86400),
+     "idx_showtimes_cinema_epoch"),
+    ("SELECT * FROM showtimes WHERE show_epoch >= ? AND show_epoch < ?", (0, 86400), "idx_showtimes_epoch"),
+    ("SELECT * FROM showtimes WHERE film_id = ?", (1,), "idx_showtimes_film"),
+    ("SELECT id FROM screens WHERE screen_number = ? AND cinema_id = ?", (1, 1), "COVERING INDEX idx_screens_cinema_number"),
+])
+def test_hot_queries_use_indexes(conn, sql, params, index):
+    plan = query_plan(conn, sql, params)
+    assert index in plan
+    assert "SCAN bookings" not in plan
+    assert "USE TEMP B-TREE" not in plan
+
+
+def traced_plans(conn, run):
+    """Query plan of every statement ``run(conn)`` executes."""
+    statements = []
+    conn.set_trace_callback(statements.append)
+    try:
+        run(conn)
+    finally:
+        conn.set_trace_callback(None)
+    return {sql: query_plan(conn, sql) for sql in statements if sql.lstrip().upper().startswith("SELECT")}
+
+
+@pytest.mark.parametrize("query, indexes", [
+    (encode_reference(1), ["sqlite_autoindex_booking_orders_1"]),
+    (" Ada@Example.com ", ["idx_orders_email_key", "idx_bookings_order"]),
+    ("0123 456", ["idx_orders_phone_key", "idx_bookings_order"]),
+    ("ad", ["idx_orders_name_key", "idx_bookings_order"]),
+])
+def test_refund_search_uses_indexes(conn, query, indexes):
+    plans = traced_plans(conn, lambda conn: find_bookings(conn.cursor(), query))
+    plans.update(traced_plans(conn, lambda conn: find_bookings(conn.cursor(), "ad", after=encode_cursor("ad", "R"))))
+    combined = " | ".join(plans.values())
+    for index in indexes:
+        assert index in combined
+    assert "SCAN bookings" not in combined and "SCAN booking_orders" not in combined
+
+
+def test_receipt_and_seat_map_use_indexes(conn):
+    conn.row_factory = sqlite3.Row
+    plans = traced_plans(conn, lambda conn: (load_order(conn.cursor(), encode_reference(1)), load_seat_map(conn, 1)))
+    combined = " | ".join(plans.values())
+    for index in ("sqlite_autoindex_booking_orders_1", "COVERING INDEX idx_screens_cinema_number",
+                  "idx_seats_screen_number_type", "COVERING INDEX uq_bookings_showtime_seat"):
+        assert index in combined
+    assert "SCAN" not in combined
+    assert not {"idx_bookings_reference", "idx_bookings_email"} & {
+        row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+
+
+def test_partial_migration_keeps_writes_working(tmp_path, monkeypatch):
+    import database.database_setup as database_setup
+    from database.occupancy import check_occupancy
+    from database.reporting import check_reports
+
+    path = str(tmp_path / "partial.db")
+    monkeypatch.setattr(database_setup, "migrate", lambda conn: migrate(conn, target=12))
+    database_setup.initialize_database(db_path=path)
+
+    conn = sqlite3.connect(path)
+    conn.execute("INSERT INTO cinemas (city, location, num_of_screens) VALUES ('Bristol', 'Centre', 1)")
+    conn.execute("INSERT INTO films (title, genre, age_rating) VALUES ('Arrival', 'Drama', '12A')")
+    conn.execute("INSERT INTO showtimes (film_id, cinema_id, screen_number, show_time, price) "
+                 "VALUES (1, 1, 1, '2025-02-10 19:00:00', 8)")
+    conn.execute("INSERT INTO bookings (showtime_id, seat_id, booking_reference, total_price, booking_date) "
+                 "VALUES (1, 1, 'ref1', 8, '2025-02-01 12:00:00')")
+    conn.commit()
+    assert conn.execute("SELECT SUM(bookings) FROM report_daily_film_sales").fetchone()[0] == 1
+    assert conn.execute("SELECT booked FROM showtime_occupancy").fetchone()[0] == 1
+
+    assert migrate(conn) == [version for version, _, _ in MIGRATIONS if version > 12]
+    assert check_reports(conn) == [] and check_occupancy(conn) == []
+    conn.close()
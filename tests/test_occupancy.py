@@ -0,0 +1,75 @@
+import sqlite3
+
+import pytest
+
+from database.occupancy import (
+    TRIGGERS, OccupancyReconciler, check_occupancy, create_occupancy_triggers, get_occupancy, rebuild_occupancy,
+)
+from database.seat_layout import insert_layout, layout_seats, sync_seats
+
+
+@pytest.fixture
+def conn(db_path):
+    conn = sqlite3.connect(db_path)
+    yield conn
+    conn.close()
+
+
+def test_counters_follow_bookings_refunds_and_resizes(staff_client, seeded_showtime, conn):
+    showtime_id, seats = seeded_showtime["showtime_id"], seeded_showtime["seat_ids"]
+    assert get_occupancy(conn.cursor(), showtime_id) == (0, 50)
+
+    booked = staff_client.post("/book", json={
+        "showtime_id": showtime_id, "customer_name": "Ada", "customer_email": "ada@example.com",
+        "customer_phone": "0123", "seat_ids": seats[:3],
+    }).get_json()
+    assert get_occupancy(conn.cursor(), showtime_id) == (3, 50)
+
+    order_id = conn.execute("SELECT id FROM booking_orders WHERE booking_reference = ?",
+                            (booked["booking_reference"],)).fetchone()[0]
+    staff_client.post("/process_refund", data={"order_id": order_id})
+    assert get_occupancy(conn.cursor(), showtime_id) == (0, 50)
+    assert check_occupancy(conn) == []
+
+    # Resizing this screen moves the capacity; another screen in the cinema does not
+    sync_seats(conn.cursor(), seeded_showtime["screen_id"], layout_seats(60))
+    cursor = conn.execute("INSERT INTO screens (cinema_id, screen_number, total_seats) VALUES (?, 2, 80)",
+                          (seeded_showtime["cinema_id"],))
+    insert_layout(cursor, cursor.lastrowid, layout_seats(80))
+    conn.commit()
+    assert get_occupancy(conn.cursor(), showtime_id)[1] == 60
+
+    conn.execute("UPDATE showtimes SET screen_number = 2 WHERE id = ?", (showtime_id,))
+    conn.commit()
+    assert get_occupancy(conn.cursor(), showtime_id)[1] == 80
+    assert check_occupancy(conn) == []
+
+    conn.execute("DELETE FROM showtimes WHERE id = ?", (showtime_id,))
+    assert get_occupancy(conn.cursor(), showtime_id) is None
+
+
+def test_drift_is_detected_and_repaired(db_path, seeded_showtime, conn):
+    showtime_id = seeded_showtime["showtime_id"]
+    conn.execute("UPDATE showtime_occupancy SET booked = 7 WHERE showtime_id = ?", (showtime_id,))
+    conn.execute("INSERT INTO showtime_occupancy (showtime_id, capacity, booked) VALUES (999, 1, 0)")
+    conn.commit()
+
+    assert check_occupancy(conn) == [(showtime_id, (50, 7, 0, 0), (50, 0, 0, 0)), (999, (1, 0, 0, 0), None)]
+    assert rebuild_occupancy(conn) == 1
+    assert check_occupancy(conn) == []
+
+    conn.execute("DELETE FROM showtime_occupancy")
+    conn.commit()
+    assert OccupancyReconciler(db_path).reconcile() == [(showtime_id, None, (50, 0, 0, 0))]
+    assert get_occupancy(conn.cursor(), showtime_id) == (0, 50)
+
+
+def test_live_triggers_come_from_this_module(conn):
+    def trigger_sql():
+        return dict(conn.execute("SELECT name, sql FROM sqlite_master WHERE type = 'trigger' AND name IN "
+                                 f"({', '.join('?' * len(TRIGGERS))})", TRIGGERS).fetchall())
+
+    migrated = trigger_sql()
+    assert set(migrated) == set(TRIGGERS)
+    create_occupancy_triggers(conn.cursor())
+    assert trigger_sql() == migrated
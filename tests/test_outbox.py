@@ -0,0 +1,124 @@
+import socket
+import sqlite3
+import time
+
+import pytest
+from flask import Flask
+from flask_mail import Mail
+
+from database.database_setup import run_write_transaction
+from database.outbox import claim_batch, drain, enqueue_email, flask_mail_sender, outbox_stats, requeue_dead
+
+
+@pytest.fixture
+def conn(db_path):
+    conn = sqlite3.connect(db_path)
+    yield conn
+    conn.close()
+
+
+def queue(conn, count, now=None):
+    return run_write_transaction(conn, lambda cursor: [
+        enqueue_email(cursor, f"guest{i}@example.com", "Hello", "Body", now=now) for i in range(count)
+    ])
+
+
+def book(client, showtime_id, seat_ids):
+    return client.post("/book", json={
+        "showtime_id": showtime_id,
+        "customer_name": "Ada",
+        "customer_email": "ada@example.com",
+        "customer_phone": "0123",
+        "seat_ids": seat_ids,
+    })
+
+
+def test_booking_queues_confirmation_in_its_transaction(staff_client, seeded_showtime, conn):
+    showtime_id, seats = seeded_showtime["showtime_id"], seeded_showtime["seat_ids"]
+
+    response = book(staff_client, showtime_id, seats[:2])
+    assert response.status_code == 201
+    reference = response.get_json()["booking_reference"]
+
+    rows = conn.execute("SELECT kind, recipient, status, body FROM email_outbox").fetchall()
+    assert len(rows) == 1
+    assert rows[0][:3] == ("booking_confirmation", "ada@example.com", "pending")
+    assert reference in rows[0][3]
+
+    # A rejected basket rolls back its email along with the booking
+    assert book(staff_client, showtime_id, seats[1:3]).status_code == 409
+    assert conn.execute("SELECT COUNT(*) FROM email_outbox").fetchone()[0] == 1
+
+
+def test_drain_retries_with_backoff_then_dead_letters(conn):
+    ok, bad = queue(conn, 2, now=100)
+
+    def send_batch(rows):
+        return {bad: "550 mailbox unavailable"}
+
+    assert drain(conn, send_batch, max_attempts=2, base_delay=10, now=100) == (1, 1)
+    status, attempts, next_attempt_at = conn.execute(
+        "SELECT status, attempts, next_attempt_at FROM email_outbox WHERE id = ?", (bad,)
+    ).fetchone()
+    assert (status, attempts, next_attempt_at) == ("pending", 1, 110)
+
+    # Not due yet, then fails for the last time
+    assert drain(conn, send_batch, max_attempts=2, now=105) == (0, 0)
+    assert drain(conn, send_batch, max_attempts=2, now=110) == (0, 1)
+    assert outbox_stats(conn) == {"sent": 1, "dead": 1}
+
+    assert requeue_dead(conn) == 1
+    assert drain(conn, lambda rows: {}) == (1, 0)
+
+
+def test_unreachable_server_fails_whole_batch(conn):
+    queue(conn, 3, now=100)
+
+    def send_batch(rows):
+        raise ConnectionRefusedError("smtp down")
+
+    assert drain(conn, send_batch, now=100) == (0, 3)
+    assert outbox_stats(conn) == {"pending": 3}
+
+
+def test_expired_lease_is_reclaimed(conn):
+    queue(conn, 1, now=100)
+
+    assert len(claim_batch(conn, lease=60, now=100)) == 1
+    # Still leased to the first worker
+    assert claim_batch(conn, now=130) == []
+    # That worker died: the lease runs out and someone else picks it up
+    rows = claim_batch(conn, now=161)
+    assert [row["attempts"] for row in rows] == [2]
+
+
+def test_batch_is_delivered_over_smtp(conn):
+    controller_module = pytest.importorskip("aiosmtpd.controller")
+
+    received = []
+
+    class Handler:
+        async def handle_DATA(self, server, session, envelope):
+            received.append(envelope)
+            return "250 OK"
+
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    controller = controller_module.Controller(Handler(), hostname="127.0.0.1", port=port)
+    controller.start()
+    try:
+        app = Flask(__name__)
+        app.config.update(MAIL_SERVER="127.0.0.1", MAIL_PORT=port,
+                          MAIL_USE_TLS=False, MAIL_DEFAULT_SENDER="box@horizon.test")
+        Mail(app)
+
+        queue(conn, 3, now=time.time() - 1)
+        assert drain(conn, flask_mail_sender(app)) == (3, 0)
+    finally:
+        controller.stop()
+
+    assert sorted(envelope.rcpt_tos[0] for envelope in received) == [
+        "guest0@example.com", "guest1@example.com", "guest2@example.com"
+    ]
+    assert outbox_stats(conn) == {"sent": 3}
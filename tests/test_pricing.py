@@ -0,0 +1,78 @@
+import sqlite3
+from datetime import datetime, timedelta
+
+import pytest
+
+from database.pricing import get_dynamic_price, get_dynamic_prices, get_pricing_engine
+
+
+@pytest.fixture
+def conn(db_path):
+    conn = sqlite3.connect(db_path)
+    yield conn
+    conn.close()
+
+
+def test_batch_prices_match_seeded_grid(conn):
+    seat_types = ["Lower Hall", "Upper Gallery", "VIP", "vip", "upper gallery"]
+
+    for city in ["Birmingham", "Bristol", "Cardiff", "London", "Nowhere"]:
+        for show_time in ["2025-04-10 09:00:00", "2025-04-10 13:00:00", "2025-04-10 19:00:00"]:
+            batch = get_dynamic_prices(conn, city, show_time, seat_types)
+            assert batch == [get_dynamic_price(conn, city, show_time, seat_type) for seat_type in seat_types]
+
+    assert get_dynamic_prices(conn, "London", "2025-04-10 19:00:00", ["Lower Hall", "Upper Gallery", "VIP"]) == [12, 14.4, 17.28]
+    assert get_dynamic_prices(conn, "Nowhere", "2025-04-10 09:00:00", ["Lower Hall"]) == [6]
+
+
+def test_engine_is_rebuilt_when_rules_change(conn):
+    engine = get_pricing_engine(conn)
+    assert get_pricing_engine(conn) is engine
+
+    conn.execute("UPDATE pricing SET lower_hall_price = 9 WHERE city = 'Bristol' AND time_slot = 'evening'")
+    conn.execute("UPDATE seat_type_pricing SET multiplier = 2 WHERE seat_type = 'VIP'")
+    conn.commit()
+
+    assert get_pricing_engine(conn) is not engine
+    assert get_dynamic_prices(conn, "Bristol", "2025-04-10 19:00:00", ["Lower Hall", "VIP"]) == [9, 18]
+
+
+def test_discount_rules(conn):
+    engine = get_pricing_engine(conn)
+    now = datetime(2025, 4, 10, 18, 40)
+    show = datetime(2025, 4, 10, 19, 0)
+
+    assert [r["code"] for r in engine.discounts(4, show, now, occupancy=0.5)] == ["family", "last_minute"]
+    assert [r["code"] for r in engine.discounts(2, show, now, occupancy=0.8)] == []
+    assert [r["code"] for r in engine.discounts(2, show + timedelta(hours=1), now, occupancy=0.1)] == []
+
+
+def test_view_showtime_prices_every_seat(staff_client, seeded_showtime):
+    response = staff_client.get(f"/view_showtime/{seeded_showtime['showtime_id']}")
+    assert response.status_code == 200
+    # Bristol evening: Lower Hall 8, Upper Gallery 9.6, VIP 11.52
+    for price in (b'data-seat-price="8', b'data-seat-price="9.6"', b'data-seat-price="11.52"'):
+        assert price in response.data
+
+
+def test_admin_price_change_reaches_bookings(staff_client, seeded_showtime):
+    response = staff_client.post("/manage_pricing", data={
+        "kind": "base", "city": "Bristol", "time_slot": "evening", "price": "10"
+    })
+    assert response.status_code == 302
+
+    response = staff_client.post("/book", json={
+        "showtime_id": seeded_showtime["showtime_id"],
+        "customer_name": "Ada",
+        "customer_email": "ada@example.com",
+        "customer_phone": "0123",
+        "seat_ids": seeded_showtime["seat_ids"][:1],
+    })
+    assert response.get_json()["total_price"] == 10
+
+
+def test_unknown_time_slot_is_rejected(staff_client, seeded_showtime):
+    response = staff_client.post("/manage_pricing", data={
+        "kind": "base", "city": "Bristol", "time_slot": "19:00", "price": "10"
+    }, follow_redirects=True)
+    assert response.status_code == 200 and "Invalid pricing value" in response.get_data(as_text=True)
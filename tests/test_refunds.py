@@ -0,0 +1,189 @@
+import sqlite3
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from database.occupancy import check_occupancy, get_occupancy
+from database.refunds import RefundNotFound, RefundWindowClosed, refund_references
+
+
+@pytest.fixture
+def conn(db_path):
+    conn = sqlite3.connect(db_path)
+    yield conn
+    conn.close()
+
+
+def book(client, showtime_id, seat_ids):
+    return client.post("/book", json={
+        "showtime_id": showtime_id, "customer_name": "Ada", "customer_email": "ada@example.com",
+        "customer_phone": "0123", "seat_ids": seat_ids,
+    }).get_json()["booking_reference"]
+
+
+def test_process_refund_records_cancellations(staff_client, seeded_showtime, conn):
+    showtime_id, seats = seeded_showtime["showtime_id"], seeded_showtime["seat_ids"]
+    reference = book(staff_client, showtime_id, seats[:3])
+    kept = book(staff_client, showtime_id, seats[3:4])
+    order_id, paid = conn.execute("SELECT id, total_price FROM booking_orders WHERE booking_reference = ?",
+                                  (reference,)).fetchone()
+
+    staff_client.post("/process_refund", data={"order_id": order_id})
+
+    rows = conn.execute("""
+        SELECT booking_reference, showtime_id, seat_id, refund_amount, original_price, reason, staff_id
+        FROM cancellations ORDER BY seat_id
+    """).fetchall()
+    assert [row[2] for row in rows] == seats[:3]
+    assert {(row[0], row[1], row[5], row[6]) for row in rows} == {(reference, showtime_id, "customer",
+                                                                   staff_client.user_id)}
+    assert sum(row[3] for row in rows) == pytest.approx(paid / 2, abs=0.02)
+    assert sum(row[4] for row in rows) == pytest.approx(paid)
+
+    assert [row[0] for row in conn.execute("SELECT booking_reference FROM booking_orders")] == [kept]
+    assert get_occupancy(conn.cursor(), showtime_id) == (1, 50)
+    assert conn.execute("SELECT COUNT(*) FROM email_outbox WHERE kind = 'refund_confirmation'").fetchone()[0] == 1
+
+
+def test_refunds_are_all_or_nothing(staff_client, seeded_showtime, conn):
+    showtime_id, seats = seeded_showtime["showtime_id"], seeded_showtime["seat_ids"]
+    reference = book(staff_client, showtime_id, seats[:2])
+
+    with pytest.raises(RefundNotFound) as missing:
+        refund_references(conn, [reference, "NOPE"])
+    assert missing.value.references == ["NOPE"]
+
+    with pytest.raises(RefundWindowClosed):
+        refund_references(conn, [reference], now=datetime.now() + timedelta(days=2))
+    assert conn.execute("SELECT COUNT(*) FROM bookings").fetchone()[0] == 2
+    assert conn.execute("SELECT COUNT(*) FROM cancellations").fetchone()[0] == 0
+
+    # The cinema's own cancellations are refunded in full whatever the notice
+    refund, = refund_references(conn, [reference], share=1, reason="cinema", enforce_notice=False,
+                                now=datetime.now() + timedelta(days=2))
+    assert refund["refund_amount"] == refund["original_total"]
+    assert refund["seat_numbers"] == [1, 2]
+
+
+def test_bulk_refund_route_uses_constant_statements(staff_client, seeded_showtime, db_path, conn):
+    seats = seeded_showtime["seat_ids"]
+    show_time = seeded_showtime["show_time"]
+    showtime_ids = [seeded_showtime["showtime_id"]] + [
+        conn.execute("INSERT INTO showtimes (film_id, cinema_id, screen_number, show_time, price) VALUES (?, ?, 1, ?, 8)",
+                     (seeded_showtime["film_id"], seeded_showtime["cinema_id"], show_time)).lastrowid
+        for _ in range(39)
+    ]
+    conn.executemany("""
+        INSERT INTO bookings (customer_email, showtime_id, seat_id, booking_reference, total_price)
+        VALUES ('bulk@example.com', ?, ?, ?, 8)
+    """, [(showtime_id, seat_id, f"R{showtime_id}-{n // 2}")
+          for showtime_id in showtime_ids for n, seat_id in enumerate(seats)])
+    conn.commit()
+    references = [row[0] for row in conn.execute("SELECT DISTINCT booking_reference FROM bookings")]
+    assert len(references) == 1000
+
+    statements = []
+    trace = sqlite3.connect(db_path)
+    trace.set_trace_callback(statements.append)
+    refund_references(trace, references[:500], share=1, enforce_notice=False, notify=False)
+    trace.close()
+    # Trigger steps re-trace the statement that fired them, so count distinct statements
+    assert len({sql for sql in statements if not sql.startswith("PRAGMA")}) <= 7
+
+    response = staff_client.post("/bulk_refund", json={"booking_references": references[500:],
+                                                       "full_refund": True, "notify": False})
+    assert response.get_json()["refunded"] == 500
+    assert response.get_json()["refund_total"] == 8000
+    assert conn.execute("SELECT COUNT(*) FROM bookings").fetchone()[0] == 0
+    assert conn.execute("SELECT COUNT(*), SUM(refund_amount) FROM cancellations").fetchone() == (2000, 16000)
+    assert check_occupancy(conn) == []
+
+    assert staff_client.post("/bulk_refund", json={"booking_references": references[:1]}).status_code == 404
+    assert staff_client.post("/bulk_refund", json={}).status_code == 400
+
+
+def test_cancel_sold_out_showtime(staff_client, seeded_showtime, conn):
+    from database.seat_layout import layout_seats, sync_seats
+
+    showtime_id = seeded_showtime["showtime_id"]
+    sync_seats(conn.cursor(), seeded_showtime["screen_id"], layout_seats(120))
+    conn.commit()
+    seats = [row[0] for row in conn.execute("SELECT id FROM seats WHERE screen_id = ? ORDER BY seat_number",
+                                            (seeded_showtime["screen_id"],))]
+    for n in range(0, 116, 4):
+        book(staff_client, showtime_id, seats[n:n + 4])
+    staff_client.post("/holds", json={"showtime_id": showtime_id, "seat_ids": seats[116:]})
+    other = conn.execute("INSERT INTO showtimes (film_id, cinema_id, screen_number, show_time, price) "
+                         "VALUES (?, ?, 1, ?, 8)",
+                         (seeded_showtime["film_id"], seeded_showtime["cinema_id"],
+                          seeded_showtime["show_time"].replace("19:00", "21:00"))).lastrowid
+    conn.commit()
+    kept = book(staff_client, other, seats[:1])
+
+    started = time.perf_counter()
+    response = staff_client.post("/cancel_showtimes", json={"showtime_ids": [showtime_id]})
+    assert time.perf_counter() - started < 1
+
+    assert response.get_json() == {"showtimes": 1, "refunded": 29, "seats": 116,
+                                   "refund_total": response.get_json()["refund_total"]}
+    paid, = conn.execute("SELECT SUM(original_price) FROM cancellations").fetchone()
+    assert response.get_json()["refund_total"] == pytest.approx(paid, abs=0.01 * 29)
+    assert conn.execute("SELECT COUNT(*) FROM cancellations WHERE reason = 'cinema' AND showtime_id = ?",
+                        (showtime_id,)).fetchone()[0] == 116
+    assert conn.execute("SELECT COUNT(*) FROM email_outbox WHERE kind = 'refund_confirmation'").fetchone()[0] == 29
+    assert conn.execute("SELECT COUNT(*) FROM seat_holds").fetchone()[0] == 0
+    assert conn.execute("SELECT COUNT(*) FROM showtimes WHERE id = ?", (showtime_id,)).fetchone()[0] == 0
+    assert [row[0] for row in conn.execute("SELECT booking_reference FROM booking_orders")] == [kept]
+    assert check_occupancy(conn) == []
+
+
+def test_cancel_screen_date_range(staff_client, seeded_showtime, conn):
+    cinema_id, film_id = seeded_showtime["cinema_id"], seeded_showtime["film_id"]
+    days = [(datetime.now() + timedelta(days=n)).strftime("%Y-%m-%d") for n in range(4)]
+    showtimes = {
+        (screen, day): conn.execute(
+            "INSERT INTO showtimes (film_id, cinema_id, screen_number, show_time, price) VALUES (?, ?, ?, ?, 8)",
+            (film_id, cinema_id, screen, f"{days[day]} 19:00:00")).lastrowid
+        for screen in (1, 2) for day in (1, 2, 3)
+    }
+    conn.commit()
+    book(staff_client, showtimes[1, 2], seeded_showtime["seat_ids"][:2])
+
+    response = staff_client.post("/cancel_showtimes", json={
+        "cinema_id": cinema_id, "screen_number": 1, "start": f"{days[1]} 20:00", "end": days[3],
+        "keep_showtimes": True,
+    })
+    # Days 2 and 3 on screen 1, plus the seeded showtime on day 2
+    assert response.get_json()["showtimes"] == 3
+    assert response.get_json()["seats"] == 2
+    assert conn.execute("SELECT COUNT(*) FROM bookings").fetchone()[0] == 0
+    assert conn.execute("SELECT COUNT(*) FROM showtimes").fetchone()[0] == 7
+
+    assert staff_client.post("/cancel_showtimes", json={"cinema_id": cinema_id, "start": "soon"}).status_code == 400
+    assert staff_client.post("/cancel_showtimes", json={"cinema_id": 999}).status_code == 404
+    assert staff_client.post("/cancel_showtimes", json={}).status_code == 400
+
+
+def test_cancel_never_touches_past_showtimes(staff_client, seeded_showtime, conn):
+    cinema_id, film_id = seeded_showtime["cinema_id"], seeded_showtime["film_id"]
+    played = conn.execute(
+        "INSERT INTO showtimes (film_id, cinema_id, screen_number, show_time, price) VALUES (?, ?, 1, ?, 8)",
+        (film_id, cinema_id, (datetime.now() - timedelta(days=2)).strftime("%Y-%m-%d 19:00:00"))).lastrowid
+    conn.execute("INSERT INTO bookings (showtime_id, seat_id, booking_reference, total_price) VALUES (?, ?, 'OLD', 8)",
+                 (played, seeded_showtime["seat_ids"][0]))
+    conn.commit()
+
+    # A cinema with no range means its upcoming showtimes only
+    response = staff_client.post("/cancel_showtimes", json={"cinema_id": cinema_id, "notify": False})
+    assert response.get_json()["showtimes"] == 1
+    response = staff_client.post("/cancel_showtimes", json={"cinema_id": cinema_id, "start": "2000-01-01"})
+    assert response.status_code == 404
+
+    response = staff_client.post("/cancel_showtimes", json={"showtime_ids": [played]})
+    assert response.status_code == 409 and response.get_json()["showtime_ids"] == [played]
+    assert conn.execute("SELECT COUNT(*) FROM bookings WHERE showtime_id = ?", (played,)).fetchone()[0] == 1
+    assert conn.execute("SELECT COUNT(*) FROM cancellations").fetchone()[0] == 0
+
+    assert staff_client.post("/cancel_showtimes", json={"showtime_ids": ["abc"]}).status_code == 400
+    assert staff_client.post("/cancel_showtimes", json={"showtime_ids": "1,2"}).status_code == 400
@@ -0,0 +1,118 @@
+import csv
+import io
+import json
+import sqlite3
+
+import pytest
+
+from database import reporting
+from database.report_export import parquet_available, parquet_types, stream_csv, stream_jsonl, stream_parquet
+
+
+@pytest.fixture
+def dated_bookings(staff_client, db_path, seeded_showtime):
+    """Nine £8 bookings by manager1 spread over January, February and March 2025."""
+    conn = sqlite3.connect(db_path)
+    conn.executemany(
+        "INSERT INTO bookings (showtime_id, seat_id, booking_reference, total_price, booking_date, booking_staff_id) "
+        "VALUES (?, ?, 'r', 8, ?, (SELECT id FROM users WHERE username = 'manager1'))",
+        [(seeded_showtime["showtime_id"], seat_id, f"2025-0{1 + n % 3}-10 12:00:00")
+         for n, seat_id in enumerate(seeded_showtime["seat_ids"][:9])]
+    )
+    conn.commit()
+    conn.close()
+
+
+def test_date_range_filters_every_report(db_path, dated_bookings):
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    cursor = conn.cursor()
+    feb = {"start": "2025-02-01", "end": "2025-02-28"}
+
+    assert [tuple(row) for row in reporting.monthly_revenue(cursor, **feb)] == [("2025-02", 24)]
+    assert [tuple(row) for row in reporting.bookings_per_film(cursor, **feb)] == [("Arrival", 3)]
+    assert [tuple(row) for row in reporting.top_films(cursor, start="2025-02-01")][0][:3] == ("Arrival", 48, 6)
+    assert [row["booking_count"] for row in reporting.staff_bookings(cursor, end="2025-01-31")] == [3]
+    assert [tuple(row) for row in reporting.bookings_per_film(cursor)] == [("Arrival", 9)]
+    conn.close()
+
+
+def test_csv_export_streams_filtered_rows(staff_client, dated_bookings):
+    response = staff_client.get("/report/monthly_revenue?format=csv&start=2025-02-01")
+
+    assert response.status_code == 200
+    assert response.is_streamed
+    assert response.mimetype == "text/csv"
+    assert "monthly_revenue_2025-02-01.csv" in response.headers["Content-Disposition"]
+    assert list(csv.reader(io.StringIO(response.get_data(as_text=True)))) == [
+        ["month", "total_revenue"], ["2025-03", "24.0"], ["2025-02", "24.0"]
+    ]
+
+
+def test_jsonl_export(staff_client, dated_bookings):
+    response = staff_client.get("/report/staff_bookings?format=jsonl&start=2025-03-01&end=2025-03-31")
+
+    assert response.status_code == 200
+    assert [json.loads(line) for line in response.get_data(as_text=True).splitlines()] == [
+        {"month": "2025-03", "staff_name": "manager1", "booking_count": 3, "total_revenue": 24.0}
+    ]
+
+
+def test_html_report_still_renders_with_range(staff_client, dated_bookings):
+    response = staff_client.get("/report/top_film?start=2025-01-01&end=2025-01-31")
+
+    assert response.status_code == 200
+    assert b"Arrival" in response.data and b'name="format"' in response.data
+
+
+@pytest.mark.parametrize("query", ["format=xlsx", "start=yesterday", "start=2025-03-01&end=2025-02-01"])
+def test_bad_export_arguments(staff_client, query):
+    assert staff_client.get(f"/report/monthly_revenue?{query}").status_code == 400
+
+
+@pytest.mark.skipif(parquet_available(), reason="pyarrow is installed")
+def test_parquet_without_pyarrow(staff_client):
+    assert staff_client.get("/report/top_film?format=parquet").status_code == 501
+
+
+def test_parquet_export(staff_client, dated_bookings):
+    pq = pytest.importorskip("pyarrow.parquet")
+    response = staff_client.get("/report/staff_bookings?format=parquet")
+
+    table = pq.read_table(io.BytesIO(response.data))
+    assert table.column_names == ["month", "staff_name", "booking_count", "total_revenue"]
+    assert sum(table.column("booking_count").to_pylist()) == 9
+
+
+def test_exporters_fetch_one_chunk_at_a_time():
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE t (n INTEGER, label TEXT)")
+    conn.executemany("INSERT INTO t VALUES (?, ?)", [(n, f"row {n}") for n in range(10)])
+
+    chunks = stream_csv(conn.execute("SELECT * FROM t"), chunk_size=4)
+    assert next(chunks) == "n,label\r\n" + "".join(f"{n},row {n}\r\n" for n in range(4))
+    assert len(list(chunks)) == 2
+
+    lines = "".join(stream_jsonl(conn.execute("SELECT * FROM t WHERE n < 2"), chunk_size=1)).splitlines()
+    assert [json.loads(line) for line in lines] == [{"n": 0, "label": "row 0"}, {"n": 1, "label": "row 1"}]
+    assert list(stream_csv(conn.execute("SELECT * FROM t WHERE 0"))) == ["n,label\r\n"]
+
+
+def test_parquet_schema_survives_later_chunks():
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE t (n, label, amount)")
+    conn.executemany("INSERT INTO t VALUES (?, ?, ?)", [(1, None, 8), (2, None, 8), (3, "late", 8.5), (4, 7, 9)])
+    first = conn.execute("SELECT * FROM t").fetchmany(2)
+
+    columns = ["n", "label", "amount"]
+    assert parquet_types(columns, first) == ["float64", "string", "float64"]
+    assert parquet_types(columns, first, {"n": "int64"}) == ["int64", "string", "float64"]
+    assert parquet_types(columns, []) == ["string"] * 3
+    assert set(reporting.REPORT_TYPES) == set(reporting.REPORTS)
+
+    pq = pytest.importorskip("pyarrow.parquet")
+    data = b"".join(stream_parquet(conn.execute("SELECT * FROM t"), chunk_size=2, types={"n": "int64"}))
+    table = pq.read_table(io.BytesIO(data))
+    assert table.column("n").to_pylist() == [1, 2, 3, 4]
+    assert table.column("label").to_pylist() == [None, None, "late", "7"]
+    assert table.column("amount").to_pylist() == [8.0, 8.0, 8.5, 9.0]
@@ -0,0 +1,96 @@
+import sqlite3
+
+import pytest
+
+from database import reporting
+from database.reporting import check_reports, rebuild_reports
+
+
+@pytest.fixture
+def conn(db_path):
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    yield conn
+    conn.close()
+
+
+def book(client, showtime_id, seat_ids):
+    response = client.post("/book", json={
+        "showtime_id": showtime_id, "customer_name": "Ada", "customer_email": "ada@example.com",
+        "customer_phone": "0123", "seat_ids": seat_ids,
+    })
+    assert response.status_code == 201
+    return response.get_json()
+
+
+def test_summary_follows_bookings_and_refunds(staff_client, seeded_showtime, conn):
+    showtime_id, seats = seeded_showtime["showtime_id"], seeded_showtime["seat_ids"]
+    first = book(staff_client, showtime_id, seats[:2])
+    book(staff_client, showtime_id, seats[20:21])
+
+    assert check_reports(conn) == []
+    staff = reporting.staff_bookings(conn.cursor())
+    assert [(row["staff_name"], row["booking_count"]) for row in staff] == [("manager1", 3)]
+
+    order_id = conn.execute("SELECT id FROM booking_orders WHERE booking_reference = ?",
+                            (first["booking_reference"],)).fetchone()[0]
+    staff_client.post("/process_refund", data={"order_id": order_id})
+
+    assert check_reports(conn) == []
+    films = reporting.bookings_per_film(conn.cursor())
+    assert [(row["title"], row["total_bookings"]) for row in films] == [("Arrival", 1)]
+
+    conn.execute("UPDATE bookings SET total_price = 100")
+    conn.commit()
+    assert check_reports(conn) == []
+    assert reporting.top_films(conn.cursor())[0]["total_revenue"] == 100
+
+
+def test_rebuild_repairs_drift(conn, seeded_showtime):
+    conn.executemany(
+        "INSERT INTO bookings (showtime_id, seat_id, booking_reference, total_price, booking_date) VALUES (?, ?, 'r', 8, ?)",
+        [(seeded_showtime["showtime_id"], seat_id, f"2025-0{1 + n % 3}-10 12:00:00")
+         for n, seat_id in enumerate(seeded_showtime["seat_ids"][:9])]
+    )
+    conn.execute("DELETE FROM report_daily_cinema_sales WHERE day LIKE '2025-02%'")
+    conn.commit()
+
+    assert [(table, problem, row[0]) for table, problem, row in check_reports(conn)] == [
+        ("report_daily_cinema_sales", "missing", "2025-02-10")
+    ]
+
+    assert rebuild_reports(conn) == {
+        "report_film_sales": 1, "report_daily_cinema_sales": 3, "report_daily_staff_sales": 3,
+        "report_daily_film_sales": 3,
+    }
+    assert check_reports(conn) == []
+    assert [tuple(row) for row in reporting.monthly_revenue(conn.cursor())] == [
+        ("2025-03", 24), ("2025-02", 24), ("2025-01", 24)
+    ]
+
+
+@pytest.mark.parametrize("query", [
+    reporting.bookings_per_film, reporting.monthly_revenue, reporting.top_films, reporting.staff_bookings,
+])
+def test_reports_never_read_bookings(conn, query):
+    tables = set()
+
+    def authorizer(action, table, column, db, trigger):
+        if action == sqlite3.SQLITE_READ:
+            tables.add(table)
+        return sqlite3.SQLITE_OK
+
+    conn.set_authorizer(authorizer)
+    query(conn.cursor())
+    conn.set_authorizer(None)
+
+    assert tables and "bookings" not in tables
+
+
+def test_report_pages_render(staff_client, seeded_showtime):
+    book(staff_client, seeded_showtime["showtime_id"], seeded_showtime["seat_ids"][:1])
+
+    for page in ("bookings_per_film", "monthly_revenue", "top_film", "staff_bookings"):
+        response = staff_client.get(f"/report/{page}")
+        assert response.status_code == 200
+    assert b"Arrival" in staff_client.get("/report/top_film").data
@@ -0,0 +1,120 @@
+import os
+import sqlite3
+import subprocess
+import sys
+
+import pytest
+from flask_bcrypt import generate_password_hash
+from flask_jwt_extended import create_access_token, decode_token
+
+from blueprints.auth import TTLCache, UnknownUser, clear_auth_cache, revoke_user, set_user_role
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache():
+    clear_auth_cache()
+    yield
+    clear_auth_cache()
+
+
+def set_role(db_path, user_id, role):
+    conn = sqlite3.connect(db_path)
+    conn.execute("UPDATE users SET role = ? WHERE id = ?", (role, user_id))
+    conn.commit()
+    conn.close()
+
+
+def test_login_embeds_role_claim(temp_client, db_path):
+    conn = sqlite3.connect(db_path)
+    conn.execute("INSERT INTO users (username, password, role) VALUES ('boss', ?, 'admin')",
+                 (generate_password_hash("secret").decode(),))
+    conn.commit()
+    conn.close()
+
+    response = temp_client.post("/admin_login", data={"username": "boss", "password": "secret"})
+    assert response.status_code == 302
+    token = temp_client.get_cookie("access_token_cookie").value
+    assert decode_token(token)["role"] == "admin"
+
+
+def test_role_claim_is_trusted_until_revoked(staff_client, db_path):
+    # The users table is not consulted while the token's claim stands
+    set_role(db_path, staff_client.user_id, "booking_staff")
+    assert staff_client.get("/manager_dashboard").status_code == 200
+
+    conn = sqlite3.connect(db_path)
+    revoke_user(conn, staff_client.user_id)
+    conn.close()
+
+    assert staff_client.get("/manager_dashboard").status_code == 403
+    response = staff_client.get("/manage_cinemas")
+    assert response.status_code == 302 and response.headers["Location"].endswith("/")
+
+
+def test_role_changes_revoke_outstanding_tokens(staff_client, db_path):
+    conn = sqlite3.connect(db_path)
+    assert staff_client.get("/manager_dashboard").status_code == 200
+
+    set_user_role(conn, "manager1", "booking_staff")
+    assert staff_client.get("/manager_dashboard").status_code == 403
+    set_user_role(conn, "manager1", "manager")
+    assert staff_client.get("/manager_dashboard").status_code == 200
+
+    set_user_role(conn, "manager1", None)
+    assert staff_client.get("/manager_dashboard").status_code == 403
+    assert conn.execute("SELECT COUNT(*) FROM users").fetchone()[0] == 0
+
+    with pytest.raises(UnknownUser):
+        set_user_role(conn, "manager1", "admin")
+    with pytest.raises(ValueError):
+        set_user_role(conn, "nobody", "owner")
+    conn.close()
+
+
+def test_role_change_from_the_command_line(staff_client, temp_app, db_path):
+    # Another process made the change, so this worker only sees it once its cache expires
+    temp_app.config["AUTH_CACHE_TTL"] = 0
+    assert staff_client.get("/manager_dashboard").status_code == 200
+
+    root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+    result = subprocess.run([sys.executable, "-m", "blueprints.auth", "set-role", "manager1", "booking_staff",
+                             "--db", db_path], cwd=root, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    assert staff_client.get("/manager_dashboard").status_code == 403
+
+    result = subprocess.run([sys.executable, "-m", "blueprints.auth", "remove", "ghost", "--db", db_path],
+                            cwd=root, capture_output=True, text=True)
+    assert result.returncode == 1 and "No such user" in result.stdout
+
+
+def test_tokens_without_role_claim_fall_back_to_users(temp_client, db_path):
+    conn = sqlite3.connect(db_path)
+    user_id = conn.execute("INSERT INTO users (username, password, role) VALUES ('till1', 'x', 'booking_staff')").lastrowid
+    conn.commit()
+    conn.close()
+
+    temp_client.set_cookie("access_token_cookie", create_access_token(identity=str(user_id)))
+    assert temp_client.get("/manager_dashboard").status_code == 403
+
+    set_role(db_path, user_id, "manager")
+    clear_auth_cache()
+    assert temp_client.get("/manager_dashboard").status_code == 200
+
+
+def test_ttl_cache_expires_entries():
+    now = [0.0]
+    cache = TTLCache(maxsize=2, clock=lambda: now[0])
+    loads = []
+
+    def loader(value):
+        return lambda: loads.append(value) or value
+
+    assert cache.get("a", loader(1), ttl=10) == 1
+    assert cache.get("a", loader(2), ttl=10) == 1
+    now[0] = 11
+    assert cache.get("a", loader(3), ttl=10) == 3
+
+    cache.get("b", loader(4), ttl=10)
+    cache.get("c", loader(5), ttl=10)
+    assert len(cache._data) == 2
+    assert loads == [1, 3, 4, 5]
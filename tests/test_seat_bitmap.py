@@ -0,0 +1,93 @@
+import sqlite3
+
+import pytest
+
+from database.seat_bitmap import best_available, combine, find_adjacent, load_bitmap, seat_mask, seat_numbers, split
+
+
+@pytest.fixture
+def conn(db_path):
+    conn = sqlite3.connect(db_path)
+    yield conn
+    conn.close()
+
+
+def book(conn, showtime_id, seat_id):
+    conn.execute("INSERT INTO bookings (showtime_id, seat_id, booking_reference, total_price) VALUES (?, ?, 'R', 8)",
+                 (showtime_id, seat_id))
+    conn.commit()
+
+
+def test_halves_round_trip_through_signed_columns():
+    bits = seat_mask([1, 64, 65, 120, 128])
+    lo, hi = split(bits)
+    assert lo < 0 and hi < 0  # seats 64 and 128 set the sign bits
+    assert combine(lo, hi) == bits
+    assert seat_numbers(bits) == [1, 64, 65, 120, 128]
+
+
+def test_bitmap_follows_bookings_and_refunds(staff_client, seeded_showtime, conn):
+    showtime_id, seats = seeded_showtime["showtime_id"], seeded_showtime["seat_ids"]
+    references = [
+        staff_client.post("/book", json={
+            "showtime_id": showtime_id, "customer_name": "Ada", "customer_email": "ada@example.com",
+            "customer_phone": "0123", "seat_ids": [seat_id],
+        }).get_json()["booking_reference"]
+        for seat_id in (seats[0], seats[49])
+    ]
+    assert seat_numbers(load_bitmap(conn.cursor(), showtime_id)[0]) == [1, 50]
+
+    order_id = conn.execute("SELECT id FROM booking_orders WHERE booking_reference = ?", (references[0],)).fetchone()[0]
+    staff_client.post("/process_refund", data={"order_id": order_id})
+    assert seat_numbers(load_bitmap(conn.cursor(), showtime_id)[0]) == [50]
+
+
+def test_bitmap_row_fits_in_32_bytes(seeded_showtime, conn):
+    # A 120-seat screen needs both halves: two 8-byte integers, 16 bytes per showtime
+    conn.executemany("INSERT INTO seats (screen_id, seat_number, seat_type) VALUES (?, ?, 'VIP')",
+                     [(seeded_showtime["screen_id"], n) for n in range(51, 121)])
+    seat_id = conn.execute("SELECT id FROM seats WHERE screen_id = ? AND seat_number = 120",
+                           (seeded_showtime["screen_id"],)).fetchone()[0]
+    book(conn, seeded_showtime["showtime_id"], seat_id)
+
+    bits_lo, bits_hi, types = conn.execute(
+        "SELECT bits_lo, bits_hi, typeof(bits_lo) || typeof(bits_hi) FROM showtime_occupancy WHERE showtime_id = ?",
+        (seeded_showtime["showtime_id"],)
+    ).fetchone()
+    assert types == "integerinteger"
+    assert seat_numbers(combine(bits_lo, bits_hi)) == [120]
+    assert len(seat_mask(range(1, 121)).to_bytes(16, "little")) < 32
+
+
+def test_find_adjacent_respects_rows_and_prefers_the_middle():
+    rows = [("A", seat_mask(range(1, 7))), ("B", seat_mask(range(7, 13)))]
+
+    assert find_adjacent(0, rows, 2) == [3, 4]
+    # Row A has four free seats, but not together; row B is next
+    assert find_adjacent(seat_mask([2, 5]), rows, 3) == [8, 9, 10]
+    # Runs never straddle the gap between rows
+    assert find_adjacent(seat_mask(range(1, 5)) | seat_mask(range(9, 13)), rows, 4) == []
+
+
+def test_best_available_skips_booked_and_held_seats(staff_client, seeded_showtime, conn):
+    showtime_id, seats = seeded_showtime["showtime_id"], seeded_showtime["seat_ids"]
+    conn.executemany("UPDATE seats SET row_label = ? WHERE id = ?",
+                     [("ABCDE"[i // 10], seat_id) for i, seat_id in enumerate(seats)])
+    conn.commit()
+    for seat_id in seats[3:7]:
+        book(conn, showtime_id, seat_id)
+    hold = staff_client.post("/holds", json={"showtime_id": showtime_id, "seat_ids": [seats[14]]}).get_json()
+
+    # Ties between equally central runs go to the lower seat number
+    assert best_available(conn.cursor(), showtime_id, 2) == seats[1:3]
+    # Row A's widest gap is three seats, so four together come from row B around the hold
+    assert best_available(conn.cursor(), showtime_id, 4) == seats[15:19]
+    assert best_available(conn.cursor(), showtime_id, 4, hold_token=hold["hold_token"]) == seats[13:17]
+    assert best_available(conn.cursor(), showtime_id, 3, seat_type="VIP") == seats[43:46]
+    assert best_available(conn.cursor(), showtime_id, 11) == []
+    assert best_available(conn.cursor(), 999, 2) is None
+
+    response = staff_client.get(f"/view_showtime/{showtime_id}/best_available?count=2")
+    assert response.get_json()["seat_ids"] == seats[1:3]
+    assert staff_client.get(f"/view_showtime/{showtime_id}/best_available?count=11").status_code == 409
+    assert staff_client.get(f"/view_showtime/{showtime_id}/best_available?count=0").status_code == 400
@@ -0,0 +1,75 @@
+import sqlite3
+import time
+
+import pytest
+
+from database.booking_engine import SeatConflict, book_seats
+from database.seat_holds import extend_hold, held_seats, hold_seats, release_hold, sweep_expired_holds
+
+
+@pytest.fixture
+def conn(db_path):
+    conn = sqlite3.connect(db_path)
+    yield conn
+    conn.close()
+
+
+def book(conn, showtime_id, seat_ids, hold_token=None):
+    return book_seats(conn, showtime_id, seat_ids, "Ada", "ada@example.com", "0123", None, "ref",
+                      price_for=lambda seat_type: 8.0, hold_token=hold_token)
+
+
+def test_hold_blocks_other_tills_until_converted(conn, seeded_showtime):
+    showtime_id, seats = seeded_showtime["showtime_id"], seeded_showtime["seat_ids"]
+    token, expires_at = hold_seats(conn, showtime_id, seats[:3], ttl=60)
+    assert expires_at > time.time()
+
+    with pytest.raises(SeatConflict) as excinfo:
+        hold_seats(conn, showtime_id, seats[2:4])
+    assert excinfo.value.seat_ids == [seats[2]]
+    with pytest.raises(SeatConflict):
+        book(conn, showtime_id, seats[:1])
+
+    book(conn, showtime_id, seats[:3], hold_token=token)
+    assert held_seats(conn.cursor(), token) == []
+    with pytest.raises(SeatConflict):
+        hold_seats(conn, showtime_id, seats[:1])
+
+
+def test_expired_holds_are_ignored_extended_and_swept(conn, seeded_showtime):
+    showtime_id, seats = seeded_showtime["showtime_id"], seeded_showtime["seat_ids"]
+    stale, _ = hold_seats(conn, showtime_id, seats[:2], ttl=-1)
+
+    # An expired hold neither blocks nor can be extended
+    assert extend_hold(conn, stale)[0] == 0
+    fresh, _ = hold_seats(conn, showtime_id, seats[1:2], ttl=60)
+    assert held_seats(conn.cursor(), fresh) == [(showtime_id, seats[1])]
+
+    assert sweep_expired_holds(conn) == 1
+    assert extend_hold(conn, fresh, ttl=120)[0] == 1
+    assert release_hold(conn, fresh) == 1
+
+
+def test_hold_checks_use_primary_key_lookups(conn):
+    plan = " | ".join(row[3] for row in conn.execute("""
+        EXPLAIN QUERY PLAN SELECT seat_id FROM seat_holds
+        WHERE showtime_id = ? AND seat_id IN (SELECT value FROM json_each(?)) AND expires_at > ?
+    """, (1, "[1, 2]", 0)))
+    assert "USING PRIMARY KEY" in plan
+
+
+def test_book_route_converts_hold_token(staff_client, seeded_showtime):
+    seats = seeded_showtime["seat_ids"][:2]
+    response = staff_client.post("/holds", json={"showtime_id": seeded_showtime["showtime_id"], "seat_ids": seats})
+    assert response.status_code == 201
+    token = response.get_json()["hold_token"]
+
+    response = staff_client.post("/book", json={
+        "showtime_id": seeded_showtime["showtime_id"],
+        "customer_name": "Ada",
+        "customer_email": "ada@example.com",
+        "customer_phone": "0123",
+        "hold_token": token,
+    })
+    assert response.status_code == 201
+    assert staff_client.post(f"/holds/{token}/extend").status_code == 404
@@ -0,0 +1,86 @@
+import sqlite3
+from collections import Counter
+from datetime import datetime, timedelta
+
+import pytest
+
+from database.seat_layout import SeatsInUse, layout_seats, row_label, sync_seats
+
+
+@pytest.fixture
+def conn(db_path):
+    conn = sqlite3.connect(db_path)
+    yield conn
+    conn.close()
+
+
+def screen_seats(conn, screen_id):
+    return conn.execute(
+        "SELECT id, seat_number, seat_type, row_label, col_number FROM seats WHERE screen_id = ? ORDER BY seat_number",
+        (screen_id,)
+    ).fetchall()
+
+
+def test_layout_sections_start_on_new_rows():
+    layout = layout_seats(50, vip_count=10)
+
+    assert [seat[0] for seat in layout] == list(range(1, 51))
+    assert Counter(seat[1] for seat in layout) == {"Lower Hall": 15, "Upper Gallery": 25, "VIP": 10}
+    rows = Counter((seat[2], seat[1]) for seat in layout)
+    assert rows == {("A", "Lower Hall"): 10, ("B", "Lower Hall"): 5,
+                    ("C", "Upper Gallery"): 10, ("D", "Upper Gallery"): 10, ("E", "Upper Gallery"): 5,
+                    ("F", "VIP"): 10}
+    assert layout[-1] == (50, "VIP", "F", 10)
+    assert [row_label(i) for i in (0, 25, 26, 27)] == ["A", "Z", "AA", "AB"]
+
+
+def test_resize_keeps_existing_seat_ids(conn, seeded_showtime):
+    screen_id, seat_ids = seeded_showtime["screen_id"], seeded_showtime["seat_ids"]
+
+    # Same size: only the missing geometry is filled in
+    assert sync_seats(conn.cursor(), screen_id, layout_seats(50)) == {"added": 0, "changed": 50, "removed": 0}
+    assert sync_seats(conn.cursor(), screen_id, layout_seats(50)) == {"added": 0, "changed": 0, "removed": 0}
+
+    counts = sync_seats(conn.cursor(), screen_id, layout_seats(60))
+    assert counts["added"] == 10 and counts["removed"] == 0
+    seats = screen_seats(conn, screen_id)
+    assert [seat[0] for seat in seats[:50]] == seat_ids
+    assert [seat[1:] for seat in seats] == list(layout_seats(60))
+
+
+def test_shrink_refuses_to_drop_booked_seats(conn, seeded_showtime):
+    screen_id, showtime_id, seat_ids = (seeded_showtime[k] for k in ("screen_id", "showtime_id", "seat_ids"))
+    conn.execute("INSERT INTO bookings (showtime_id, seat_id, booking_reference) VALUES (?, ?, 'ref')",
+                 (showtime_id, seat_ids[-1]))
+
+    with pytest.raises(SeatsInUse) as excinfo:
+        sync_seats(conn.cursor(), screen_id, layout_seats(45, vip_count=5))
+    assert excinfo.value.seat_numbers == [50]
+
+    conn.execute("DELETE FROM bookings")
+    assert sync_seats(conn.cursor(), screen_id, layout_seats(45, vip_count=5))["removed"] == 5
+
+
+def test_booked_seats_free_up_once_the_showtime_starts(conn, seeded_showtime):
+    screen_id, showtime_id, seat_ids = (seeded_showtime[k] for k in ("screen_id", "showtime_id", "seat_ids"))
+    conn.execute("INSERT INTO bookings (showtime_id, seat_id, booking_reference) VALUES (?, ?, 'ref')",
+                 (showtime_id, seat_ids[-1]))
+    starts = datetime.strptime(seeded_showtime["show_time"], "%Y-%m-%d %H:%M:%S")
+
+    # show_time is local wall-clock time, so a minute either side must hold whatever the server's UTC offset
+    with pytest.raises(SeatsInUse):
+        sync_seats(conn.cursor(), screen_id, layout_seats(45, vip_count=5), now=starts - timedelta(minutes=1))
+    counts = sync_seats(conn.cursor(), screen_id, layout_seats(45, vip_count=5), now=starts + timedelta(minutes=1))
+    assert counts["removed"] == 5
+
+def test_edit_screen_update_is_a_diff(staff_client, seeded_showtime, conn):
+    screen_id, seat_ids = seeded_showtime["screen_id"], seeded_showtime["seat_ids"]
+
+    response = staff_client.post(f"/edit_screens/{seeded_showtime['cinema_id']}", data={
+        "action": "update", "screen_id": screen_id, "total_seats": 60
+    })
+
+    assert response.status_code == 200
+    seats = screen_seats(conn, screen_id)
+    assert len(seats) == 60
+    assert [seat[0] for seat in seats[:50]] == seat_ids
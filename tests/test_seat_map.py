@@ -0,0 +1,67 @@
+import sqlite3
+
+from database.pricing import get_dynamic_prices
+from database.seat_map import load_seat_map
+
+
+def test_seat_map_is_one_query(db_path, seeded_showtime):
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    conn.execute("INSERT INTO bookings (showtime_id, seat_id, booking_reference, total_price) VALUES (?, ?, 'R', 8)",
+                 (seeded_showtime["showtime_id"], seeded_showtime["seat_ids"][0]))
+    load_seat_map(conn, seeded_showtime["showtime_id"])  # warm the pricing engine
+
+    statements = []
+    conn.set_trace_callback(statements.append)
+    seat_map = load_seat_map(conn, seeded_showtime["showtime_id"])
+    conn.set_trace_callback(None)
+
+    assert len([sql for sql in statements if not sql.startswith("PRAGMA")]) == 1
+    assert seat_map["screen_id"] == seeded_showtime["screen_id"]
+    assert (seat_map["total_seats"], seat_map["booked_seats"]) == (50, 1)
+    assert seat_map["seats"][0]["is_booked"] and not seat_map["seats"][1]["is_booked"]
+    assert [seat["price"] for seat in seat_map["seats"]] == get_dynamic_prices(
+        conn, "Bristol", seeded_showtime["show_time"], [seat["seat_type"] for seat in seat_map["seats"]]
+    )
+    assert load_seat_map(conn, 999) is None
+    conn.close()
+
+
+def test_seats_json_reports_bookings_and_other_tills_holds(staff_client, seeded_showtime):
+    showtime_id, seats = seeded_showtime["showtime_id"], seeded_showtime["seat_ids"]
+    staff_client.post("/book", json={
+        "showtime_id": showtime_id, "customer_name": "Ada", "customer_email": "ada@example.com",
+        "customer_phone": "0123", "seat_ids": seats[:2],
+    })
+    hold = staff_client.post("/holds", json={"showtime_id": showtime_id, "seat_ids": [seats[5]]}).get_json()
+
+    data = staff_client.get(f"/view_showtime/{showtime_id}/seats.json").get_json()
+    by_id = {seat["id"]: seat for seat in data["seats"]}
+    assert (data["total_seats"], data["booked_seats"], data["occupancy"]) == (50, 2, 0.04)
+    assert by_id[seats[0]]["is_booked"] and by_id[seats[5]]["is_held"]
+    assert not by_id[seats[6]]["is_booked"] and not by_id[seats[6]]["is_held"]
+
+    own = staff_client.get(f"/view_showtime/{showtime_id}/seats.json?hold_token={hold['hold_token']}").get_json()
+    assert not {seat["id"]: seat for seat in own["seats"]}[seats[5]]["is_held"]
+
+
+def test_seats_json_is_conditional(staff_client, seeded_showtime):
+    url = f"/view_showtime/{seeded_showtime['showtime_id']}/seats.json"
+    etag = staff_client.get(url).headers["ETag"]
+
+    assert staff_client.get(url, headers={"If-None-Match": etag}).status_code == 304
+
+    staff_client.post("/holds", json={"showtime_id": seeded_showtime["showtime_id"],
+                                      "seat_ids": seeded_showtime["seat_ids"][:1]})
+    other = staff_client.get(url, headers={"If-None-Match": etag})
+    assert other.status_code == 200
+    assert staff_client.get("/view_showtime/999/seats.json").status_code == 404
+
+
+def test_view_showtime_page(staff_client, seeded_showtime):
+    response = staff_client.get(f"/view_showtime/{seeded_showtime['showtime_id']}")
+
+    assert response.status_code == 200
+    assert response.data.count(b'class="seat ') == 50
+    assert b"seats.json" in response.data
+    assert staff_client.get("/view_showtime/999").status_code == 302
@@ -0,0 +1,42 @@
+import sqlite3
+
+from database.database_setup import day_epoch_range
+
+
+def seed_showtime(db_path, show_time):
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    cursor.execute("INSERT INTO cinemas (city, location, num_of_screens) VALUES ('Bristol', 'Harbourside', 1)")
+    cinema_id = cursor.lastrowid
+    cursor.execute("INSERT INTO screens (cinema_id, screen_number, total_seats) VALUES (?, 1, 50)", (cinema_id,))
+    cursor.execute("INSERT INTO films (title, genre, age_rating) VALUES ('Dune', 'Sci-Fi', '12A')")
+    cursor.execute("INSERT INTO showtimes (film_id, cinema_id, screen_number, show_time, price) VALUES (?, ?, 1, ?, 8)",
+                   (cursor.lastrowid, cinema_id, show_time))
+    showtime_id = cursor.lastrowid
+    conn.commit()
+    conn.close()
+    return cinema_id, showtime_id
+
+
+def test_show_date_and_epoch_follow_show_time(db_path):
+    _, showtime_id = seed_showtime(db_path, "2025-04-05 18:00:00")
+    conn = sqlite3.connect(db_path)
+
+    row = conn.execute("SELECT show_date, show_epoch FROM showtimes WHERE id = ?", (showtime_id,)).fetchone()
+    assert row == ("2025-04-05", day_epoch_range("2025-04-05")[0] + 18 * 3600)
+
+    conn.execute("UPDATE showtimes SET show_time = '2025-04-06 10:30:00' WHERE id = ?", (showtime_id,))
+    row = conn.execute("SELECT show_date, show_epoch FROM showtimes WHERE id = ?", (showtime_id,)).fetchone()
+    assert row == ("2025-04-06", day_epoch_range("2025-04-06")[0] + 10 * 3600 + 1800)
+    conn.close()
+
+
+def test_select_cinema_lists_only_the_selected_day(staff_client, db_path):
+    cinema_id, _ = seed_showtime(db_path, "2025-04-05 18:00:00")
+
+    response = staff_client.get(f"/select_cinema?cinema_id={cinema_id}&date=2025-04-05")
+    assert response.status_code == 200
+    assert b"Dune" in response.data
+
+    response = staff_client.get(f"/select_cinema?cinema_id={cinema_id}&date=2025-04-06")
+    assert b"Dune" not in response.data
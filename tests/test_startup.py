@@ -0,0 +1,75 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+# Cold start budget per gunicorn worker. The app used to pull in pandas,
+# scikit-learn and matplotlib at import: ~3.5s and ~200MB before serving.
+MAX_STARTUP_SECONDS = 2.5
+MAX_STARTUP_RSS_MB = 120
+HEAVY_MODULES = ("pandas", "numpy", "sklearn", "matplotlib", "scipy")
+
+PROBE = """
+import json, resource, sys, time
+started = time.perf_counter()
+from app import create_app
+create_app(testing=True)
+seconds = time.perf_counter() - started
+
+# ru_maxrss survives exec and would report the forking pytest process; the
+# kernel's per-image high-water mark does not
+try:
+    with open("/proc/self/status") as status:
+        rss_kb = next(int(line.split()[1]) for line in status if line.startswith("VmHWM:"))
+except OSError:
+    rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({
+    "seconds": seconds,
+    "rss_mb": rss_kb / 1024,
+    "heavy": [name for name in %r if name in sys.modules],
+}))
+""" % (HEAVY_MODULES,)
+
+
+def measure_startup():
+    root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+    result = subprocess.run([sys.executable, "-c", PROBE], cwd=root, capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def test_worker_startup_stays_small():
+    startup = measure_startup()
+    print(f"worker startup: {startup['seconds']:.2f}s, {startup['rss_mb']:.0f} MB RSS")
+
+    assert startup["heavy"] == []
+    assert startup["seconds"] < MAX_STARTUP_SECONDS
+    assert startup["rss_mb"] < MAX_STARTUP_RSS_MB
+
+
+def test_background_jobs_run_in_one_process(temp_app, db_path):
+    import fcntl
+
+    from database import seat_holds
+    from database.database_setup import owns_background_jobs, release_background_jobs
+
+    temp_app.config["SEAT_HOLD_SWEEP_INTERVAL"] = 30
+    other_worker = open(db_path + ".jobs.lock", "a")
+    fcntl.flock(other_worker, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    try:
+        seat_holds.init_app(temp_app)
+        assert "seat_hold_sweeper" not in temp_app.extensions
+    finally:
+        other_worker.close()
+
+    try:
+        assert owns_background_jobs(db_path) and owns_background_jobs(db_path)
+        with open(db_path + ".jobs.lock", "a") as other_worker, pytest.raises(OSError):
+            fcntl.flock(other_worker, fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+        temp_app.config["BACKGROUND_JOBS"] = False
+        with temp_app.app_context():
+            assert not owns_background_jobs(db_path)
+    finally:
+        release_background_jobs()
@@ -0,0 +1,66 @@
+import sqlite3
+import threading
+
+import pytest
+
+from database.database_setup import WalCheckpointer, get_db_connection, run_write_transaction
+
+
+def test_pooled_connections_use_wal_storage(temp_app):
+    with temp_app.app_context():
+        conn = get_db_connection()
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+        assert conn.execute("PRAGMA busy_timeout").fetchone()[0] == 5000
+
+
+def test_storage_mode_comes_from_the_environment(monkeypatch, db_path):
+    from app import create_app
+
+    monkeypatch.setenv("DB_STORAGE_MODE", "rollback")
+    app = create_app(testing=True)
+    app.config["DATABASE"] = db_path
+    with app.app_context():
+        conn = get_db_connection()
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "delete"
+        assert conn.execute("PRAGMA synchronous").fetchone()[0] == 2  # FULL
+
+
+def test_write_transaction_retries_while_database_is_locked(db_path):
+    locker = sqlite3.connect(db_path, check_same_thread=False)
+    locker.execute("BEGIN IMMEDIATE")
+    threading.Timer(0.1, locker.commit).start()
+
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA busy_timeout = 0")
+    run_write_transaction(conn, lambda cur: cur.execute(
+        "INSERT INTO films (title, genre, age_rating) VALUES ('Retry', 'Drama', 'PG')"
+    ), retries=10)
+
+    assert conn.execute("SELECT COUNT(*) FROM films WHERE title = 'Retry'").fetchone()[0] == 1
+    conn.close()
+    locker.close()
+
+
+def test_write_transaction_rolls_back_on_error(db_path):
+    conn = sqlite3.connect(db_path)
+
+    def fail(cur):
+        cur.execute("INSERT INTO films (title, genre, age_rating) VALUES ('Partial', 'Drama', 'PG')")
+        raise LookupError("seat missing")
+
+    with pytest.raises(LookupError):
+        run_write_transaction(conn, fail)
+    assert conn.execute("SELECT COUNT(*) FROM films").fetchone()[0] == 0
+    conn.close()
+
+
+def test_checkpointer_truncates_wal(db_path):
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("INSERT INTO films (title, genre, age_rating) VALUES ('Ckpt', 'Drama', 'PG')")
+    conn.commit()
+
+    result = WalCheckpointer(db_path, mode="TRUNCATE").checkpoint()
+    assert result["busy"] == 0
+    conn.close()